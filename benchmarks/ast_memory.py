@@ -0,0 +1,64 @@
+"""
+AST memory benchmark: bytes per node of a parsed program with the __slots__
+node classes (including their source spans) versus plain objects with a
+per-instance __dict__ (the node classes before slots, without spans).
+
+Usage:
+    python -m benchmarks.ast_memory [statements]
+"""
+import sys
+import tracemalloc
+
+from benchmarks.programs import generate_program
+from src.lexer.token_buffer import tokenize_all
+from src.parser.ast_nodes import AST, BinOp, UnaryOp, Assign
+from src.parser.parser import Parser
+
+
+class DictNode:
+    """Node as it used to be: a plain object with a per-instance __dict__."""
+
+
+def copy_tree(node, slotted):
+    """Deep-copy a tree into fresh slotted nodes or DictNodes; returns (copy, nodes)."""
+    if isinstance(node, list):
+        items = [copy_tree(item, slotted) for item in node]
+        return [item for item, _ in items], sum(count for _, count in items)
+    if not isinstance(node, AST):
+        return node, 0
+    count = 1
+    copy = object.__new__(type(node)) if slotted else DictNode()
+    for name, value in node.fields():
+        value, children = copy_tree(value, slotted)
+        count += children
+        setattr(copy, name, value)
+    if slotted:
+        copy.start, copy.end = node.span
+    elif isinstance(node, (BinOp, UnaryOp, Assign)):
+        copy.token = node.op
+    return copy, count
+
+
+def measure(tree, slotted):
+    """Return (nodes, bytes allocated) for one copy of tree."""
+    tracemalloc.start()
+    copy, count = copy_tree(tree, slotted)
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return count, allocated
+
+
+def main(argv):
+    statements = int(argv[1]) if len(argv) > 1 else 5000
+    tree = Parser(tokenize_all(generate_program(statements))).parse()
+    results = {}
+    for name, slotted in (('dict', False), ('slots', True)):
+        count, allocated = measure(tree, slotted)
+        results[name] = allocated
+        print(f"  {name:6} {count:>9,} nodes  {allocated / 1024 / 1024:8.2f} MiB  {allocated / count:6.1f} bytes/node")
+    print(f"  reduction: {1 - results['slots'] / results['dict']:.0%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
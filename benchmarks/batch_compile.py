@@ -0,0 +1,38 @@
+"""
+Batch compile benchmark: programs per second and time per stage when
+compiling many small independent programs with 1/2/4 worker processes.
+
+Usage:
+    python -m benchmarks.batch_compile [programs] [statements]
+"""
+import os
+import sys
+import tempfile
+
+from benchmarks.programs import generate_program
+from src.batch_compiler import compile_batch, BatchStats
+
+WORKERS = (1, 2, 4)
+
+
+def main(argv):
+    programs = int(argv[1]) if len(argv) > 1 else 200
+    statements = int(argv[2]) if len(argv) > 2 else 50
+    with tempfile.TemporaryDirectory() as directory:
+        filenames = []
+        for n in range(programs):
+            filename = os.path.join(directory, f'program{n}.pas')
+            with open(filename, 'w') as f:
+                f.write(generate_program(statements))
+            filenames.append(filename)
+        print(f"  {programs} programs of {statements} statements, {os.cpu_count()} CPUs")
+        for workers in WORKERS:
+            stats = BatchStats()
+            for _ in compile_batch(filenames, workers=workers, stats=stats):
+                pass
+            print(f"  workers={workers}: " + stats.summary().replace('\n', '\n  '))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
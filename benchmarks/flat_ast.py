@@ -0,0 +1,68 @@
+"""
+Flat AST benchmark: parse time, live memory and serialization of the
+array-backed FlatAST against the object tree, on a generated program.
+
+Usage:
+    python -m benchmarks.flat_ast [statements] [repeats]
+"""
+import pickle
+import sys
+import time
+import tracemalloc
+
+from benchmarks.programs import generate_program
+from src.lexer.token_buffer import tokenize_all
+from src.parser.flat_ast import FlatAST
+from src.parser.parser import Parser
+
+
+def parse_time(tokens, flat, repeats):
+    """Best parse time of tokens over repeats runs."""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        Parser(tokens, flat=flat).parse()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def live_bytes(tokens, flat):
+    """Bytes still allocated once parsing has finished, i.e. the tree itself."""
+    tracemalloc.start()
+    tree = Parser(tokens, flat=flat).parse()
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del tree
+    return allocated
+
+
+def serialize_time(tree, dumps, loads):
+    """Return (bytes, dump seconds, load seconds) for one round trip."""
+    start = time.perf_counter()
+    data = dumps(tree)
+    dumped = time.perf_counter()
+    loads(data)
+    return len(data), dumped - start, time.perf_counter() - dumped
+
+
+def main(argv):
+    statements = int(argv[1]) if len(argv) > 1 else 5000
+    repeats = int(argv[2]) if len(argv) > 2 else 3
+    tokens = tokenize_all(generate_program(statements))
+    flat_tree = Parser(tokens, flat=True).parse()
+    print(f"  {len(flat_tree):,} nodes")
+    codecs = {
+        'objects': (lambda tree: pickle.dumps(tree, pickle.HIGHEST_PROTOCOL), pickle.loads),
+        'flat': (FlatAST.dumps, FlatAST.loads),
+    }
+    for name, flat in (('objects', False), ('flat', True)):
+        seconds = parse_time(tokens, flat, repeats)
+        allocated = live_bytes(tokens, flat)
+        size, dump_seconds, load_seconds = serialize_time(Parser(tokens, flat=flat).parse(), *codecs[name])
+        print(f"  {name:8} parse {seconds * 1000:8.1f} ms  live {allocated / 1024 / 1024:7.2f} MiB  "
+              f"serialized {size / 1024:8.1f} KiB  dump {dump_seconds * 1000:6.1f} ms  load {load_seconds * 1000:6.1f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,70 @@
+"""
+Hash-consing benchmark: distinct AST nodes and memory held by a parsed
+program before and after sharing its identical pure expression subtrees,
+and the time the pass takes.
+
+Usage:
+    python -m benchmarks.hash_consing [size]
+"""
+import gc
+import sys
+import time
+import tracemalloc
+
+from benchmarks.programs import generate_program, expression_heavy
+from src.lexer.token_buffer import tokenize_all
+from src.parser.ast_nodes import AST
+from src.parser.parser import Parser
+from src.optimizer.hash_consing import SubtreeSharer
+
+
+def count_nodes(node, seen):
+    """Add the ids of the distinct nodes reachable from node to seen."""
+    if isinstance(node, list):
+        for item in node:
+            count_nodes(item, seen)
+    elif isinstance(node, AST) and id(node) not in seen:
+        seen.add(id(node))
+        for _, value in node.fields():
+            count_nodes(value, seen)
+    return seen
+
+
+def measure(text):
+    """Return (nodes, bytes) before and after sharing, shared count and pass seconds (untraced)."""
+    tokens = tokenize_all(text)
+    gc.collect()
+    tracemalloc.start()
+    tree = Parser(tokens).parse()
+    before = tracemalloc.get_traced_memory()[0]
+    nodes_before = len(count_nodes(tree, set()))
+    sharer = SubtreeSharer()
+    tree = sharer.visit(tree)
+    sharer.table = {}
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    nodes_after = len(count_nodes(tree, set()))
+    fresh = Parser(tokens).parse()
+    start = time.perf_counter()
+    SubtreeSharer().visit(fresh)
+    seconds = time.perf_counter() - start
+    return (nodes_before, before), (nodes_after, after), sharer.shared, seconds
+
+
+def main(argv):
+    size = int(argv[1]) if len(argv) > 1 else 256 * 1024
+    programs = {
+        'mixed': generate_program(size // 100),
+        'expressions': expression_heavy(size),
+    }
+    for name, text in programs.items():
+        (nodes, before), (shared_nodes, after), shared, seconds = measure(text)
+        print(f"  {name:12} {nodes:>9,} -> {shared_nodes:>9,} nodes  "
+              f"{before / 1024 / 1024:7.2f} -> {after / 1024 / 1024:7.2f} MiB  "
+              f"({1 - after / before:.0%} less, {shared:,} shared, pass {seconds * 1000:.1f} ms)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,43 @@
+"""
+Lazy parsing benchmark: time to parse and check a program declaring many
+helper functions when every body is parsed up front versus when bodies are
+parsed on their first call.
+
+Usage:
+    python -m benchmarks.lazy_parsing [functions] [called] [repeats]
+"""
+import sys
+import time
+
+from benchmarks.programs import function_library
+from src.lexer.token_buffer import tokenize_all
+from src.parser.parser import Parser
+from src.semantic.semantic_analyzer import SemanticAnalyzer
+
+
+def startup_time(tokens, lazy, repeats):
+    """Best time to parse and analyze tokens over repeats runs."""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        tree = Parser(tokens, lazy=lazy).parse()
+        SemanticAnalyzer().visit(tree)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv):
+    functions = int(argv[1]) if len(argv) > 1 else 500
+    called = int(argv[2]) if len(argv) > 2 else 5
+    repeats = int(argv[3]) if len(argv) > 3 else 3
+    tokens = tokenize_all(function_library(functions, called))
+    print(f"  {functions} functions, {called} called, {len(tokens):,} tokens")
+    eager = startup_time(tokens, False, repeats)
+    lazy = startup_time(tokens, True, repeats)
+    print(f"  eager {eager * 1000:8.1f} ms")
+    print(f"  lazy  {lazy * 1000:8.1f} ms  ({eager / lazy:.1f}x faster)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,119 @@
+"""
+Lexer micro-benchmark suite: tokens/second and bytes/second of every lexer
+engine on synthetic identifier-heavy, number-heavy, comment-heavy and deeply
+nested sources at several sizes, compared against a stored baseline.
+
+Usage:
+    python -m benchmarks.lexer_suite [--sizes 16384,65536] [--repeats 3]
+                                     [--tolerance 0.25] [--save-baseline]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from benchmarks.lexer_throughput import count_tokens
+from benchmarks.programs import SYNTHETIC_SOURCES
+
+ENGINES = ('char', 'regex', 'bulk')
+SIZES = (16 * 1024, 64 * 1024, 256 * 1024, 1024 * 1024)
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lexer_baseline.json')
+DEFAULT_TOLERANCE = 0.25
+
+
+def case_name(workload, size, engine):
+    return f'{workload}/{size}/{engine}'
+
+
+def measure(text, engine, repeats=3):
+    """Return the best-of-repeats throughput of engine on text."""
+    best = None
+    tokens = 0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        tokens = count_tokens(text, engine)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return {
+        'tokens': tokens,
+        'bytes': len(text),
+        'seconds': best,
+        'tokens_per_sec': tokens / best,
+        'bytes_per_sec': len(text) / best,
+    }
+
+
+def run_suite(sizes=SIZES, engines=ENGINES, repeats=3, report=None):
+    """Measure every workload, size and engine; returns {case name: result}."""
+    results = {}
+    for workload, generate in SYNTHETIC_SOURCES.items():
+        for size in sizes:
+            text = generate(size)
+            for engine in engines:
+                result = results[case_name(workload, size, engine)] = measure(text, engine, repeats)
+                if report is not None:
+                    report(workload, size, engine, result)
+    return results
+
+
+def load_baseline(path=BASELINE_PATH):
+    """Return the stored baseline, or an empty one if none has been saved."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    baseline = {name: {'tokens_per_sec': round(result['tokens_per_sec']),
+                       'bytes_per_sec': round(result['bytes_per_sec'])}
+                for name, result in results.items()}
+    with open(path, 'w') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def regression(result, expected, tolerance=DEFAULT_TOLERANCE):
+    """
+    Return the fraction by which result is slower than its baseline entry
+    expected, or None if it is within tolerance (or there is no baseline).
+    """
+    if not expected:
+        return None
+    drop = 1 - result['tokens_per_sec'] / expected['tokens_per_sec']
+    return drop if drop > tolerance else None
+
+
+def print_result(workload, size, engine, result):
+    print(f"  {workload:12} {size:>9,} B  {engine:6} {result['tokens_per_sec']:>12,.0f} tokens/s"
+          f"  {result['bytes_per_sec'] / 1e6:8.2f} MB/s")
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Lexer micro-benchmark suite')
+    parser.add_argument('--sizes', default=','.join(map(str, SIZES)), help='comma-separated source sizes in bytes')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='allowed fractional throughput drop against the baseline')
+    parser.add_argument('--save-baseline', action='store_true', help=f'store the results in {BASELINE_PATH}')
+    args = parser.parse_args(argv[1:])
+    sizes = [int(size) for size in args.sizes.split(',')]
+    results = run_suite(sizes, repeats=args.repeats, report=print_result)
+    if args.save_baseline:
+        save_baseline(results)
+        print(f"Baseline saved to {BASELINE_PATH}")
+        return 0
+    baseline = load_baseline()
+    regressions = 0
+    for name, result in results.items():
+        drop = regression(result, baseline.get(name), args.tolerance)
+        if drop is not None:
+            regressions += 1
+            print(f"  REGRESSION {name}: {drop:.0%} slower than baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,56 @@
+"""
+Lexer throughput benchmark: tokens/second of the character-walking engine,
+the regex master-pattern engine and bulk tokenization into a TokenBuffer.
+
+Usage:
+    python -m benchmarks.lexer_throughput [statements] [repeats]
+"""
+import sys
+import time
+
+from benchmarks.programs import generate_program
+from src.lexer.lexer import Lexer
+from src.lexer.token import EOF
+from src.lexer.token_buffer import tokenize_all
+
+
+def count_tokens(text, engine):
+    """Tokenize text completely and return the number of tokens produced."""
+    if engine == 'bulk':
+        return len(tokenize_all(text)) - 1
+    lexer = Lexer(text, use_regex=engine == 'regex')
+    count = 0
+    while lexer.get_next_token().type != EOF:
+        count += 1
+    return count
+
+
+def measure(text, engine, repeats):
+    """Return (tokens, best seconds) over several runs."""
+    best = None
+    tokens = 0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        tokens = count_tokens(text, engine)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return tokens, best
+
+
+def main(argv):
+    statements = int(argv[1]) if len(argv) > 1 else 5000
+    repeats = int(argv[2]) if len(argv) > 2 else 3
+    text = generate_program(statements)
+    print(f"Source: {len(text):,} bytes, best of {repeats} runs")
+    results = {}
+    for name in ('char', 'regex', 'bulk'):
+        tokens, seconds = measure(text, name, repeats)
+        results[name] = seconds
+        print(f"  {name:6} {tokens:>10,} tokens  {seconds:8.3f} s  {tokens / seconds:>12,.0f} tokens/s")
+    for name in ('regex', 'bulk'):
+        print(f"  {name} speedup: {results['char'] / results[name]:.2f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
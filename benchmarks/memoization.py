@@ -0,0 +1,51 @@
+"""
+Memoization benchmark: running naively recursive pure functions (Fib and
+binomial coefficients) without memoization, with the default cache size and
+with caches too small to hold every result.
+
+Usage:
+    python -m benchmarks.memoization [n] [repeats]
+"""
+import sys
+import time
+
+from benchmarks.programs import recursive_functions
+from src.lexer.token_buffer import tokenize_all
+from src.parser.parser import Parser
+from src.semantic.semantic_analyzer import SemanticAnalyzer
+from src.interpreter.interpreter import Interpreter
+from src.interpreter.memo import MEMO_SIZE
+
+
+def run_time(tree, repeats, **options):
+    """Best time to run tree over repeats runs; returns (seconds, interpreter of the last run)."""
+    best = float('inf')
+    for _ in range(repeats):
+        Interpreter.GLOBAL_SCOPE.clear()
+        interpreter = Interpreter(None, **options)
+        start = time.perf_counter()
+        interpreter.run(tree)
+        best = min(best, time.perf_counter() - start)
+    return best, interpreter
+
+
+def main(argv):
+    n = int(argv[1]) if len(argv) > 1 else 18
+    repeats = int(argv[2]) if len(argv) > 2 else 3
+    tree = Parser(tokenize_all(recursive_functions(n))).parse()
+    SemanticAnalyzer().visit(tree)
+    print(f"  Fib({n}) and C({n}, {n // 2}), naively recursive")
+    plain, _ = run_time(tree, repeats)
+    expected = dict(Interpreter.GLOBAL_SCOPE)
+    print(f"    no memoization       {plain * 1000:9.1f} ms")
+    for size in (MEMO_SIZE, 16, 4):
+        memoized, interpreter = run_time(tree, repeats, memoize=True, memo_size=size)
+        assert Interpreter.GLOBAL_SCOPE == expected
+        print(f"    memo_size={size:<5}       {memoized * 1000:9.1f} ms  ({plain / memoized:.0f}x faster)")
+        for cache in interpreter.memo_stats():
+            print(f"      {cache}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
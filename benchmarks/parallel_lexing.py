@@ -0,0 +1,44 @@
+"""
+Parallel lexing scaling benchmark: seconds to tokenize one large source into
+a TokenBuffer with 1, 2, 4 and 8 worker processes (1 is serial tokenize_all).
+
+Usage:
+    python -m benchmarks.parallel_lexing [statements] [repeats]
+"""
+import sys
+import time
+
+from benchmarks.programs import generate_program
+from src.lexer.parallel_lexer import tokenize_parallel
+
+WORKER_COUNTS = (1, 2, 4, 8)
+
+
+def measure(text, workers, repeats):
+    """Return (tokens, best seconds) over several runs."""
+    best = None
+    tokens = 0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        tokens = len(tokenize_parallel(text, workers=workers, threshold=0)) - 1
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return tokens, best
+
+
+def main(argv):
+    statements = int(argv[1]) if len(argv) > 1 else 100000
+    repeats = int(argv[2]) if len(argv) > 2 else 3
+    text = generate_program(statements)
+    print(f"Source: {len(text):,} bytes, best of {repeats} runs")
+    serial = None
+    for workers in WORKER_COUNTS:
+        tokens, seconds = measure(text, workers, repeats)
+        serial = serial or seconds
+        print(f"  {workers} worker(s) {tokens:>10,} tokens  {seconds:8.3f} s  "
+              f"{tokens / seconds:>12,.0f} tokens/s  {serial / seconds:5.2f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,154 @@
+"""
+Expression parsing benchmark: parse time and Python call depth of the Pratt
+expression parser against the recursive descent (one method per precedence
+level) it replaced, on an expression-heavy source.
+
+Usage:
+    python -m benchmarks.parser_expressions [size] [repeats]
+"""
+import sys
+import time
+
+from benchmarks.programs import expression_heavy
+from src.lexer.token import (PLUS, MINUS, MUL, INTEGER_DIV, FLOAT_DIV, LPAREN, RPAREN, ID, INTEGER_CONST, REAL_CONST,
+                             EQUAL, NOT_EQUAL, LESS_THAN, GREATER_THAN, LESS_EQUAL, GREATER_EQUAL, AND, OR, NOT)
+from src.lexer.token_buffer import tokenize_all
+from src.parser.parser import Parser
+
+
+class RecursiveDescentParser(Parser):
+    """
+    The previous expression grammar: one method and call frame per level.
+    Nodes get the same source spans as the Pratt parser gives them.
+    """
+    def boolean_expression(self):
+        start = self.offset()
+        node = self.boolean_term()
+        while self.current_token.type == OR:
+            token = self.current_token
+            self.eat(OR)
+            node = self._span(self.nodes.BooleanOp(left=node, op=token, right=self.boolean_term()), start)
+        return node
+
+    def boolean_term(self):
+        start = self.offset()
+        node = self.boolean_factor()
+        while self.current_token.type == AND:
+            token = self.current_token
+            self.eat(AND)
+            node = self._span(self.nodes.BooleanOp(left=node, op=token, right=self.boolean_factor()), start)
+        return node
+
+    def boolean_factor(self):
+        start = self.offset()
+        if self.current_token.type == NOT:
+            token = self.current_token
+            self.eat(NOT)
+            return self._span(self.nodes.UnaryBoolOp(op=token, expr=self.boolean_factor()), start)
+        elif self.current_token.type == LPAREN:
+            self.eat(LPAREN)
+            node = self.boolean_expression()
+            self.eat(RPAREN)
+            return node
+        else:
+            return self.comparison()
+
+    def comparison(self):
+        start = self.offset()
+        node = self.expr()
+        if self.current_token.type in (EQUAL, NOT_EQUAL, LESS_THAN, GREATER_THAN, LESS_EQUAL, GREATER_EQUAL):
+            token = self.current_token
+            self.eat(token.type)
+            node = self._span(self.nodes.ComparisonOp(left=node, op=token, right=self.expr()), start)
+        return node
+
+    def factor(self):
+        start = self.offset()
+        token = self.current_token
+        if token.type in (PLUS, MINUS):
+            self.eat(token.type)
+            return self._span(self.nodes.UnaryOp(token, self.factor()), start)
+        elif token.type in (INTEGER_CONST, REAL_CONST):
+            self.eat(token.type)
+            return self._span(self.nodes.Num(token), start)
+        elif token.type == LPAREN:
+            self.eat(LPAREN)
+            node = self.expr()
+            self.eat(RPAREN)
+            return node
+        elif token.type == ID:
+            if self.call_follows():
+                return self.function_call()
+            return self.variable()
+        else:
+            self.error()
+
+    def term(self):
+        start = self.offset()
+        node = self.factor()
+        while self.current_token.type in (MUL, INTEGER_DIV, FLOAT_DIV):
+            token = self.current_token
+            self.eat(token.type)
+            node = self._span(self.nodes.BinOp(node, token, self.factor()), start)
+        return node
+
+    def expr(self):
+        start = self.offset()
+        node = self.term()
+        while self.current_token.type in (PLUS, MINUS):
+            token = self.current_token
+            self.eat(token.type)
+            node = self._span(self.nodes.BinOp(node, token, self.term()), start)
+        return node
+
+
+PARSERS = {'recursive': RecursiveDescentParser, 'pratt': Parser}
+
+
+def parse_time(parser_class, buffer, repeats):
+    """Return the best seconds to parse a token buffer."""
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        parser_class(buffer).parse()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def call_profile(parser_class, buffer):
+    """Return (Python calls made, maximum call depth) while parsing."""
+    calls = depth = max_depth = 0
+    def profile(frame, event, arg):
+        nonlocal calls, depth, max_depth
+        if event == 'call':
+            calls += 1
+            depth += 1
+            max_depth = max(max_depth, depth)
+        elif event == 'return':
+            depth -= 1
+    sys.setprofile(profile)
+    try:
+        parser_class(buffer).parse()
+    finally:
+        sys.setprofile(None)
+    return calls, max_depth
+
+
+def main(argv):
+    size = int(argv[1]) if len(argv) > 1 else 256 * 1024
+    repeats = int(argv[2]) if len(argv) > 2 else 5
+    text = expression_heavy(size)
+    buffer = tokenize_all(text)
+    print(f"Source: {len(text):,} bytes, {len(buffer):,} tokens, best of {repeats} runs")
+    times = {}
+    for name, parser_class in PARSERS.items():
+        times[name] = parse_time(parser_class, buffer, repeats)
+        calls, depth = call_profile(parser_class, buffer)
+        print(f"  {name:10} {times[name]:8.3f} s  {calls:>10,} calls  max depth {depth}")
+    print(f"  speedup: {times['recursive'] / times['pratt']:.2f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,173 @@
+"""
+Synthetic program generators for benchmarks.
+Every generator returns valid source text for the interpreter.
+"""
+
+def generate_program(statements=1000):
+    """Generate a program mixing assignments, arithmetic, loops and comments."""
+    lines = [
+        'PROGRAM Bench;',
+        'VAR',
+        '    i, total, counter_value : INTEGER;',
+        '    ratio : REAL;',
+        '',
+        'FUNCTION Scale(x : INTEGER; factor : INTEGER) : INTEGER;',
+        'BEGIN',
+        '    Scale := x * factor + 1',
+        'END;',
+        '',
+        'BEGIN',
+        '    total := 0;',
+        '    ratio := 0.5;',
+    ]
+    for n in range(statements):
+        lines.append(f'    {{ step {n} }}')
+        lines.append(f'    counter_value := Scale({n}, 3) - (total // 7) + {n % 97};')
+        lines.append(f'    IF counter_value >= {n} AND NOT (total <> 0) THEN total := total + 1 END;')
+        lines.append(f'    ratio := ratio * 1.25 / 2.0;')
+    lines.append('    FOR i := 1 TO 10 DO total := total + i')
+    lines.append('END.')
+    return '\n'.join(lines) + '\n'
+
+
+def _fill_program(name, declarations, make_line, size, setup=()):
+    """Build a program whose body repeats make_line(n) until it is about size bytes."""
+    lines = [f'PROGRAM {name};', *declarations, 'BEGIN', *setup]
+    length = sum(len(line) + 1 for line in lines)
+    n = 0
+    while length < size:
+        line = make_line(n)
+        lines.append(line)
+        length += len(line) + 1
+        n += 1
+    lines.append('END.')
+    return '\n'.join(lines) + '\n'
+
+
+def identifier_heavy(size=64 * 1024):
+    """Generate about size bytes of assignments between many long identifiers."""
+    names = [f'variable_name_{i}' for i in range(40)]
+    declarations = ['VAR', f'    {", ".join(names)} : INTEGER;']
+    return _fill_program('Identifiers', declarations, lambda n: (
+        f'    {names[n % 40]} := {names[(n + 1) % 40]} + {names[(n + 7) % 40]} - {names[(n + 13) % 40]};'),
+        size, [f'    {name} := {i};' for i, name in enumerate(names)])
+
+
+def number_heavy(size=64 * 1024):
+    """Generate about size bytes of arithmetic on integer and real literals."""
+    declarations = ['VAR', '    n : REAL;']
+    return _fill_program('Numbers', declarations, lambda n: (
+        f'    n := {n * 7919} + {n % 1000}.{n % 997} * 271828 - 3.14159 / {n % 89 + 1}.5;'), size)
+
+
+def comment_heavy(size=64 * 1024):
+    """Generate about size bytes of mostly comments with a few statements."""
+    declarations = ['VAR', '    x : INTEGER;']
+    return _fill_program('Comments', declarations, lambda n: (
+        f'    {{ comment {n}: the running total is updated every few lines }}' if n % 4 else '    x := x + 1;'), size, ['    x := 0;'])
+
+
+def deeply_nested(size=64 * 1024, depth=40):
+    """Generate about size bytes of expressions nested depth parentheses deep."""
+    declarations = ['VAR', '    x : INTEGER;']
+    return _fill_program('Nested', declarations, lambda n: (
+        f'    x := {"(" * depth}x + {n}{")" * depth};'), size, ['    x := 0;'])
+
+
+SYNTHETIC_SOURCES = {
+    'identifiers': identifier_heavy,
+    'numbers': number_heavy,
+    'comments': comment_heavy,
+    'nested': deeply_nested,
+}
+
+
+def expression_heavy(size=64 * 1024):
+    """Generate about size bytes of long arithmetic chains and boolean conditions."""
+    declarations = ['VAR', '    a, b, c, d : INTEGER;', '    r : REAL;']
+    return _fill_program('Expressions', declarations, lambda n: (
+        f'    r := a * {n} + (b - c) / 3.5 - -d * (a + b * (c - {n % 13})) + 1;' if n % 2 else
+        f'    IF a + {n} > b * 2 AND NOT (c <> d OR a <= {n % 7}) OR d >= 0 THEN a := a + 1 ELSE b := b // 2 END;'),
+        size, ['    a := 1;', '    b := 2;', '    c := 3;', '    d := 4;'])
+
+
+def function_library(functions=500, called=5, statements=20):
+    """Generate a program declaring many helper functions of which only the first few are called."""
+    lines = ['PROGRAM Library;', 'VAR', '    total : INTEGER;']
+    for n in range(functions):
+        lines.append(f'FUNCTION Helper{n}(a, b : INTEGER) : INTEGER;')
+        lines.append('VAR t : INTEGER;')
+        lines.append('BEGIN')
+        lines.append('    t := a;')
+        for k in range(statements):
+            lines.append(f'    IF t > {k} THEN t := t - (b * {k + 1}) DIV 3 ELSE t := t + a * {k % 7} END;')
+        lines.append(f'    Helper{n} := t + {n}')
+        lines.append('END;')
+    lines.append('BEGIN')
+    lines.append('    total := 0;')
+    for n in range(called):
+        lines.append(f'    total := total + Helper{n}({n}, 2);')
+    lines.append('    WRITELN(total)')
+    lines.append('END.')
+    return '\n'.join(lines) + '\n'
+
+
+def nested_blocks(declarations=2000, depth=150, statements=10, working_set=None):
+    """
+    Generate a program declaring many global variables and using them from
+    BEGIN blocks nested depth deep in a function body (blocks in functions
+    are scopes of their own). With working_set, statements only use that
+    many of the variables; otherwise nearly every statement uses new ones.
+    """
+    used = working_set or declarations
+    names = [f'v{i}' for i in range(declarations)]
+    lines = ['PROGRAM Scopes;', 'VAR']
+    lines += [f'    {", ".join(names[i:i + 20])} : INTEGER;' for i in range(0, declarations, 20)]
+    lines += ['FUNCTION Work(n : INTEGER) : INTEGER;', 'BEGIN']
+    for level in range(depth):
+        indent = '    ' * (level % 8 + 1)
+        lines.append(f'{indent}BEGIN')
+        for k in range(statements):
+            target = names[(level * statements + k) * 7 % used]
+            source = names[(level * statements + k) * 13 % used]
+            lines.append(f'{indent}    {target} := {source} + {names[k]} * n;')
+    lines.append('    Work := n')
+    lines.append('END ' * depth + 'END;')
+    lines.append('BEGIN')
+    lines += ['    ' + ' '.join(f'{name} := {i};' for i, name in enumerate(names[i:i + 10], i))
+              for i in range(0, declarations, 10)]
+    lines.append('    v0 := Work(3)')
+    lines.append('END.')
+    return '\n'.join(lines) + '\n'
+
+
+def recursive_functions(n=20):
+    """
+    Generate a program calling naively recursive pure functions, Fib(n) and
+    the binomial coefficient C(n, n DIV 2), whose calls repeat the same
+    arguments exponentially often, and an impure Count that must run every
+    time it is called.
+    """
+    return f"""PROGRAM Recursion;
+VAR
+    calls, fib, binomial : INTEGER;
+FUNCTION Fib(n : INTEGER) : INTEGER;
+BEGIN
+    IF n <= 1 THEN Fib := n ELSE Fib := Fib(n - 1) + Fib(n - 2) END
+END;
+FUNCTION C(n, k : INTEGER) : INTEGER;
+BEGIN
+    IF (k = 0) OR (k = n) THEN C := 1 ELSE C := C(n - 1, k - 1) + C(n - 1, k) END
+END;
+FUNCTION Count(n : INTEGER) : INTEGER;
+BEGIN
+    calls := calls + 1;
+    Count := n
+END;
+BEGIN
+    calls := 0;
+    fib := Fib({n});
+    binomial := C({n}, {n} DIV 2);
+    fib := fib + Count(1) + Count(1)
+END.
+"""
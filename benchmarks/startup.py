@@ -0,0 +1,57 @@
+"""
+Startup benchmark: time from source file to a checked, runnable tree without
+the compiled-AST cache, on a cold cache (compile and store) and on a warm
+cache (load the .pasc file).
+
+Usage:
+    python -m benchmarks.startup [statements] [repeats]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.programs import generate_program
+from run_interpreter import compile_file
+from src.parser.ast_cache import ASTCache
+
+
+def best_time(function, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv):
+    statements = int(argv[1]) if len(argv) > 1 else 5000
+    repeats = int(argv[2]) if len(argv) > 2 else 3
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'program.pas')
+        with open(filename, 'w') as f:
+            f.write(generate_program(statements))
+        cache_dir = os.path.join(directory, 'cache')
+        cache = ASTCache(cache_dir)
+
+        def cold():
+            for entry in os.scandir(cache_dir) if os.path.isdir(cache_dir) else ():
+                os.remove(entry.path)
+            compile_file(filename, ast_cache=cache)
+
+        results = {
+            'no cache': best_time(lambda: compile_file(filename), repeats),
+            'cold': best_time(cold, repeats),
+            'warm': best_time(lambda: compile_file(filename, ast_cache=cache), repeats),
+        }
+        size = os.path.getsize(cache.path(filename))
+    print(f"  {statements:,} statements, .pasc file {size / 1024:.1f} KiB")
+    for name, seconds in results.items():
+        print(f"  {name:9} {seconds * 1000:8.1f} ms")
+    print(f"  warm speedup: {results['no cache'] / results['warm']:.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
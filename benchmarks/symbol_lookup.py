@@ -0,0 +1,74 @@
+"""
+Symbol lookup benchmark: semantic analysis of a program with thousands of
+declarations used from deeply nested blocks, with the iterative, cached
+ScopedSymbolTable.lookup versus the former recursive lookup that checked a
+debug flag on every call, and with a no-op ScopeListener attached.
+
+Usage:
+    python -m benchmarks.symbol_lookup [declarations] [depth] [repeats]
+"""
+import sys
+import time
+
+from benchmarks.programs import nested_blocks
+from src.lexer.token_buffer import tokenize_all
+from src.parser.parser import Parser
+from src.semantic import semantic_analyzer
+from src.semantic.semantic_analyzer import SemanticAnalyzer
+from src.semantic.symbols import ScopedSymbolTable, ScopeListener
+
+_DEBUG = False
+
+
+class RecursiveSymbolTable(ScopedSymbolTable):
+    """The lookup as it used to be: recursive, uncached, checking _DEBUG."""
+    def define(self, symbol):
+        if _DEBUG:
+            print(f'Define: {symbol}')
+        self._symbols[symbol.name] = symbol
+
+    def lookup(self, name, current_scope_only=False):
+        if _DEBUG:
+            print(f'Lookup: {name}. (Scope name: {self.scope_name})')
+        symbol = self._symbols.get(name)
+        if symbol is not None:
+            return symbol
+        if not current_scope_only and self.enclosing_scope is not None:
+            return self.enclosing_scope.lookup(name)
+        return None
+
+
+def analysis_time(tree, repeats, table_class=ScopedSymbolTable, listener=None):
+    """Best time to analyze tree over repeats runs with the given symbol table class."""
+    semantic_analyzer.ScopedSymbolTable = table_class
+    try:
+        best = float('inf')
+        for _ in range(repeats):
+            start = time.perf_counter()
+            SemanticAnalyzer(listener).visit(tree)
+            best = min(best, time.perf_counter() - start)
+        return best
+    finally:
+        semantic_analyzer.ScopedSymbolTable = ScopedSymbolTable
+
+
+def main(argv):
+    declarations = int(argv[1]) if len(argv) > 1 else 5000
+    depth = int(argv[2]) if len(argv) > 2 else 150
+    repeats = int(argv[3]) if len(argv) > 3 else 5
+    print(f"  {declarations} variables, blocks nested {depth} deep")
+    for working_set in (None, 50):
+        text = nested_blocks(declarations, depth, working_set=working_set)
+        tree = Parser(tokenize_all(text)).parse()
+        print(f"  {'every statement uses new variables' if working_set is None else f'statements use {working_set} variables'}:")
+        recursive = analysis_time(tree, repeats, RecursiveSymbolTable)
+        cached = analysis_time(tree, repeats)
+        listened = analysis_time(tree, repeats, listener=ScopeListener())
+        print(f"    recursive lookup     {recursive * 1000:8.1f} ms")
+        print(f"    cached lookup        {cached * 1000:8.1f} ms  ({recursive / cached:.1f}x faster)")
+        print(f"    with no-op listener  {listened * 1000:8.1f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
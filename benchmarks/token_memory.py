@@ -0,0 +1,58 @@
+"""
+Token memory benchmark: allocations made while tokenizing a large program
+and keeping every token, with shared immutable tokens versus one fresh
+object per occurrence (the lexer's behaviour before tokens were shared).
+
+Usage:
+    python -m benchmarks.token_memory [statements]
+"""
+import sys
+import tracemalloc
+
+from benchmarks.programs import generate_program
+from src.lexer.lexer import Lexer
+from src.lexer.token import EOF
+
+
+class DictToken:
+    """Token as it used to be: a plain object with a per-instance __dict__."""
+    def __init__(self, type, value):
+        self.type = type
+        self.value = value
+
+
+def collect(text, fresh):
+    """Tokenize text keeping every token; fresh copies each into a DictToken."""
+    lexer = Lexer(text, use_regex=True)
+    tokens = []
+    while True:
+        token = lexer.get_next_token()
+        tokens.append(DictToken(token.type, token.value) if fresh else token)
+        if token.type == EOF:
+            return tokens
+
+
+def measure(text, fresh):
+    """Return (tokens, distinct token objects, bytes allocated) for one run."""
+    tracemalloc.start()
+    tokens = collect(text, fresh)
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return len(tokens), len({id(token) for token in tokens}), allocated
+
+
+def main(argv):
+    statements = int(argv[1]) if len(argv) > 1 else 5000
+    text = generate_program(statements)
+    print(f"Source: {len(text):,} bytes")
+    results = {}
+    for name, fresh in (('fresh', True), ('shared', False)):
+        count, distinct, allocated = measure(text, fresh)
+        results[name] = allocated
+        print(f"  {name:7} {count:>9,} tokens  {distinct:>9,} objects  {allocated / 1024 / 1024:8.2f} MiB")
+    print(f"  reduction: {1 - results['shared'] / results['fresh']:.0%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
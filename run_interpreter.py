@@ -11,24 +11,100 @@ import argparse
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from src.lexer.lexer import Lexer
+from src.lexer.stream_lexer import StreamLexer
+from src.lexer.token_cache import TokenCache
 from src.parser.parser import Parser
+from src.parser.ast_cache import ASTCache, source_hash
+from src.semantic.semantic_analyzer import SemanticAnalyzer
+from src.semantic.type_checker import check_types
+from src.optimizer.constant_folder import fold_constants
 from src.interpreter.interpreter import Interpreter
+from src.interpreter.memo import MEMO_SIZE
 from src.errors import LexerError, ParserError, SemanticError, RuntimeError
 
 
-def run_file(filename):
-    """Execute a program from a file."""
+# Files at least this large are tokenized from a memory map in chunks
+# instead of being read into a single string.
+STREAM_THRESHOLD = 16 * 1024 * 1024
+
+
+def open_lexer(filename, cache=None):
+    """
+    Create the token source for a source file, streaming large files.
+    With a TokenCache, smaller files come back as a cached TokenBuffer and
+    are only lexed when the cache has no entry for their text.
+    """
+    if os.path.getsize(filename) >= STREAM_THRESHOLD:
+        return StreamLexer.open(filename)
+    with open(filename, 'r') as f:
+        text = f.read()
+    if cache is not None:
+        return cache.tokenize(text)
+    return Lexer(text)
+
+
+def compile_file(filename, token_cache=None, ast_cache=None, optimize=True, strict_types=False):
+    """
+    Parse and semantically check a source file and return its tree.
+    With an ASTCache, an unchanged file is loaded from its .pasc entry
+    instead, and a freshly compiled one is stored there. With optimize,
+    constant expressions in the returned tree are folded. With
+    strict_types, INTEGER/REAL type errors are reported (see type_checker).
+    """
+    tree = _checked_tree(filename, token_cache, ast_cache)
+    if strict_types:
+        check_types(tree)
+    return fold_constants(tree) if optimize else tree
+
+
+def _checked_tree(filename, token_cache, ast_cache):
+    digest = None
+    if ast_cache is not None:
+        digest = source_hash(filename)
+        cached = ast_cache.load(filename, digest)
+        if cached is not None:
+            #.pasc files hold no resolved names, so the loaded tree is analyzed again
+            tree = cached.to_nodes()
+            SemanticAnalyzer().visit(tree)
+            return tree
+    lexer = open_lexer(filename, token_cache)
     try:
-        with open(filename, 'r') as f:
-            code = f.read()
-        
+        if ast_cache is None:
+            tree = Parser(lexer).parse()
+            SemanticAnalyzer().visit(tree)
+            return tree
+        flat_tree = Parser(lexer, flat=True).parse()
+    finally:
+        if isinstance(lexer, StreamLexer):
+            lexer.close()
+    tree = flat_tree.to_nodes()
+    SemanticAnalyzer().visit(tree)
+    ast_cache.store(filename, flat_tree, digest)
+    return tree
+
+
+def run_file(filename, cache_dir=None, use_cache=True, ast_cache_dir=None, strict_types=False, memoize=False, memo_size=MEMO_SIZE):
+    """
+    Execute a program from a file.
+    Args:
+        cache_dir: Directory caching token streams (see TokenCache), if any
+        use_cache: Reuse and write compiled .pasc files (see ASTCache)
+        ast_cache_dir: Directory for .pasc files instead of __pascache__
+            next to the source
+        strict_types: Reject programs with INTEGER/REAL type errors
+        memoize: Cache the results of pure functions (see Interpreter)
+        memo_size: Results kept per memoized function
+    """
+    try:
+        if not os.path.exists(filename):
+            raise FileNotFoundError(filename)
         print(f"Running '{filename}'...")
         print("=" * 70)
         
-        lexer = Lexer(code)
-        parser = Parser(lexer)
-        interpreter = Interpreter(parser)
-        interpreter.interpret()
+        tree = compile_file(filename, TokenCache(cache_dir) if cache_dir else None,
+                            ASTCache(ast_cache_dir) if use_cache else None, strict_types=strict_types)
+        interpreter = Interpreter(None, memoize=memoize, memo_size=memo_size)
+        interpreter.run(tree)
         
         print("=" * 70)
         print(f"✓ Program '{filename}' executed successfully")
@@ -38,6 +114,11 @@ def run_file(filename):
             for var, value in sorted(interpreter.GLOBAL_SCOPE.items()):
                 print(f"  {var} = {value}")
         
+        if interpreter.memo:
+            print("\nMemoized functions:")
+            for cache in interpreter.memo_stats():
+                print(f"  {cache}")
+        
         return 0
         
     except FileNotFoundError:
@@ -115,7 +196,7 @@ def run_repl():
             # Execute
             lexer = Lexer(text)
             parser = Parser(lexer)
-            interpreter = Interpreter(parser)
+            interpreter = Interpreter(parser, keep_globals=True)
             interpreter.interpret()
             
             print("✓ Executed successfully")
@@ -159,6 +240,44 @@ Interactive mode:
         help='Source file to execute (omit for interactive REPL)'
     )
     
+    parser.add_argument(
+        '--token-cache',
+        metavar='DIR',
+        help='Cache token streams in DIR so unchanged sources are not re-lexed'
+    )
+    
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Do not read or write compiled .pasc files'
+    )
+    
+    parser.add_argument(
+        '--cache-dir',
+        metavar='DIR',
+        help='Keep compiled .pasc files in DIR instead of __pascache__ next to the source'
+    )
+    
+    parser.add_argument(
+        '--strict-types',
+        action='store_true',
+        help='Report INTEGER/REAL type errors, such as assigning a REAL to an INTEGER'
+    )
+    
+    parser.add_argument(
+        '--memoize',
+        action='store_true',
+        help='Cache the results of pure functions'
+    )
+    
+    parser.add_argument(
+        '--memo-size',
+        metavar='N',
+        type=int,
+        default=MEMO_SIZE,
+        help=f'Results kept per memoized function (default {MEMO_SIZE})'
+    )
+    
     parser.add_argument(
         '-v', '--version',
         action='version',
@@ -168,7 +287,8 @@ Interactive mode:
     args = parser.parse_args()
     
     if args.file:
-        return run_file(args.file)
+        return run_file(args.file, args.token_cache, not args.no_cache, args.cache_dir, args.strict_types,
+                        args.memoize, args.memo_size)
     else:
         run_repl()
         return 0
@@ -0,0 +1,118 @@
+"""
+Batch front end: lex, parse and semantically analyze many independent
+source files in a process pool.
+Each file compiles to a serialized FlatAST (see FlatAST.dumps) or to the
+first error it hits, with its position. Results are yielded as workers
+finish them, in completion order, and a BatchStats collects throughput and
+the time spent in each stage.
+"""
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from src.lexer.token_buffer import tokenize_all
+from src.parser.parser import Parser
+from src.semantic.semantic_analyzer import SemanticAnalyzer
+from src.errors import InterpreterError
+
+STAGES = ('read', 'lex', 'parse', 'analyze', 'serialize')
+
+CompileResult = namedtuple('CompileResult', ('filename', 'ast', 'error', 'timings'))
+CompileResult.__doc__ = """
+Outcome of compiling one file.
+ast is the serialized FlatAST (None on error), error a CompileError (None
+on success) and timings maps each stage that ran to its seconds.
+"""
+
+CompileError = namedtuple('CompileError', ('kind', 'message', 'line', 'column'))
+CompileError.__doc__ = "Error class name (e.g. 'ParserError'), message and 1-based position, if known."
+
+
+def compile_one(filename):
+    """Compile one file into a CompileResult; runs in the worker processes."""
+    timings = {}
+    clock = time.perf_counter
+    stage = 'read'
+    start = clock()
+    try:
+        with open(filename, 'r') as f:
+            text = f.read()
+        timings['read'] = clock() - start
+        stage, start = 'lex', clock()
+        tokens = tokenize_all(text)
+        timings['lex'] = clock() - start
+        stage, start = 'parse', clock()
+        tree = Parser(tokens, flat=True).parse()
+        timings['parse'] = clock() - start
+        stage, start = 'analyze', clock()
+        SemanticAnalyzer().visit(tree)
+        timings['analyze'] = clock() - start
+        stage, start = 'serialize', clock()
+        data = tree.dumps()
+        timings['serialize'] = clock() - start
+    except InterpreterError as e:
+        timings[stage] = clock() - start
+        return CompileResult(filename, None, CompileError(type(e).__name__, e.message, e.line, e.column), timings)
+    except (OSError, UnicodeDecodeError, RecursionError) as e:
+        timings[stage] = clock() - start
+        return CompileResult(filename, None, CompileError(type(e).__name__, str(e), None, None), timings)
+    return CompileResult(filename, data, None, timings)
+
+
+class BatchStats:
+    """Counters for a batch: programs, failures, wall time and seconds per stage."""
+    def __init__(self):
+        self.programs = 0
+        self.failures = 0
+        self.wall_seconds = 0.0
+        self.stage_seconds = dict.fromkeys(STAGES, 0.0) #summed over workers
+
+    def record(self, result):
+        self.programs += 1
+        if result.error is not None:
+            self.failures += 1
+        for stage, seconds in result.timings.items():
+            self.stage_seconds[stage] += seconds
+
+    @property
+    def throughput(self):
+        """Programs compiled per second of wall time."""
+        return self.programs / self.wall_seconds if self.wall_seconds else 0.0
+
+    def summary(self):
+        lines = [f"{self.programs} programs ({self.failures} failed) in {self.wall_seconds:.3f}s: "
+                 f"{self.throughput:.1f} programs/s"]
+        for stage in STAGES:
+            lines.append(f"  {stage:9} {self.stage_seconds[stage]:8.3f}s")
+        return '\n'.join(lines)
+
+
+def compile_batch(filenames, workers=None, stats=None):
+    """
+    Compile filenames in a pool of worker processes, yielding a
+    CompileResult for each file as soon as it is ready.
+    Args:
+        workers: Number of processes (default: CPU count); 1 compiles in
+            this process without a pool
+        stats: BatchStats to update as results arrive
+    """
+    filenames = list(filenames)
+    workers = min(workers or os.cpu_count() or 1, len(filenames) or 1)
+    start = time.perf_counter()
+    def finished(result):
+        if stats is not None:
+            stats.record(result)
+            stats.wall_seconds = time.perf_counter() - start
+        return result
+    if workers == 1:
+        for filename in filenames:
+            yield finished(compile_one(filename))
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(compile_one, filename) for filename in filenames]
+        try:
+            for future in as_completed(futures):
+                yield finished(future.result())
+        finally:
+            for future in futures: #the caller stopped early
+                future.cancel()
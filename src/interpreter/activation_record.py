@@ -2,35 +2,53 @@
 Activation Record (Stack Frame) for function calls.
 Stores local variables and parameters for each function invocation.
 """
+# Value of a slot that has not been assigned yet
+UNASSIGNED = object()
+
 class ActivationRecord:
     """
     Activation record represents the runtime stack frame for a function call.
     Contains parameters, local variables and return value.
+    Variables live in a list of slots; layout maps their names to slot
+    indices and is shared by every record of the same routine.
     """
-    def __init__(self, name, level, parent=None):
+    def __init__(self, name, level, parent=None, layout=None):
         """
         Initialize an activation record.
         Args:
             name: Function name or scope name
             level: Nesting level (global=0, functions=1+)
             parent: Parent activation record (for lexical scoping)
+            layout: Dict of variable name -> slot index
         """
         self.name = name
         self.level = level
         self.parent = parent
-        self.members = {} #local variables and parameters
-    
+        self.layout = layout if layout is not None else {}
+        self.slots = [UNASSIGNED] * len(self.layout)
+
+    @property
+    def members(self):
+        """Dict of the variables that have been assigned, by name."""
+        return {name: self.slots[slot] for name, slot in self.layout.items() if self.slots[slot] is not UNASSIGNED}
+
     def __setitem__(self, key, value):
-        self.members[key] = value
+        slot = self.layout.get(key)
+        if slot is None:
+            #a variable the layout does not know; give this record its own layout
+            self.layout = {**self.layout, key: len(self.slots)}
+            self.slots.append(value)
+        else:
+            self.slots[slot] = value
 
     def __getitem__(self, key):
         return self.members.get(key)
-    
+
     def get(self, key, default=None):
         return self.members.get(key, default)
-    
+
     def __str__(self):
         return f"{self.name} (level: {self.level})\n" + "Members:\n" + "\n".join(f"  {k}: {v}" for k, v in self.members.items())
-    
+
     def __repr__(self):
         return self.__str__()
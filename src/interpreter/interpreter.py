@@ -3,11 +3,17 @@ Interpreter that walks the Abstract syntax tree.
 Uses the visitor to pattern to traverse and interpret AST nodes.
 Implements call stack and activation records for proper function execution.
 """
-from src.parser.parser import Parser
+from src.parser.parser import Parser, DeferredBlock
+from src.parser.flat_ast import FlatAST
 from src.parser.ast_nodes import Program, Block, VarDecl, FunctionDecl, Param, FunctionCall, Type, BinOp, Num, UnaryOp, Compound, Assign, Var, NoOp, ComparisonOp, BooleanOp, UnaryBoolOp, IfStatement, WhileLoop, ForLoop, Print
 from src.lexer.token import (PLUS, MINUS, MUL, INTEGER_DIV, FLOAT_DIV, EQUAL, NOT_EQUAL, LESS_THAN, GREATER_THAN, LESS_EQUAL, GREATER_EQUAL, AND, OR, NOT)
 from src.semantic.semantic_analyzer import SemanticAnalyzer
-from src.interpreter.activation_record import ActivationRecord
+from src.semantic.type_checker import check_types
+from src.semantic.call_graph import build_call_graph
+from src.optimizer.constant_folder import fold_constants
+from src.optimizer.hash_consing import share_subtrees
+from src.interpreter.activation_record import ActivationRecord, UNASSIGNED
+from src.interpreter.memo import FunctionCache, MEMO_SIZE, MISSING
 from src.errors import RuntimeError
 import sys
 
@@ -30,15 +36,41 @@ class Interpreter(NodeVisitor):
     """
     Interpreter that evaluates the AST. Walks the tree and computes the result.
     Uses call stack with activation records for proper function execution.
+    Variables are read and written through the (depth, slot) addresses the
+    semantic analyzer puts on Var nodes: depth parent links up from the
+    current activation record, then an index into its slots. Running a
+    tree that has not been analyzed is an error, as names are never looked
+    up at runtime.
+    With memoize, calls of functions the call graph proves pure are looked
+    up in a per-function FunctionCache before a new activation record is
+    made; impure functions are always run.
     """
     GLOBAL_SCOPE = {}
     
-    def __init__(self, parser):
-        """ Initialize interpreter with a parser."""
+    def __init__(self, parser, optimize=True, share=False, strict_types=False, memoize=False, memo_size=MEMO_SIZE,
+                 keep_globals=False):
+        """
+        Initialize interpreter with a parser.
+        Args:
+            optimize: fold constant expressions (see constant_folder) before running
+            share: share identical pure expression subtrees (see hash_consing)
+            strict_types: reject INTEGER/REAL type errors (see type_checker)
+            memoize: cache the results of pure functions (see call_graph)
+            memo_size: results kept per memoized function
+            keep_globals: start declared globals with the values GLOBAL_SCOPE holds (the REPL
+                carries variables over between inputs this way)
+        """
         self.parser = parser
-        self.functions = {} #store function AST nodes
+        self.optimize = optimize
+        self.share = share
+        self.strict_types = strict_types
+        self.memoize = memoize
+        self.memo_size = memo_size
+        self.keep_globals = keep_globals
+        self.memo = {} #pure FunctionDecl -> FunctionCache of its results
         self.call_stack = [] #stack of activation records
         self.global_ar = ActivationRecord('GLOBAL', 0)
+        self.layouts = {} #Program or FunctionDecl -> activation record layout
 
     def push_ar(self, ar):
         self.call_stack.append(ar)
@@ -51,7 +83,28 @@ class Interpreter(NodeVisitor):
             return self.call_stack[-1]
         return self.global_ar
 
+    def layout(self, routine, block):
+        """
+        Return the activation record layout (name -> slot) of a Program or
+        FunctionDecl: the function's name (its return value) and parameters
+        first, then the variables of block in declaration order, the order
+        in which the semantic analyzer numbers slots.
+        """
+        layout = self.layouts.get(routine)
+        if layout is None:
+            names = []
+            if type(routine).__name__ == 'FunctionDecl':
+                names = [routine.func_name] + [param.var_node.value for param in routine.params]
+            names += [decl.var_node.value for decl in block.declarations if type(decl).__name__ == 'VarDecl']
+            layout = self.layouts[routine] = {name: slot for slot, name in enumerate(names)}
+        return layout
+
     def visit_Program(self, node):
+        self.global_ar = ActivationRecord('GLOBAL', 0, layout=self.layout(node, node.block))
+        if self.keep_globals:
+            for name, slot in self.global_ar.layout.items():
+                if name in self.GLOBAL_SCOPE:
+                    self.global_ar.slots[slot] = self.GLOBAL_SCOPE[name]
         self.visit(node.block)
 
     def visit_Block(self, node):
@@ -63,8 +116,7 @@ class Interpreter(NodeVisitor):
         pass
 
     def visit_FunctionDecl(self, node):
-        """Store function for later execution."""
-        self.functions[node.func_name] = node
+        pass
 
     def visit_FunctionCall(self, node):
         """
@@ -72,29 +124,53 @@ class Interpreter(NodeVisitor):
         Each function call creates its own activation record on the call stack.
         """
         func_name = node.func_name
-        func_node = self.functions.get(func_name)
-        if func_node is None:
-            raise RuntimeError(f"Undefined Function '{func_name}'")
+        try:
+            func_node, depth = node.decl, node.depth
+        except AttributeError:
+            self.unresolved(func_name)
         if len(self.call_stack) > 1000:
             raise RuntimeError(f"Stack overflow: maximum recursion depth exceeded in '{func_name}'")
         # Evaluate actual parameter expressions
         param_values = [self.visit(arg_expr) for arg_expr in node.actual_params]
-        #create activation record for this function call
-        ar = ActivationRecord(func_name, self.current_ar().level+1, self.current_ar())
-        # Bind parameters to activation record
-        for param_node, arg_value in zip(func_node.params, param_values):
-            param_name = param_node.var_node.value
-            ar[param_name] = arg_value
+        cache = self.memo.get(func_node) if self.memo else None
+        if cache is not None:
+            key = cache.key(param_values)
+            result = cache.get(key)
+            if result is not MISSING:
+                return result
+        #the parent of the new AR is the AR of the routine the function is declared in
+        parent = self.current_ar()
+        while depth:
+            parent = parent.parent
+            depth -= 1
+        block = func_node.block_node
+        if isinstance(block, DeferredBlock):
+            block = block.resolve()
+        ar = ActivationRecord(func_name, parent.level+1, parent, self.layout(func_node, block))
+        # Bind parameters to their slots, after the return value's
+        ar.slots[1:len(param_values)+1] = param_values
         #push acccctivation record onto call stack
         self.push_ar(ar)
         #Execute function body
-        self.visit(func_node.block_node)
+        self.visit(block)
         #Get return value from AR
-        return_value = ar[func_name]
+        return_value = ar.slots[0]
         #pop AR from call stack
         self.pop_ar()
+        if return_value is UNASSIGNED:
+            return_value = None
+        if cache is not None:
+            cache.put(key, return_value)
         return return_value
 
+    def unresolved(self, name):
+        """Fail on a Var or FunctionCall the semantic analyzer did not annotate."""
+        raise RuntimeError(f"Unresolved name '{name}': the tree has not passed semantic analysis")
+
+    def visit_DeferredBlock(self, node):
+        """Parse a lazily parsed function body on its first call, then run it."""
+        return self.visit(node.resolve())
+
     def visit_Type(self, node):
         pass
 
@@ -134,37 +210,39 @@ class Interpreter(NodeVisitor):
             self.visit(child)
 
     def visit_Assign(self, node):
-        var_name = node.left.value
         value = self.visit(node.right)
-        #Assign to current ar or global scope
-        ar = self.current_ar()
-        
-        #If we're in the global AR, also store in GLOBAL_SCOPE
+        ar, slot = self.locate(node.left)
+        ar.slots[slot] = value
+        #If the variable is global, also store in GLOBAL_SCOPE
         if ar is self.global_ar:
-            self.GLOBAL_SCOPE[var_name] = value
-            ar[var_name] = value
-        #check if variable exists in current AR
-        elif var_name in ar.members or var_name == ar.name:
-            #Assign to current AR (local or return value)
-            ar[var_name] = value
-        elif var_name in self.GLOBAL_SCOPE:
-            #assign to global scope
-            self.GLOBAL_SCOPE[var_name] = value
-        else:
-            #New variable - assign to current AR
-            ar[var_name] = value
+            self.GLOBAL_SCOPE[node.left.value] = value
 
     def visit_Var(self, node):
-        var_name = node.value
-        #look up in current AR first
+        try:
+            depth, slot = node.depth, node.slot
+        except AttributeError:
+            self.unresolved(node.value)
         ar = self.current_ar()
-        if var_name in ar.members:
-            return ar[var_name]
-        #Then look in global scope
-        if var_name in self.GLOBAL_SCOPE:
-            return self.GLOBAL_SCOPE[var_name]
-        raise RuntimeError(f"Variable '{var_name}' used before assignment")
-    
+        while depth:
+            ar = ar.parent
+            depth -= 1
+        value = ar.slots[slot]
+        if value is UNASSIGNED:
+            raise RuntimeError(f"Variable '{node.value}' used before assignment")
+        return value
+
+    def locate(self, node):
+        """Return the activation record and slot holding the variable of a Var node."""
+        try:
+            depth, slot = node.depth, node.slot
+        except AttributeError:
+            self.unresolved(node.value)
+        ar = self.current_ar()
+        while depth:
+            ar = ar.parent
+            depth -= 1
+        return ar, slot
+
     def visit_NoOp(self, node):
         pass
 
@@ -213,31 +291,29 @@ class Interpreter(NodeVisitor):
         var_name = node.var_node.value
         start_value = self.visit(node.start_expr)
         end_value = self.visit(node.end_expr)
-        ar = self.current_ar()
+        ar, slot = self.locate(node.var_node)
+        slots = ar.slots
+        is_global = ar is self.global_ar
         if node.is_downto:
             current = start_value
             while current>=end_value:
-                if ar is self.global_ar:
+                if is_global:
                     self.GLOBAL_SCOPE[var_name] = current
-                ar[var_name] = current
+                slots[slot] = current
                 self.visit(node.body)
                 current-=1
-            # Set final value after loop (one past the end)
-            if ar is self.global_ar:
-                self.GLOBAL_SCOPE[var_name] = current
-            ar[var_name] = current
         else:
             current = start_value
             while current<=end_value:
-                if ar is self.global_ar:
+                if is_global:
                     self.GLOBAL_SCOPE[var_name] = current
-                ar[var_name] = current
+                slots[slot] = current
                 self.visit(node.body)
                 current+=1
-            # Set final value after loop (one past the end)
-            if ar is self.global_ar:
-                self.GLOBAL_SCOPE[var_name] = current
-            ar[var_name] = current
+        # Set final value after loop (one past the end)
+        if is_global:
+            self.GLOBAL_SCOPE[var_name] = current
+        slots[slot] = current
             
     def visit_Print(self, node):
         values = []
@@ -255,7 +331,33 @@ class Interpreter(NodeVisitor):
         tree = self.parser.parse()
         if tree is None:
             return ''
+        if isinstance(tree, FlatAST):
+            tree = tree.to_nodes() #views cannot carry the analyzer's annotations
         #Semantic analysis
         semantic_analyzer = SemanticAnalyzer()
         semantic_analyzer.visit(tree)
-        return self.visit(tree)
\ No newline at end of file
+        if self.strict_types:
+            check_types(tree)
+        if self.optimize:
+            tree = fold_constants(tree)
+        if self.share:
+            tree = share_subtrees(tree)
+        return self.run(tree)
+
+    def run(self, tree):
+        """
+        Execute a tree that has already passed semantic analysis. A flat
+        tree is converted to nodes and analyzed again, as its views cannot
+        carry the names the analyzer resolved.
+        """
+        if isinstance(tree, FlatAST):
+            tree = tree.to_nodes()
+            SemanticAnalyzer().visit(tree)
+        if self.memoize:
+            graph = build_call_graph(tree)
+            self.memo = {func: FunctionCache(func.func_name, self.memo_size) for func in graph.pure_functions()}
+        return self.visit(tree)
+
+    def memo_stats(self):
+        """The FunctionCache of every memoized function, in declaration order."""
+        return list(self.memo.values())
\ No newline at end of file
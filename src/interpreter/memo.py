@@ -0,0 +1,57 @@
+"""
+Memoization of pure function calls.
+Each pure function gets a bounded cache of its results keyed by its
+arguments, evicting the least recently used entry when full.
+"""
+from collections import OrderedDict
+
+# Default number of results kept per function
+MEMO_SIZE = 1024
+
+# Result of a lookup that found nothing (a function may return None)
+MISSING = object()
+
+class FunctionCache:
+    """
+    LRU cache of the results of one function.
+    Keys are argument tuples; hits and misses count the lookups.
+    """
+    def __init__(self, name, maxsize=MEMO_SIZE):
+        self.name = name
+        self.maxsize = maxsize
+        self.entries = OrderedDict() #argument key -> result, least recently used first
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(args):
+        """Key of an argument list; types are part of it, as 1 and 1.0 are equal but print differently."""
+        return tuple(args) + tuple(map(type, args))
+
+    def get(self, key):
+        """Return the result stored for key, or MISSING."""
+        result = self.entries.get(key, MISSING)
+        if result is MISSING:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return result
+
+    def put(self, key, result):
+        self.entries[key] = result
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __str__(self):
+        return f"{self.name}: {self.hits} hits, {self.misses} misses, {len(self.entries)}/{self.maxsize} entries"
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}({self})>"
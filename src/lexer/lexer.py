@@ -1,31 +1,151 @@
-from src.lexer.token import (Token, INTEGER_CONST, REAL_CONST, PLUS, MINUS, MUL, INTEGER_DIV, FLOAT_DIV, LPAREN, RPAREN, ID, ASSIGN, BEGIN, END, SEMI, DOT, PROGRAM, VAR, COLON, COMMA, EOF, EQUAL, NOT_EQUAL, LESS_THAN, GREATER_THAN, LESS_EQUAL, GREATER_EQUAL, RESERVED_KEYWORDS)
+import re
+from bisect import bisect_right
+from src.lexer.token import (Token, INTEGER_CONST, REAL_CONST, ID, CASE_INSENSITIVE_KEYWORDS, OPERATOR_TOKENS, EOF_TOKEN)
 from src.errors import LexerError
-class Lexer:
+
+# Bump whenever the token stream produced for some source changes, so token
+# buffers cached by an older version are never reused.
+LEXER_VERSION = 1
+
+# Master pattern for the regex engine: one named group per token kind.
+# Blanks before a token are absorbed by the leading [ \t]* so most tokens
+# cost a single match, and all fixed-text operators share the OPERATOR group
+# (resolved through OPERATOR_TOKENS) so the engine tries five branches, not
+# twenty. Longer operators are listed before their prefixes.
+TOKEN_REGEX = re.compile(r"""
+    [ \t]*
+    (?:
+        (?P<WHITESPACE>\s+)
+      | (?P<ID>[^\W\d]\w*)
+      | (?P<NUMBER>\d+(?:\.\d*)?)
+      | (?P<OPERATOR>:=|<=|<>|>=|//|[-+*/()<>=;.,:])
+      | (?P<COMMENT>\{[^}]*\}?)
+    )
+""", re.VERBOSE)
+
+class NameTable:
+    """
+    Identifier table for one compilation.
+    Every occurrence of an identifier is mapped to a single shared string, so
+    symbol table and activation record lookups compare keys by identity, and
+    each distinct identifier gets a small integer id usable as a dense index.
+    """
+    def __init__(self):
+        self.ids = {} #name -> id
+        self.names = [] #id -> name
+        self.tokens = [] #id -> shared ID token
+
+    def __len__(self):
+        return len(self.names)
+
+    def intern(self, name):
+        """Return the shared string for name, registering it if new."""
+        name_id = self.ids.get(name)
+        if name_id is None:
+            name_id = self._add(name)
+        return self.names[name_id]
+
+    def token(self, name):
+        """Return the shared ID token for name, registering it if new."""
+        name_id = self.ids.get(name)
+        if name_id is None:
+            name_id = self._add(name)
+        return self.tokens[name_id]
+
+    def _add(self, name):
+        name_id = self.ids[name] = len(self.names)
+        self.names.append(name)
+        self.tokens.append(Token(ID, name))
+        return name_id
+
+    def id_of(self, name):
+        """Return the id of a registered name."""
+        return self.ids[name]
+
+
+class LineIndex:
     """
-    Lexical analyzer
+    Sorted offsets at which each line of a text starts.
+    Maps a source offset to its (line, column) with a binary search, so
+    positions only cost anything when one is actually needed.
     """
     def __init__(self, text):
+        starts = [0]
+        find = text.find
+        newline = find('\n')
+        while newline >= 0:
+            starts.append(newline + 1)
+            newline = find('\n', newline + 1)
+        self.starts = starts
+
+    def line_column(self, offset):
+        """Return the 1-based (line, column) of offset."""
+        line = bisect_right(self.starts, offset)
+        return line, offset - self.starts[line - 1] + 1
+
+
+class Lexer:
+    """
+    Lexical analyzer.
+    Only the offset of each token is recorded while scanning (token_start);
+    line and column are derived from offsets on demand for error messages.
+    """
+    def __init__(self, text, use_regex=False, names=None):
+        """
+        Args:
+            text: Source code to tokenize
+            use_regex: Tokenize with the single-pass master-pattern engine
+                instead of walking the source one character at a time
+            names: NameTable to intern identifiers into (a new one by default)
+        """
         self.text = text
+        self.names = names if names is not None else NameTable()
         self.pos = 0
         self.current_char = self.text[self.pos] if self.text else None
-        self.line = 1
-        self.column = 1
+        self.token_start = 0 #offset of the last token returned
+        self._line_index = None
+        if use_regex:
+            self.get_next_token = self._regex_next_token
+
+    def seek(self, pos):
+        """Continue tokenizing from source offset pos (which must not be inside a token or comment)."""
+        self.pos = pos
+        self.current_char = self.text[pos] if pos < len(self.text) else None
+
+    @property
+    def line_index(self):
+        """LineIndex of the source, built on first use."""
+        if self._line_index is None:
+            self._line_index = LineIndex(self.text)
+        return self._line_index
+
+    def line_column(self, offset):
+        """Return the (line, column) of a source offset."""
+        return self.line_index.line_column(offset)
+
+    def token_position(self):
+        """Return the (line, column) of the last token returned."""
+        return self.line_column(self.token_start)
+
+    @property
+    def line(self):
+        return self.line_column(self.pos)[0]
+
+    @property
+    def column(self):
+        return self.line_column(self.pos)[1]
 
     def error(self, message=None):
         msg = message or f"Invalid character '{self.current_char}'"
         raise LexerError(msg, self.line, self.column)
     
     def advance(self):
-        """Move to next character and update line/column."""
-        if self.current_char=='\n':
-            self.line+=1
-            self.column=0
+        """Move to next character."""
         self.pos += 1
         if self.pos>=len(self.text):
             self.current_char = None
         else:
             self.current_char = self.text[self.pos]
-            self.column+=1
 
     def peek(self):
         """Look ahead one character without consuming it"""
@@ -41,11 +161,13 @@ class Lexer:
 
     def skip_comment(self):
         """Skip comments enclosed in {}."""
-        start_line = self.line
-        while self.current_char is not None and self.current_char != '}':
-            self.advance()
-        if self.current_char is None:
-            self.error(f"Unterminated comment starting at line {start_line}")
+        start = self.pos
+        end = self.text.find('}', start)
+        if end < 0:
+            self.pos = len(self.text)
+            self.current_char = None
+            self.error(f"Unterminated comment starting at line {self.line_column(start)[0]}")
+        self.pos = end
         self.advance()
 
     def number(self):
@@ -73,7 +195,9 @@ class Lexer:
         while self.current_char is not None and (self.current_char.isalnum() or self.current_char=='_'):
             result+=self.current_char
             self.advance()
-        token = RESERVED_KEYWORDS.get(result.upper(), Token(ID, result))
+        token = CASE_INSENSITIVE_KEYWORDS.get(result)
+        if token is None:
+            token = self.names.token(result)
         return token
     
     def get_next_token(self):
@@ -90,17 +214,18 @@ class Lexer:
                 self.skip_comment()
                 continue
 
+            self.token_start = self.pos
             if self.current_char.isalpha() or self.current_char=='_':
                 return self._id()
             
             if self.current_char==':' and self.peek()=='=':
                 self.advance()
                 self.advance()
-                return Token(ASSIGN, ':=')
+                return OPERATOR_TOKENS[':=']
             
             if self.current_char==':':
                 self.advance()
-                return Token(COLON, ':')
+                return OPERATOR_TOKENS[':']
             
             if self.current_char.isdigit():
                 return self.number()
@@ -109,66 +234,116 @@ class Lexer:
                 self.advance()
                 if self.current_char=='=':
                     self.advance()
-                    return Token(LESS_EQUAL, '<=')
+                    return OPERATOR_TOKENS['<=']
                 elif self.current_char=='>':
                     self.advance()
-                    return Token(NOT_EQUAL, '<>')
+                    return OPERATOR_TOKENS['<>']
                 else:
-                    return Token(LESS_THAN, '<')
+                    return OPERATOR_TOKENS['<']
                 
             if self.current_char=='>':
                 self.advance()
                 if self.current_char=='=':
                     self.advance()
-                    return Token(GREATER_EQUAL, '>=')
+                    return OPERATOR_TOKENS['>=']
                 else:
-                    return Token(GREATER_THAN, '>')
+                    return OPERATOR_TOKENS['>']
             
             if self.current_char=='=':
                 self.advance()
-                return Token(EQUAL, '=')
+                return OPERATOR_TOKENS['=']
             
             if self.current_char == '+':
                 self.advance()
-                return Token(PLUS, '+')
+                return OPERATOR_TOKENS['+']
             
             if self.current_char == '-':
                 self.advance()
-                return Token(MINUS, '-')
+                return OPERATOR_TOKENS['-']
             
             if self.current_char == '*':
                 self.advance()
-                return Token(MUL, '*')
+                return OPERATOR_TOKENS['*']
             
             if self.current_char=='/' and self.peek()=='/':
                 self.advance()
                 self.advance()
-                return Token(INTEGER_DIV, '//')
+                return OPERATOR_TOKENS['//']
             
             if self.current_char == '/':
                 self.advance()
-                return Token(FLOAT_DIV, '/')
+                return OPERATOR_TOKENS['/']
             
             if self.current_char == '(':
                 self.advance()
-                return Token(LPAREN, '(')
+                return OPERATOR_TOKENS['(']
             
             if self.current_char == ')':
                 self.advance()
-                return Token(RPAREN, ')')
+                return OPERATOR_TOKENS[')']
             
             if self.current_char==';':
                 self.advance()
-                return Token(SEMI, ';')
+                return OPERATOR_TOKENS[';']
             
             if self.current_char=='.':
                 self.advance()
-                return Token(DOT, '.')
+                return OPERATOR_TOKENS['.']
             
             if self.current_char==',':
                 self.advance()
-                return Token(COMMA, ',')
+                return OPERATOR_TOKENS[',']
             
             self.error()
         
-        return Token(EOF, None)
\ No newline at end of file
+        self.token_start = self.pos
+        return EOF_TOKEN
+
+    def _regex_next_token(self):
+        """
+        returns next token from the input using TOKEN_REGEX.
+        Produces the same tokens and positions as get_next_token.
+        """
+        text = self.text
+        pos = self.pos
+        while True:
+            match = TOKEN_REGEX.match(text, pos)
+            if match is None:
+                # End of input, or an invalid character after some blanks
+                while pos < len(text) and text[pos] in ' \t':
+                    pos += 1
+                self._regex_sync(pos)
+                self.token_start = pos
+                if pos >= len(text):
+                    return EOF_TOKEN
+                self.error()
+            kind = match.lastgroup
+            end = match.end()
+            if kind == 'WHITESPACE':
+                pos = end
+                continue
+            if kind == 'COMMENT':
+                if text[end - 1] != '}':
+                    self._regex_sync(end)
+                    start_line = self.line_column(match.start(kind))[0]
+                    self.error(f"Unterminated comment starting at line {start_line}")
+                pos = end
+                continue
+            value = match.group(kind)
+            self.token_start = end - len(value)
+            self.pos = end
+            self.current_char = text[end] if end < len(text) else None
+            if kind == 'ID':
+                return CASE_INSENSITIVE_KEYWORDS.get(value) or self.names.token(value)
+            if kind == 'OPERATOR':
+                return OPERATOR_TOKENS[value]
+            if '.' not in value:
+                return Token(INTEGER_CONST, int(value))
+            if value[-1] == '.':
+                self.error("Invalid number format: expected digit after decimal point")
+            return Token(REAL_CONST, float(value))
+
+    def _regex_sync(self, pos):
+        """Move the regex engine to pos."""
+        self.pos = pos
+        self.current_char = self.text[pos] if pos < len(self.text) else None
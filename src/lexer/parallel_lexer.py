@@ -0,0 +1,114 @@
+"""
+Parallel tokenization of single very large sources.
+The source is cut at whitespace outside comments, so no token or comment
+spans two chunks; each chunk is tokenized into a TokenBuffer in its own
+process and the buffers are merged with their offsets and lines rebased.
+"""
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from src.lexer.token import CASE_INSENSITIVE_KEYWORDS
+from src.lexer.token_buffer import TokenBuffer, tokenize_all, _value_id
+from src.errors import LexerError
+
+# Below this many characters starting worker processes costs more than it saves
+PARALLEL_THRESHOLD = 4 * 1024 * 1024
+
+
+def chunk_boundaries(text, parts):
+    """
+    Return offsets that cut text into at most parts chunks of similar size.
+    Every offset is a whitespace character outside any comment, so splitting
+    there never divides a token or a comment. The list starts with 0 and
+    ends with len(text).
+    """
+    length = len(text)
+    boundaries = [0]
+    for part in range(1, parts):
+        pos = max(length * part // parts, boundaries[-1] + 1)
+        while pos < length:
+            # A '{' after the last '}' means pos is inside a comment
+            if text.rfind('{', 0, pos) > text.rfind('}', 0, pos):
+                close = text.find('}', pos)
+                if close < 0:
+                    pos = length
+                    break
+                pos = close + 1
+            if pos < length and text[pos] in ' \t\r\n':
+                break
+            pos += 1
+        if pos >= length:
+            break
+        boundaries.append(pos)
+    boundaries.append(length)
+    return boundaries
+
+
+def _tokenize_chunk(chunk, base=0, line_base=0):
+    """
+    Worker entry point: tokenize chunk into plain picklable arrays.
+    Offsets and lines are rebased here, in parallel, onto the chunk's offset
+    base and the line_base lines that precede it in the full source.
+    """
+    buffer = tokenize_all(chunk)
+    starts, ends, lines, line_starts = buffer.starts, buffer.ends, buffer.lines, buffer.line_starts[1:]
+    if base:
+        starts = array('q', [start + base for start in starts])
+        ends = array('q', [end + base for end in ends])
+        line_starts = array('q', [start + base for start in line_starts])
+    if line_base:
+        lines = array('I', [line + line_base for line in lines])
+    return (buffer.kinds, starts, ends, lines, line_starts, buffer.value_ids, buffer.values, buffer._value_table)
+
+
+def merge_chunks(results, names=None):
+    """
+    Merge the rebased arrays of consecutive chunks into one TokenBuffer.
+    Every chunk but the last has its EOF dropped, and value ids are remapped
+    onto a single value table.
+    """
+    buffer = TokenBuffer(names)
+    intern = buffer.names.intern
+    value_table = buffer._value_table
+    last = len(results) - 1
+    for number, (kinds, starts, ends, lines, line_starts, value_ids, values, table) in enumerate(results):
+        count = len(kinds) if number == last else len(kinds) - 1
+        # The trailing -1 maps the "no value" id to itself
+        mapping = [0] * len(values) + [-1]
+        for key, value_id in table.items():
+            value = values[value_id]
+            if isinstance(value, str) and key not in CASE_INSENSITIVE_KEYWORDS:
+                value = intern(value)
+            mapping[value_id] = _value_id(value_table, buffer.values, key, value)
+        buffer.kinds.extend(kinds[:count])
+        buffer.starts.extend(starts[:count])
+        buffer.ends.extend(ends[:count])
+        buffer.lines.extend(lines[:count])
+        buffer.value_ids.extend(array('i', map(mapping.__getitem__, value_ids[:count])))
+        buffer.line_starts.extend(line_starts)
+    return buffer
+
+
+def tokenize_parallel(text, workers=None, threshold=PARALLEL_THRESHOLD, names=None):
+    """
+    Tokenize text into a TokenBuffer using a pool of worker processes.
+    Sources shorter than threshold, or that cannot be split, are tokenized
+    serially. If any chunk fails to lex the whole source is re-lexed serially,
+    so the LexerError and its position are exactly those of tokenize_all.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers < 2 or len(text) < threshold:
+        return tokenize_all(text, names)
+    bases = chunk_boundaries(text, workers)
+    if len(bases) < 3:
+        return tokenize_all(text, names)
+    chunks = [text[start:end] for start, end in zip(bases, bases[1:])]
+    line_bases = [0]
+    for chunk in chunks[:-1]:
+        line_bases.append(line_bases[-1] + chunk.count('\n'))
+    try:
+        with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+            results = list(executor.map(_tokenize_chunk, chunks, bases, line_bases))
+    except LexerError:
+        return tokenize_all(text, names)
+    return merge_chunks(results, names)
@@ -0,0 +1,195 @@
+"""
+Streaming lexer for very large source files.
+Tokenizes from a chunked byte reader (a file object, or an mmap of the
+source file) keeping only a small window of the input in memory, and hands
+tokens out lazily through the same interface as Lexer.
+"""
+import mmap
+import re
+from src.lexer.lexer import TOKEN_REGEX, NameTable
+from src.lexer.token import Token, INTEGER_CONST, REAL_CONST, EOF, CASE_INSENSITIVE_KEYWORDS, OPERATOR_TOKENS, EOF_TOKEN
+from src.errors import LexerError
+
+# The master pattern over bytes: \s, \w and \d are ASCII-only here, so
+# identifiers are limited to ASCII letters, digits and underscores.
+BYTES_TOKEN_REGEX = re.compile(TOKEN_REGEX.pattern.encode('ascii'), re.VERBOSE)
+BYTES_OPERATOR_TOKENS = {text.encode('ascii'): token for text, token in OPERATOR_TOKENS.items()}
+BYTES_KEYWORDS = {spelling.encode('ascii'): token for spelling, token in CASE_INSENSITIVE_KEYWORDS.items()}
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+
+class StreamLexer:
+    """
+    Lexer over a byte stream read in fixed-size chunks.
+    Consumed input is dropped on every refill, so memory stays bounded by
+    the chunk size plus the longest single token, however large the source.
+    Tokens, whitespace and comments may straddle chunk boundaries. Lines are
+    counted as input is skipped, since the text is not kept for a LineIndex.
+    """
+    def __init__(self, reader, chunk_size=DEFAULT_CHUNK_SIZE, names=None):
+        """
+        Args:
+            reader: Object with a read(size) method returning bytes
+            chunk_size: Number of bytes to read at a time
+            names: NameTable to intern identifiers into (a new one by default)
+        """
+        self.reader = reader
+        self.names = names if names is not None else NameTable()
+        self.chunk_size = chunk_size
+        self._buffer = b''
+        self._offset = 0 #absolute offset of _buffer[0]
+        self._index = 0 #next unread position in _buffer
+        self._eof = False
+        self._line_start = 0
+        self._closer = None
+        self.pos = 0
+        self.token_start = 0 #offset of the last token returned
+        self.line = 1
+        self.column = 1
+        self._fill()
+        self.current_char = self._char_at(0)
+
+    @classmethod
+    def open(cls, path, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Open a source file, memory-mapped, for streaming tokenization."""
+        f = open(path, 'rb')
+        try:
+            source = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            source = f
+        lexer = cls(source, chunk_size)
+        lexer._closer = (source, f)
+        return lexer
+
+    def close(self):
+        if self._closer is not None:
+            for resource in self._closer:
+                resource.close()
+            self._closer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __iter__(self):
+        """Yield tokens lazily up to and including EOF."""
+        while True:
+            token = self.get_next_token()
+            yield token
+            if token.type == EOF:
+                return
+
+    def line_column(self, offset):
+        """Return the (line, column) of an offset on the current line."""
+        return self.line, offset - self._line_start + 1
+
+    def token_position(self):
+        """Return the (line, column) of the last token returned."""
+        return self.line_column(self.token_start)
+
+    def error(self, message=None):
+        msg = message or f"Invalid character '{self.current_char}'"
+        raise LexerError(msg, self.line, self.column)
+
+    def _fill(self):
+        """Drop consumed input and read the next chunk. Returns False at end of input."""
+        if self._eof:
+            return False
+        chunk = self.reader.read(self.chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._offset += self._index
+        self._buffer = self._buffer[self._index:] + chunk
+        self._index = 0
+        return True
+
+    def _char_at(self, index):
+        if index >= len(self._buffer):
+            return None
+        return self._buffer[index:index + 4].decode('utf-8', errors='replace')[0]
+
+    def _sync(self, index):
+        """Move to buffer index, mirroring Lexer's position bookkeeping."""
+        self._index = index
+        pos = self.pos = self._offset + index
+        self.current_char = self._char_at(index)
+        self.column = pos - self._line_start + 1
+
+    def _count_lines(self, value, end):
+        """Account for the newlines in skipped text ending at buffer index end."""
+        newlines = value.count(b'\n')
+        if newlines:
+            self.line += newlines
+            self._line_start = self._offset + self._buffer.rfind(b'\n', 0, end) + 1
+        return newlines
+
+    def _skip_comment(self, index):
+        """Skip the rest of a comment whose '{' was read before buffer index index."""
+        start_line = self.line
+        while True:
+            end = self._buffer.find(b'}', index)
+            if end >= 0:
+                self._count_lines(self._buffer[index:end], end)
+                return end + 1
+            self._count_lines(self._buffer[index:], len(self._buffer))
+            self._index = len(self._buffer)
+            if not self._fill():
+                self._sync(len(self._buffer))
+                self.error(f"Unterminated comment starting at line {start_line}")
+            index = 0
+
+    def get_next_token(self):
+        """
+        returns next token from the input
+        """
+        index = self._index
+        while True:
+            match = BYTES_TOKEN_REGEX.match(self._buffer, index)
+            if match is not None:
+                kind = match.lastgroup
+                # Skipped text is consumed even at the end of the window, so
+                # long blank runs and comments never grow the buffer
+                if kind == 'WHITESPACE':
+                    self._count_lines(match.group(kind), match.end())
+                    index = match.end()
+                    continue
+                if kind == 'COMMENT':
+                    index = self._skip_comment(match.start(kind) + 1)
+                    continue
+            if match is None:
+                blank = index
+                while blank < len(self._buffer) and self._buffer[blank] in b' \t':
+                    blank += 1
+                if blank < len(self._buffer):
+                    # No token starts here, whatever the next chunk holds
+                    self._sync(blank)
+                    self.token_start = self.pos
+                    self.error()
+            if match is None or match.end() == len(self._buffer):
+                # The token may continue in the next chunk
+                self._index = index
+                if self._fill():
+                    index = self._index
+                    continue
+                if match is None:
+                    self._sync(len(self._buffer))
+                    self.token_start = self.pos
+                    return EOF_TOKEN
+            value = match.group(kind)
+            end = match.end()
+            self._sync(end)
+            self.token_start = self.pos - len(value)
+            if kind == 'OPERATOR':
+                return BYTES_OPERATOR_TOKENS[value]
+            if kind == 'ID':
+                return BYTES_KEYWORDS.get(value) or self.names.token(value.decode('ascii'))
+            if b'.' not in value:
+                return Token(INTEGER_CONST, int(value))
+            if value.endswith(b'.'):
+                self.error("Invalid number format: expected digit after decimal point")
+            return Token(REAL_CONST, float(value))
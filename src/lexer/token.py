@@ -1,12 +1,15 @@
 """ Token types and Token class for the lexer."""
+from collections import namedtuple
+from itertools import product
 
-class Token:
+class Token(namedtuple('Token', ('type', 'value'))):
     """
-    Represents a token with a type and value
+    Represents a token with a type and value.
+    Tokens are immutable and carry no position (lexers record offsets
+    separately), so equal tokens can be shared: every fixed-text token is
+    served from a preallocated singleton.
     """
-    def __init__(self, type, value):
-        self.type = type
-        self.value = value
+    __slots__ = ()
 
     def __str__(self):
         """
@@ -16,7 +19,7 @@ class Token:
     
     def __repr__(self):
         return self.__str__()
-    
+
 
 
 INTEGER = 'INTEGER'
@@ -84,4 +87,38 @@ RESERVED_KEYWORDS = {
     'DOWNTO': Token(DOWNTO, 'DOWNTO'),
     'PRINT': Token(PRINT, 'PRINT'),
     'WRITELN': Token(WRITELN, 'WRITELN')
-}
\ No newline at end of file
+}
+
+def _case_variants(word):
+    """Every upper/lower-case spelling of word."""
+    return (''.join(chars) for chars in product(*((c.lower(), c.upper()) for c in word)))
+
+# Keywords under every spelling they can appear with in source, so the lexer
+# resolves a word with one dict lookup instead of calling upper() on it.
+CASE_INSENSITIVE_KEYWORDS = {
+    spelling: token
+    for name, token in RESERVED_KEYWORDS.items()
+    for spelling in _case_variants(name)
+}
+
+# Every token type in a fixed order, so a type can be stored as a small int
+# (its index here) in compact token buffers.
+TOKEN_TYPES = (
+    EOF, ID, INTEGER_CONST, REAL_CONST, INTEGER, REAL,
+    PLUS, MINUS, MUL, INTEGER_DIV, FLOAT_DIV, LPAREN, RPAREN, ASSIGN,
+    SEMI, DOT, COLON, COMMA, EQUAL, NOT_EQUAL, LESS_THAN, GREATER_THAN,
+    LESS_EQUAL, GREATER_EQUAL, PROGRAM, VAR, BEGIN, END, FUNCTION,
+    AND, OR, NOT, IF, THEN, ELSE, WHILE, DO, FOR, TO, DOWNTO, PRINT, WRITELN,
+)
+TOKEN_KINDS = {token_type: kind for kind, token_type in enumerate(TOKEN_TYPES)}
+
+# Singleton tokens for every operator and punctuation spelling
+OPERATOR_TYPES = {
+    ':=': ASSIGN, ':': COLON, '<=': LESS_EQUAL, '<>': NOT_EQUAL, '<': LESS_THAN,
+    '>=': GREATER_EQUAL, '>': GREATER_THAN, '=': EQUAL, '+': PLUS, '-': MINUS,
+    '*': MUL, '//': INTEGER_DIV, '/': FLOAT_DIV, '(': LPAREN, ')': RPAREN,
+    ';': SEMI, '.': DOT, ',': COMMA,
+}
+OPERATOR_TOKENS = {text: Token(token_type, text) for text, token_type in OPERATOR_TYPES.items()}
+EOF_TOKEN = Token(EOF, None)
+
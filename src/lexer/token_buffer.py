@@ -0,0 +1,371 @@
+"""
+Compact token buffers.
+A TokenBuffer stores a whole token stream as parallel arrays instead of one
+Token object per token, so large sources can be tokenized in bulk and the
+stream kept, copied or serialized cheaply.
+"""
+import marshal
+from array import array
+from bisect import bisect_left, bisect_right
+from src.lexer.lexer import Lexer, NameTable, TOKEN_REGEX, LEXER_VERSION
+from src.lexer.token import (Token, TOKEN_TYPES, TOKEN_KINDS, RESERVED_KEYWORDS, CASE_INSENSITIVE_KEYWORDS, OPERATOR_TOKENS, EOF_TOKEN, ID, INTEGER_CONST, REAL_CONST, EOF)
+from src.errors import LexerError
+
+# Token of each kind whose value id is -1: operators and keywords always
+# carry the same text, so only identifiers and numbers need the side table.
+DEFAULT_TOKENS = [None] * len(TOKEN_TYPES)
+for _token in (*OPERATOR_TOKENS.values(), *RESERVED_KEYWORDS.values(), EOF_TOKEN):
+    if DEFAULT_TOKENS[TOKEN_KINDS[_token.type]] is None:
+        DEFAULT_TOKENS[TOKEN_KINDS[_token.type]] = _token
+DEFAULT_VALUES = [token.value if token is not None else None for token in DEFAULT_TOKENS]
+
+_ID_KIND = TOKEN_KINDS[ID]
+_INTEGER_KIND = TOKEN_KINDS[INTEGER_CONST]
+_REAL_KIND = TOKEN_KINDS[REAL_CONST]
+_EOF_KIND = TOKEN_KINDS[EOF]
+_OPERATOR_KINDS = {text: TOKEN_KINDS[token.type] for text, token in OPERATOR_TOKENS.items()}
+_POSITION_ARRAYS = ('starts', 'ends', 'lines', 'line_starts')
+
+
+class ShiftedArray:
+    """
+    Integer array whose tail can be shifted in constant time.
+    shifts holds [index, delta] pairs sorted by index: every entry from
+    index on is delta more than stored in data. Reads apply the pending
+    shifts, and flush() adds them into data once, giving a plain array back.
+    """
+    def __init__(self, data):
+        self.data = data
+        self.shifts = []
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self.data)
+        value = self.data[index]
+        for first, delta in self.shifts:
+            if first > index:
+                break
+            value += delta
+        return value
+
+    def shift(self, index, delta):
+        """Add delta to every entry from index on."""
+        if not delta or index >= len(self.data):
+            return
+        shifts = self.shifts
+        position = bisect_left([first for first, _ in shifts], index)
+        if position < len(shifts) and shifts[position][0] == index:
+            shifts[position][1] += delta
+        else:
+            shifts.insert(position, [index, delta])
+
+    def splice(self, first, stop, values):
+        """Replace entries first:stop by values, keeping the shifts of the entries after them."""
+        end = first + len(values)
+        base = 0
+        for pending in self.shifts:
+            if pending[0] <= first:
+                base += pending[1]
+            elif pending[0] <= stop:
+                pending[0] = end #applied to removed entries and the tail; now only to the tail
+            else:
+                pending[0] += end - stop
+        if base:
+            values = array(self.data.typecode, [value - base for value in values])
+        self.data[first:stop] = values
+
+    def flush(self):
+        """Apply the pending shifts to data and return it."""
+        data = self.data
+        total = 0
+        for (first, delta), (stop, _) in zip(self.shifts, self.shifts[1:] + [(len(data), 0)]):
+            total += delta
+            if total and first < stop:
+                data[first:stop] = array(data.typecode, map(total.__add__, data[first:stop]))
+        self.shifts = []
+        return data
+
+
+class TokenBuffer:
+    """
+    Struct-of-arrays token stream.
+    Token i has kind kinds[i] (an index into TOKEN_TYPES), source offsets
+    starts[i]:ends[i], line lines[i] and value values[value_ids[i]], or the
+    kind's fixed text when value_ids[i] is -1. The stream always ends with EOF.
+    line_starts holds the offset at which each source line starts, and names
+    the NameTable its identifiers were interned into.
+    After relex, the offsets and lines past the edit are shifted lazily: the
+    position arrays are restored, with the shifts applied, on first use.
+    """
+    def __init__(self, names=None):
+        self.kinds = array('B')
+        self.starts = array('q')
+        self.ends = array('q')
+        self.lines = array('I')
+        self.line_starts = array('q', [0])
+        self.value_ids = array('i')
+        self.values = [] #distinct identifier names and numbers
+        self.names = names if names is not None else NameTable()
+        self._value_tokens = [] #value id -> materialized Token, filled lazily
+        self._value_table = {} #source text -> value id
+        self._shifted = None #position array name -> ShiftedArray, while relex shifts are pending
+
+    def __getattr__(self, name):
+        """Restore the position arrays relex left shifted, on first use."""
+        shifted = self.__dict__.get('_shifted')
+        if not shifted or name not in shifted:
+            raise AttributeError(name)
+        for array_name, array_ in shifted.items():
+            setattr(self, array_name, array_.flush())
+        self._shifted = None
+        return getattr(self, name)
+
+    def shifted_arrays(self):
+        """Return the position arrays as ShiftedArrays, keeping them so until next use."""
+        if self._shifted is None:
+            self._shifted = {name: ShiftedArray(self.__dict__.pop(name)) for name in _POSITION_ARRAYS}
+        return self._shifted
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __iter__(self):
+        for index in range(len(self.kinds)):
+            yield self.token(index)
+
+    def type_at(self, index):
+        """Return the token type of token index."""
+        return TOKEN_TYPES[self.kinds[index]]
+
+    def value_at(self, index):
+        """Return the value of token index."""
+        value_id = self.value_ids[index]
+        if value_id < 0:
+            return DEFAULT_VALUES[self.kinds[index]]
+        return self.values[value_id]
+
+    def position(self, index):
+        """Return the (line, column) of token index."""
+        line = self.lines[index]
+        return line, self.starts[index] - self.line_starts[line - 1] + 1
+
+    def token(self, index):
+        """Return token index as a shared Token (EOF past the end)."""
+        if index >= len(self.kinds):
+            return EOF_TOKEN
+        value_id = self.value_ids[index]
+        if value_id < 0:
+            return DEFAULT_TOKENS[self.kinds[index]]
+        tokens = self._value_tokens
+        if value_id >= len(tokens):
+            tokens.extend([None] * (len(self.values) - len(tokens)))
+        token = tokens[value_id]
+        if token is None:
+            token = tokens[value_id] = Token(TOKEN_TYPES[self.kinds[index]], self.values[value_id])
+        return token
+
+    def dumps(self):
+        """Serialize the buffer to bytes (names are re-interned on load)."""
+        return marshal.dumps((LEXER_VERSION, self.kinds.tobytes(), self.starts.tobytes(), self.ends.tobytes(),
+                              self.lines.tobytes(), self.line_starts.tobytes(), self.value_ids.tobytes(),
+                              self.values, self._value_table))
+
+    @classmethod
+    def loads(cls, data, names=None):
+        """
+        Rebuild a buffer serialized by dumps.
+        Raises ValueError if data is malformed or was written by another
+        lexer version.
+        """
+        try:
+            (version, kinds, starts, ends, lines, line_starts, value_ids, values, value_table) = marshal.loads(data)
+        except (EOFError, TypeError, ValueError) as e:
+            raise ValueError(f"Malformed token buffer: {e}") from None
+        if version != LEXER_VERSION:
+            raise ValueError(f"Token buffer from lexer version {version}, expected {LEXER_VERSION}")
+        buffer = cls(names)
+        try:
+            for array_, raw in ((buffer.kinds, kinds), (buffer.starts, starts), (buffer.ends, ends),
+                                (buffer.lines, lines), (buffer.value_ids, value_ids)):
+                array_.frombytes(raw)
+            buffer.line_starts = array('q')
+            buffer.line_starts.frombytes(line_starts)
+            intern = buffer.names.intern
+            for key, value_id in value_table.items():
+                if isinstance(values[value_id], str) and key not in CASE_INSENSITIVE_KEYWORDS:
+                    values[value_id] = intern(values[value_id])
+        except (AttributeError, IndexError, KeyError, TypeError, ValueError) as e:
+            #a damaged entry can hold anything marshal accepts
+            raise ValueError(f"Malformed token buffer: {e!r}") from None
+        buffer.values = values
+        buffer._value_table = value_table
+        if not (len(buffer.kinds) == len(buffer.starts) == len(buffer.ends) == len(buffer.lines) == len(buffer.value_ids)):
+            raise ValueError("Malformed token buffer: array lengths differ")
+        if buffer.value_ids and max(buffer.value_ids) >= len(values):
+            raise ValueError("Malformed token buffer: value index out of range")
+        return buffer
+
+
+def tokenize_all(text, names=None):
+    """
+    Tokenize the whole of text into a TokenBuffer.
+    Raises the same LexerError as Lexer for invalid input.
+    """
+    buffer = TokenBuffer(names)
+    kinds, starts, ends, lines, value_ids = (buffer.kinds, buffer.starts, buffer.ends, buffer.lines, buffer.value_ids)
+    line_starts = buffer.line_starts
+    values = buffer.values
+    value_table = buffer._value_table
+    keywords = CASE_INSENSITIVE_KEYWORDS
+    intern = buffer.names.intern
+    operator_kinds = _OPERATOR_KINDS
+    match_token = TOKEN_REGEX.match
+    length = len(text)
+    pos = 0
+    line = 1
+    while True:
+        match = match_token(text, pos)
+        if match is None:
+            break
+        kind = match.lastgroup
+        value = match.group(kind)
+        end = match.end()
+        if kind == 'WHITESPACE' or kind == 'COMMENT':
+            if '\n' in value:
+                newline = text.find('\n', pos, end)
+                while newline >= 0:
+                    line_starts.append(newline + 1)
+                    newline = text.find('\n', newline + 1, end)
+                line = len(line_starts)
+            if kind == 'COMMENT' and value[-1] != '}':
+                _raise_lexer_error(text)
+            pos = end
+            continue
+        if kind == 'OPERATOR':
+            kinds.append(operator_kinds[value])
+            value_ids.append(-1)
+        elif kind == 'ID' and value in keywords:
+            keyword = keywords[value]
+            keyword_kind = TOKEN_KINDS[keyword.type]
+            kinds.append(keyword_kind)
+            if keyword.value == DEFAULT_VALUES[keyword_kind]:
+                value_ids.append(-1)
+            else:
+                value_ids.append(_value_id(value_table, values, keyword.value, keyword.value))
+        else:
+            value_id = value_table.get(value)
+            if kind == 'ID':
+                kinds.append(_ID_KIND)
+                if value_id is None:
+                    value_id = _value_id(value_table, values, value, intern(value))
+            elif '.' not in value:
+                kinds.append(_INTEGER_KIND)
+                if value_id is None:
+                    value_id = _value_id(value_table, values, value, int(value))
+            elif value[-1] != '.':
+                kinds.append(_REAL_KIND)
+                if value_id is None:
+                    value_id = _value_id(value_table, values, value, float(value))
+            else:
+                _raise_lexer_error(text)
+            value_ids.append(value_id)
+        starts.append(end - len(value))
+        ends.append(end)
+        lines.append(line)
+        pos = end
+    if text[pos:].strip(' \t'):
+        _raise_lexer_error(text)
+    kinds.append(_EOF_KIND)
+    starts.append(length)
+    ends.append(length)
+    lines.append(line)
+    value_ids.append(-1)
+    return buffer
+
+
+def _value_id(value_table, values, key, value):
+    """Add value to the side table under key and return its index."""
+    value_id = value_table.get(key)
+    if value_id is None:
+        value_id = value_table[key] = len(values)
+        values.append(value)
+    return value_id
+
+
+def _raise_lexer_error(text):
+    """Re-scan text with Lexer so the error and its position match exactly."""
+    lexer = Lexer(text, use_regex=True)
+    while lexer.get_next_token().type != EOF:
+        pass
+    raise LexerError("Invalid input")
+
+
+def relex(buffer, text, offset, removed, inserted):
+    """
+    Patch buffer in place after an edit and return it.
+    text is the whole source after the edit, which replaced removed characters
+    at offset with the string inserted. Lexing restarts at the last token
+    before the edit and stops as soon as a new token lines up with an old one
+    (same kind, value and shifted extent). Tokens after that point are kept,
+    and their offsets and lines are shifted lazily (see ShiftedArray), so the
+    work is proportional to the edit rather than to the file, apart from
+    moving the arrays' tails when the token count changes.
+    """
+    delta = len(inserted) - removed
+    damage_end = offset + len(inserted)
+    shifted = buffer.shifted_arrays()
+    starts, ends, lines, line_starts = (shifted[name] for name in _POSITION_ARRAYS)
+    first = bisect_left(starts, offset)
+    if first == 0:
+        pos, line = 0, 1
+    else:
+        first -= 1
+        pos, line = starts[first], lines[first]
+    lexer = Lexer(text, use_regex=True, names=buffer.names)
+    lexer.seek(pos)
+    segment = TokenBuffer()
+    new_line_starts = []
+    previous_end = pos
+    while True:
+        token = lexer.get_next_token()
+        start, end = lexer.token_start, lexer.pos
+        newline = text.find('\n', previous_end, start)
+        while newline >= 0:
+            new_line_starts.append(newline + 1)
+            line += 1
+            newline = text.find('\n', newline + 1, start)
+        kind = TOKEN_KINDS[token.type]
+        if start >= damage_end:
+            old = bisect_left(starts, start - delta)
+            if (old < len(buffer) and starts[old] == start - delta and ends[old] == end - delta
+                    and buffer.kinds[old] == kind and buffer.value_at(old) == token.value):
+                break
+        segment.kinds.append(kind)
+        segment.starts.append(start)
+        segment.ends.append(end)
+        segment.lines.append(line)
+        if token.value == DEFAULT_VALUES[kind]:
+            segment.value_ids.append(-1)
+        else:
+            # Keyed like tokenize_all: by lexeme, or by value for keywords
+            key = text[start:end] if kind in (_ID_KIND, _INTEGER_KIND, _REAL_KIND) else token.value
+            segment.value_ids.append(_value_id(buffer._value_table, buffer.values, key, token.value))
+        previous_end = end
+    line_delta = line - lines[old]
+    low = bisect_right(line_starts, pos)
+    high = bisect_right(line_starts, start - delta)
+    buffer.kinds[first:old] = segment.kinds
+    buffer.value_ids[first:old] = segment.value_ids
+    starts.splice(first, old, segment.starts)
+    ends.splice(first, old, segment.ends)
+    lines.splice(first, old, segment.lines)
+    tail = first + len(segment)
+    starts.shift(tail, delta)
+    ends.shift(tail, delta)
+    lines.shift(tail, line_delta)
+    line_starts.splice(low, high, array('q', new_line_starts))
+    line_starts.shift(low + len(new_line_starts), delta)
+    return buffer
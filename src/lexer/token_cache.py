@@ -0,0 +1,118 @@
+"""
+On-disk cache of token buffers.
+Entries are keyed by a hash of the source text and the lexer version, so an
+unchanged source is never lexed twice. The cache is safe to share between
+processes: entries are written to a temporary file and renamed into place,
+so readers only ever see complete files, and the directory is kept under a
+size bound by evicting the least recently used entries.
+"""
+import hashlib
+import os
+import tempfile
+from src.lexer.lexer import LEXER_VERSION
+from src.lexer.token_buffer import TokenBuffer, tokenize_all
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+SUFFIX = '.tok'
+
+
+class TokenCache:
+    """
+    Directory of serialized TokenBuffers with LRU eviction.
+    Recency is tracked through file modification times, which every hit
+    refreshes, so concurrent processes share one LRU order without locks.
+    """
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Args:
+            directory: Cache directory, created if missing
+            max_bytes: Total size the cache is trimmed back to after a store
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, text):
+        """Return the cache key of a source text."""
+        digest = hashlib.sha256(f"lexer-{LEXER_VERSION}\0".encode('utf-8'))
+        digest.update(text.encode('utf-8', errors='surrogatepass'))
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def get(self, text, names=None):
+        """Return the cached TokenBuffer for text, or None on a miss."""
+        path = self.path(self.key(text))
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            buffer = TokenBuffer.loads(data, names)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError):
+            # Unreadable or corrupt entry: drop it and lex again
+            self._remove(path)
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return buffer
+
+    def put(self, text, buffer):
+        """Store buffer as the token stream of text and trim the cache."""
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(buffer.dumps())
+            os.replace(temp_path, self.path(self.key(text)))
+        except BaseException:
+            self._remove(temp_path)
+            raise
+        self.evict()
+
+    def tokenize(self, text, names=None):
+        """Return the token buffer of text, from the cache if possible."""
+        buffer = self.get(text, names)
+        if buffer is None:
+            buffer = tokenize_all(text, names)
+            self.put(text, buffer)
+        return buffer
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits max_bytes."""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(SUFFIX):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue #removed by another process
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(SUFFIX):
+                self._remove(entry.path)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1 @@
+"""Optimization passes run on checked trees before interpretation."""
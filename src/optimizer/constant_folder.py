@@ -0,0 +1,140 @@
+"""
+Constant folding for checked syntax trees.
+Runs after semantic analysis and before interpretation: subtrees whose
+value is known at compile time become Num nodes, identity operations such as
+x * 1 (and x + 0 for INTEGER x) disappear, and IF statements with constant conditions keep
+only the branch that would run. Folding never changes what a program
+computes or when it fails: division by a constant zero is left in place so
+it still raises at run time, only if it is reached.
+"""
+from src.lexer.token import (Token, INTEGER_CONST, REAL_CONST, PLUS, MINUS, MUL, INTEGER_DIV, FLOAT_DIV, EQUAL,
+                             NOT_EQUAL, LESS_THAN, GREATER_THAN, LESS_EQUAL, GREATER_EQUAL, AND, OR, NOT)
+from src.parser.ast_nodes import AST, Num, NoOp
+from src.semantic.type_checker import INTEGER
+
+_BINARY = {
+    PLUS: lambda left, right: left + right,
+    MINUS: lambda left, right: left - right,
+    MUL: lambda left, right: left * right,
+    INTEGER_DIV: lambda left, right: left // right,
+    FLOAT_DIV: lambda left, right: left / right,
+}
+_COMPARISON = {
+    EQUAL: lambda left, right: left == right,
+    NOT_EQUAL: lambda left, right: left != right,
+    LESS_THAN: lambda left, right: left < right,
+    GREATER_THAN: lambda left, right: left > right,
+    LESS_EQUAL: lambda left, right: left <= right,
+    GREATER_EQUAL: lambda left, right: left >= right,
+}
+
+def _is_integer(node, value):
+    """Check whether node is the integer constant value (x + 0.0 would turn x into a REAL)."""
+    return isinstance(node, Num) and type(node.value) is int and node.value == value
+
+def _known_integer(node):
+    """Check whether node is an INTEGER constant or was typed INTEGER by check_types (-0.0 + 0 is 0.0, not -0.0)."""
+    if isinstance(node, Num):
+        return type(node.value) is int
+    return getattr(node, 'type', None) == INTEGER
+
+
+class ConstantFolder:
+    """
+    Tree rewriter: visit(node) returns the node to use in its place.
+    Nodes are folded bottom-up and replaced in their parents in place; new
+    nodes keep the span of the subtree they replace.
+    """
+    def __init__(self):
+        self.folded = 0 #nodes replaced
+
+    def visit(self, node):
+        visitor = getattr(self, 'visit_'+type(node).__name__, None)
+        if visitor is None:
+            return self.generic_visit(node)
+        return visitor(node)
+
+    def generic_visit(self, node):
+        """Fold every child of node in place and return node."""
+        for name, value in node.fields():
+            if isinstance(value, AST):
+                setattr(node, name, self.visit(value))
+            elif isinstance(value, list):
+                value[:] = [self.visit(item) if isinstance(item, AST) else item for item in value]
+        return node
+
+    def visit_DeferredBlock(self, node):
+        """Fold a lazily parsed function body once it is parsed."""
+        node.passes.append(self.visit)
+        return node
+
+    def visit_FlatAST(self, node):
+        return self.visit(node.to_nodes())
+
+    def constant(self, value, original):
+        """Return a Num node for value that takes original's place."""
+        node = Num(Token(INTEGER_CONST if isinstance(value, int) else REAL_CONST, value))
+        return self.replace(node, original)
+
+    def replace(self, node, original):
+        if original.span is not None:
+            node.start, node.end = original.span
+        self.folded += 1
+        return node
+
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        left, right, op = node.left, node.right, node.op.type
+        if isinstance(left, Num) and isinstance(right, Num):
+            if op in (INTEGER_DIV, FLOAT_DIV) and right.value == 0:
+                return node #keep the run-time "Division by zero" error
+            return self.constant(_BINARY[op](left.value, right.value), node)
+        if op in (PLUS, MINUS) and _is_integer(right, 0) and _known_integer(left) or op == MUL and _is_integer(right, 1):
+            return self.replace(left, node)
+        if op == PLUS and _is_integer(left, 0) and _known_integer(right) or op == MUL and _is_integer(left, 1):
+            return self.replace(right, node)
+        return node
+
+    def visit_UnaryOp(self, node):
+        self.generic_visit(node)
+        if isinstance(node.expr, Num):
+            value = node.expr.value
+            return self.constant(-value if node.op.type==MINUS else +value, node)
+        return node
+
+    def visit_ComparisonOp(self, node):
+        self.generic_visit(node)
+        if isinstance(node.left, Num) and isinstance(node.right, Num):
+            return self.constant(_COMPARISON[node.op.type](node.left.value, node.right.value), node)
+        return node
+
+    def visit_BooleanOp(self, node):
+        """AND/OR return one of their operands, so a constant left side decides the result."""
+        self.generic_visit(node)
+        left = node.left
+        if not isinstance(left, Num):
+            return node
+        if (node.op.type == AND) == bool(left.value):
+            return self.replace(node.right, node) #True AND x, False OR x: x
+        return self.replace(left, node) #False AND x, True OR x: left, x is never evaluated
+
+    def visit_UnaryBoolOp(self, node):
+        self.generic_visit(node)
+        if node.op.type == NOT and isinstance(node.expr, Num):
+            return self.constant(not node.expr.value, node)
+        return node
+
+    def visit_IfStatement(self, node):
+        self.generic_visit(node)
+        if not isinstance(node.condition, Num):
+            return node
+        if node.condition.value:
+            return self.replace(node.then_branch, node)
+        if node.else_branch:
+            return self.replace(node.else_branch, node)
+        return self.replace(NoOp(), node)
+
+
+def fold_constants(tree):
+    """Return tree with its constant subtrees folded."""
+    return ConstantFolder().visit(tree)
@@ -0,0 +1,93 @@
+"""
+Hash-consing of side-effect-free expression subtrees.
+Structurally identical expressions built only from constants, variables and
+arithmetic, comparison and boolean operators are replaced by one shared
+node, so a program repeating `i + 1` a thousand times keeps a single BinOp
+for it. Shared nodes must be treated as immutable: run this pass after
+passes that rewrite trees in place (such as constant folding), and cache
+per-node data on them only if it depends on nothing but the subtree.
+Function calls are never shared, and neither is anything containing one.
+Names bind per routine, so each function body gets its own table: a shared
+Var always refers to the same variable.
+"""
+from src.parser.ast_nodes import AST
+
+_BINARY = ('BinOp', 'ComparisonOp', 'BooleanOp')
+_UNARY = ('UnaryOp', 'UnaryBoolOp')
+
+
+class SubtreeSharer:
+    """
+    Tree rewriter replacing pure expression subtrees by canonical nodes.
+    Keys identify a subtree by its node type, operator or constant and the
+    identities of its already canonical children, so each key is built in
+    constant time. shared counts the nodes that were replaced.
+    """
+    def __init__(self):
+        self.table = {} #key -> canonical node, for the routine being visited
+        self.shared = 0
+
+    def visit(self, node):
+        """Share the subtrees of node and return the node to use in its place."""
+        return self._visit(node)[0]
+
+    def _visit(self, node):
+        """Return (node to use, key), where key is None for nodes that cannot be shared."""
+        kind = type(node).__name__
+        if kind == 'Num':
+            #repr keeps 0.0 and -0.0, which are equal but print differently, apart
+            key = ('Num', node.token.type, type(node.value), repr(node.value))
+        elif kind == 'Var':
+            #the address keeps the names in declarations, which are not resolved, apart from uses
+            key = ('Var', node.value, getattr(node, 'depth', None), getattr(node, 'slot', None))
+        elif kind in _BINARY:
+            node.left, left_key = self._visit(node.left)
+            node.right, right_key = self._visit(node.right)
+            key = (kind, node.op.type, id(node.left), id(node.right)) if left_key and right_key else None
+        elif kind in _UNARY:
+            node.expr, expr_key = self._visit(node.expr)
+            key = (kind, node.op.type, id(node.expr)) if expr_key else None
+        else:
+            return getattr(self, 'visit_'+kind, self.generic_visit)(node), None
+        if key is None:
+            return node, None
+        canonical = self.table.setdefault(key, node)
+        if canonical is not node:
+            self.shared += 1
+        return canonical, key
+
+    def generic_visit(self, node):
+        """Share inside every child of a node that is not itself shareable."""
+        for name, value in node.fields():
+            if isinstance(value, AST):
+                setattr(node, name, self.visit(value))
+            elif isinstance(value, list):
+                value[:] = [self.visit(item) if isinstance(item, AST) else item for item in value]
+        return node
+
+    def visit_FunctionDecl(self, node):
+        saved = self.table
+        self.table = {}
+        self.generic_visit(node)
+        self.table = saved
+        return node
+
+    def visit_DeferredBlock(self, node):
+        """Share inside a lazily parsed function body once it is parsed."""
+        node.passes.append(self._visit_routine_body)
+        return node
+
+    def _visit_routine_body(self, block):
+        saved = self.table
+        self.table = {}
+        block = self.visit(block)
+        self.table = saved
+        return block
+
+    def visit_FlatAST(self, node):
+        return self.visit(node.to_nodes())
+
+
+def share_subtrees(tree):
+    """Return tree with its identical pure expression subtrees shared."""
+    return SubtreeSharer().visit(tree)
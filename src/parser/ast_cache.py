@@ -0,0 +1,111 @@
+"""
+Compiled-AST cache (.pasc files).
+Once a source file has been parsed and passed semantic analysis, its tree is
+stored as a serialized FlatAST so later runs of the unchanged file skip
+lexing, parsing and analysis, the way Python reuses .pyc files. Entries go
+to a __pascache__ directory next to the source, or to a shared cache
+directory, and are only used when both the format versions and the sha256
+of the source bytes match.
+"""
+import hashlib
+import marshal
+import os
+import tempfile
+from src.lexer.lexer import LEXER_VERSION
+from src.parser.flat_ast import FlatAST, FLAT_AST_VERSION
+
+MAGIC = 'pasc'
+CACHE_VERSION = 1
+SUFFIX = '.pasc'
+CACHE_DIRNAME = '__pascache__'
+
+
+def source_hash(filename):
+    """Return the sha256 hex digest of a file's bytes, read in chunks."""
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ASTCache:
+    """
+    Store of compiled programs, one .pasc file per source file.
+    Writes go through a temporary file and a rename, and failing to write
+    (e.g. a read-only source directory) only means the next run compiles again.
+    """
+    def __init__(self, directory=None):
+        """
+        Args:
+            directory: Shared cache directory; None keeps each entry in a
+                __pascache__ directory next to its source file
+        """
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, filename):
+        """Return the .pasc path caching filename."""
+        filename = os.path.abspath(filename)
+        base = os.path.basename(filename)
+        if self.directory is None:
+            return os.path.join(os.path.dirname(filename), CACHE_DIRNAME, base + SUFFIX)
+        # Sources with the same name in different directories must not collide
+        tag = hashlib.sha256(filename.encode('utf-8', errors='surrogatepass')).hexdigest()[:16]
+        return os.path.join(self.directory, f"{base}.{tag}{SUFFIX}")
+
+    def load(self, filename, digest=None):
+        """
+        Return the cached FlatAST for filename, or None if there is no valid entry.
+        Args:
+            digest: source_hash(filename), if the caller already has it
+        """
+        path = self.path(filename)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            magic, versions, cached_digest, payload = marshal.loads(data)
+            if magic != MAGIC or tuple(versions) != self.versions():
+                raise ValueError("stale cache format")
+            if cached_digest != (digest or source_hash(filename)):
+                raise ValueError("source changed")
+            tree = FlatAST.loads(payload)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError, TypeError, EOFError):
+            # Stale, corrupt or unreadable: compile again and overwrite it
+            self.misses += 1
+            return None
+        self.hits += 1
+        return tree
+
+    def store(self, filename, tree, digest=None):
+        """Cache tree, a checked FlatAST, as the compiled form of filename."""
+        path = self.path(filename)
+        data = marshal.dumps((MAGIC, self.versions(), digest or source_hash(filename), tree.dumps()))
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        except OSError:
+            return False
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError:
+            self._remove(temp_path)
+            return False
+        return True
+
+    @staticmethod
+    def versions():
+        return (CACHE_VERSION, LEXER_VERSION, FLAT_AST_VERSION)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -1,32 +1,57 @@
 """Abstract Syntax Tree (AST) node definitions.
 Each node represents a construct in the language.
+Nodes use __slots__ so large programs do not pay for a dict per node.
 """
 
 class AST:
     """
     Base class for all AST nodes.
+    start and end are the source offsets the node was parsed from; the
+    parser sets them, nodes built by hand have no span.
+    Slots listed in annotations are filled in by semantic analysis and are
+    not fields of the node; expression nodes have a type slot for their
+    static type (see type_checker).
     """
-    pass
+    __slots__ = ('start', 'end')
+    annotations = ()
+
+    @property
+    def span(self):
+        """(start, end) source offsets of the node, or None if unknown."""
+        try:
+            return self.start, self.end
+        except AttributeError:
+            return None
+
+    def fields(self):
+        """Return the node's (name, value) pairs, excluding its span and annotations."""
+        return [(name, getattr(self, name)) for cls in reversed(type(self).__mro__)
+                for name in getattr(cls, '__slots__', ())
+                if cls is not AST and name not in self.annotations and hasattr(self, name)]
 
 class Program(AST):
     """Represents a program with a name and a block"""
+    __slots__ = ('name', 'block')
     def __init__(self, name, block):
         self.name = name
         self.block = block
 
 class Block(AST):
     """Represents a block with declarations and compound statement"""
+    __slots__ = ('declarations', 'compound_statement')
     def __init__(self, declarations, compound_statement):
         self.declarations = declarations
         self.compound_statement = compound_statement
 
 class VarDecl(AST):
+    __slots__ = ('var_node', 'type_node')
     def __init__(self, var_node, type_node):
         self.var_node = var_node
         self.type_node = type_node
 
 class FunctionDecl(AST):
     """Function declaration node"""
+    __slots__ = ('func_name', 'params', 'return_type', 'block_node')
     def __init__(self, func_name, params, return_type, block_node):
         self.func_name = func_name
         self.params = params #List of param nodes
@@ -35,98 +60,141 @@ class FunctionDecl(AST):
 
 class Param(AST):
     """Function parameter node"""
+    __slots__ = ('var_node', 'type_node')
     def __init__(self, var_node, type_node):
         self.var_node = var_node
         self.type_node = type_node
 
 class FunctionCall(AST):
-    """Function call node(can be used in expressions)"""
+    """
+    Function call node(can be used in expressions)
+    Resolved calls know the FunctionDecl they call and how many routines
+    up from the caller it was declared (depth).
+    """
+    __slots__ = ('func_name', 'actual_params', 'token', 'depth', 'decl', 'type')
+    annotations = ('depth', 'decl', 'type')
     def __init__(self, func_name, actual_params, token):
         self.func_name = func_name
         self.actual_params = actual_params
         self.token = token
 
-class BooleanOp:
+class BooleanOp(AST):
+    __slots__ = ('left', 'op', 'right', 'type')
+    annotations = ('type',)
     def __init__(self, left, op, right):
         self.left = left
         self.op = op
         self.right =right
 
-class ComparisonOp:
+class ComparisonOp(AST):
+    __slots__ = ('left', 'op', 'right', 'type')
+    annotations = ('type',)
     def __init__(self, left, op, right):
         self.left = left
         self.op = op
         self.right = right
 
-class UnaryBoolOp:
+class UnaryBoolOp(AST):
+    __slots__ = ('op', 'expr', 'type')
+    annotations = ('type',)
     def __init__(self, op, expr):
         self.op = op
         self.expr = expr
 
-class IfStatement:
+class IfStatement(AST):
+    __slots__ = ('condition', 'then_branch', 'else_branch')
     def __init__(self, condition, then_branch, else_branch=None):
         self.condition = condition
         self.then_branch = then_branch
         self.else_branch = else_branch
-        
+
 class WhileLoop(AST):
+    __slots__ = ('condition', 'body')
     def __init__(self, condition, body):
         self.condition = condition
         self.body = body
-        
+
 class ForLoop(AST):
+    __slots__ = ('var_node', 'start_expr', 'end_expr', 'body', 'is_downto')
     def __init__(self, var_node, start_expr, end_expr, body, is_downto=False):
         self.var_node = var_node
         self.start_expr = start_expr
         self.end_expr = end_expr
         self.body = body
         self.is_downto = is_downto
-        
+
 class Print(AST):
+    __slots__ = ('expressions', 'newline')
     def __init__(self, expressions, newline=True):
         self.expressions = expressions #List of expressions to print
         self.newline = newline #True for WRITELN, False for PRINT
 
 class Type(AST):
+    __slots__ = ('token', 'value')
     def __init__(self, token):
         self.token = token
         self.value = token.value
 
 class BinOp(AST):
+    __slots__ = ('left', 'op', 'right', 'type')
+    annotations = ('type',)
     def __init__(self, left, op, right):
         self.left = left
-        self.token = self.op = op
+        self.op = op
         self.right = right
 
+    @property
+    def token(self):
+        return self.op
+
 class Num(AST):
+    __slots__ = ('token', 'value', 'type')
+    annotations = ('type',)
     def __init__(self, token):
         self.token = token
         self.value = token.value
 
 class UnaryOp(AST):
+    __slots__ = ('op', 'expr', 'type')
+    annotations = ('type',)
     def __init__(self, op, expr):
-        self.token = self.op = op
+        self.op = op
         self.expr = expr
-        
+
+    @property
+    def token(self):
+        return self.op
+
 class Compound(AST):
     """ Represents a 'BEGIN ... END' block"""
-    def __init__(self):
-        self.children = []
+    __slots__ = ('children',)
+    def __init__(self, children=None):
+        self.children = children if children is not None else []
 
 class Assign(AST):
     """Assignment statement node"""
+    __slots__ = ('left', 'op', 'right')
     def __init__(self, left, op, right):
         self.left = left
-        self.token = self.op = op
+        self.op = op
         self.right = right
 
+    @property
+    def token(self):
+        return self.op
+
 class Var(AST):
-    """Variable node"""
+    """
+    Variable node
+    Resolved variables live in slot `slot` of the activation record depth
+    routines up from the one they are used in.
+    """
+    __slots__ = ('token', 'value', 'depth', 'slot', 'type')
+    annotations = ('depth', 'slot', 'type')
     def __init__(self, token):
         self.token = token
         self.value = token.value
 
 class NoOp(AST):
     """Empty statement node"""
-    pass
-
+    __slots__ = ()
@@ -0,0 +1,322 @@
+"""
+Flat, array-backed AST.
+Instead of one object per node, a FlatAST stores every node in parallel
+typed arrays: its kind, its source span and a run of integer operands
+(child node indices, indices into a shared constant table, or flags). It is
+produced directly by Parser(lexer, flat=True), is cheap to build and to
+serialize, and is walked by SemanticAnalyzer and Interpreter through
+lightweight views that look like the ast_nodes classes.
+"""
+import marshal
+from array import array
+from src.lexer.token import Token
+from src.parser import ast_nodes
+
+# Operand layout of each node kind, in storage order. Field codes:
+#   n  child node index (-1 for None)     c  index into constants
+#   b  flag stored as 0/1                 *  remaining operands are child nodes
+# Fixed fields come first so a list field can take the rest of the run.
+NODE_LAYOUTS = {
+    'Program': (('name', 'c'), ('block', 'n')),
+    'Block': (('compound_statement', 'n'), ('declarations', '*')),
+    'VarDecl': (('var_node', 'n'), ('type_node', 'n')),
+    'FunctionDecl': (('func_name', 'c'), ('return_type', 'n'), ('block_node', 'n'), ('params', '*')),
+    'Param': (('var_node', 'n'), ('type_node', 'n')),
+    'FunctionCall': (('func_name', 'c'), ('token', 'c'), ('actual_params', '*')),
+    'BooleanOp': (('left', 'n'), ('op', 'c'), ('right', 'n')),
+    'ComparisonOp': (('left', 'n'), ('op', 'c'), ('right', 'n')),
+    'UnaryBoolOp': (('op', 'c'), ('expr', 'n')),
+    'IfStatement': (('condition', 'n'), ('then_branch', 'n'), ('else_branch', 'n')),
+    'WhileLoop': (('condition', 'n'), ('body', 'n')),
+    'ForLoop': (('var_node', 'n'), ('start_expr', 'n'), ('end_expr', 'n'), ('body', 'n'), ('is_downto', 'b')),
+    'Print': (('newline', 'b'), ('expressions', '*')),
+    'Type': (('token', 'c'),),
+    'BinOp': (('left', 'n'), ('op', 'c'), ('right', 'n')),
+    'Num': (('token', 'c'),),
+    'UnaryOp': (('op', 'c'), ('expr', 'n')),
+    'Compound': (('children', '*'),),
+    'Assign': (('left', 'n'), ('op', 'c'), ('right', 'n')),
+    'Var': (('token', 'c'),),
+    'NoOp': (),
+}
+NODE_KINDS = tuple(NODE_LAYOUTS)
+# Bump whenever NODE_LAYOUTS or the serialized format changes.
+FLAT_AST_VERSION = 1
+(_PROGRAM, _BLOCK, _VAR_DECL, _FUNCTION_DECL, _PARAM, _FUNCTION_CALL, _BOOLEAN_OP, _COMPARISON_OP, _UNARY_BOOL_OP,
+ _IF_STATEMENT, _WHILE_LOOP, _FOR_LOOP, _PRINT, _TYPE, _BIN_OP, _NUM, _UNARY_OP, _COMPOUND, _ASSIGN, _VAR,
+ _NO_OP) = range(len(NODE_KINDS))
+
+
+class FlatAST:
+    """
+    Struct-of-arrays syntax tree.
+    Node i has kind NODE_KINDS[kinds[i]], source span starts[i]:ends[i]
+    (-1 when unknown) and operands operands[offsets[i]:offsets[i+1]] laid
+    out as NODE_LAYOUTS describes. Children always precede their parents;
+    root is the index of the Program node.
+    """
+    def __init__(self):
+        self.kinds = array('B')
+        self.starts = array('q')
+        self.ends = array('q')
+        self.offsets = array('I', [0])
+        self.operands = array('i')
+        self.constants = [] #tokens and names referenced by nodes
+        self.root = -1
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def node(self, index):
+        """Return a view of node index (None for -1)."""
+        if index < 0:
+            return None
+        return _VIEW_CLASSES[self.kinds[index]](self, index)
+
+    @property
+    def tree(self):
+        """View of the root node."""
+        return self.node(self.root)
+
+    def to_nodes(self):
+        """
+        Build the equivalent ast_nodes object tree and return its root.
+        Children precede their parents, so one pass over the arrays suffices.
+        """
+        nodes = [None] * len(self.kinds)
+        kinds, starts, ends, offsets, operands, constants = (self.kinds, self.starts, self.ends, self.offsets,
+                                                             self.operands, self.constants)
+        for index, kind in enumerate(kinds):
+            node = _NODE_BUILDERS[kind](operands[offsets[index]:offsets[index+1]], nodes, constants)
+            if starts[index] >= 0:
+                node.start = starts[index]
+                node.end = ends[index]
+            nodes[index] = node
+        return nodes[self.root]
+
+    def dumps(self):
+        """Serialize the tree to bytes."""
+        constants = [tuple(value) if isinstance(value, Token) else value for value in self.constants]
+        token_flags = [isinstance(value, Token) for value in self.constants]
+        return marshal.dumps((self.kinds.tobytes(), self.starts.tobytes(), self.ends.tobytes(), self.offsets.tobytes(),
+                              self.operands.tobytes(), constants, token_flags, self.root))
+
+    @classmethod
+    def loads(cls, data):
+        """Rebuild a tree serialized by dumps."""
+        kinds, starts, ends, offsets, operands, constants, token_flags, root = marshal.loads(data)
+        tree = cls()
+        tree.offsets = array('I')
+        for array_, raw in ((tree.kinds, kinds), (tree.starts, starts), (tree.ends, ends),
+                            (tree.offsets, offsets), (tree.operands, operands)):
+            array_.frombytes(raw)
+        tree.constants = [Token(*value) if is_token else value for value, is_token in zip(constants, token_flags)]
+        tree.root = root
+        return tree
+
+
+class FlatASTBuilder:
+    """
+    Node factory that appends nodes to a FlatAST.
+    It has one method per node class, taking the class's constructor
+    arguments and returning the new node's index, so Parser can build either
+    representation through the same calls.
+    """
+    def __init__(self):
+        self.tree = FlatAST()
+        self._constant_ids = {}
+
+    def constant(self, value):
+        """Return the constants index of value, adding it if new."""
+        index = self._constant_ids.get(value) #tokens and names never compare equal to each other
+        if index is None:
+            index = self._constant_ids[value] = len(self.tree.constants)
+            self.tree.constants.append(value)
+        return index
+
+    def add(self, kind, *operands):
+        """Append a node of kind (an index into NODE_KINDS); returns its index."""
+        tree = self.tree
+        tree.operands.extend(operands)
+        tree.kinds.append(kind)
+        tree.starts.append(-1)
+        tree.ends.append(-1)
+        tree.offsets.append(len(tree.operands))
+        return len(tree.kinds) - 1
+
+    def set_span(self, index, start, end):
+        self.tree.starts[index] = start
+        self.tree.ends[index] = end
+        return index
+
+    def finish(self, root):
+        """Return the finished FlatAST rooted at node root."""
+        self.tree.root = root
+        return self.tree
+
+    def Program(self, name, block):
+        return self.add(_PROGRAM, self.constant(name), block)
+
+    def Block(self, declarations, compound_statement):
+        return self.add(_BLOCK, compound_statement, *declarations)
+
+    def VarDecl(self, var_node, type_node):
+        return self.add(_VAR_DECL, var_node, type_node)
+
+    def FunctionDecl(self, func_name, params, return_type, block_node):
+        return self.add(_FUNCTION_DECL, self.constant(func_name), return_type, block_node, *params)
+
+    def Param(self, var_node, type_node):
+        return self.add(_PARAM, var_node, type_node)
+
+    def FunctionCall(self, func_name, actual_params, token):
+        return self.add(_FUNCTION_CALL, self.constant(func_name), self.constant(token), *actual_params)
+
+    def BooleanOp(self, left, op, right):
+        return self.add(_BOOLEAN_OP, left, self.constant(op), right)
+
+    def ComparisonOp(self, left, op, right):
+        return self.add(_COMPARISON_OP, left, self.constant(op), right)
+
+    def UnaryBoolOp(self, op, expr):
+        return self.add(_UNARY_BOOL_OP, self.constant(op), expr)
+
+    def IfStatement(self, condition, then_branch, else_branch=None):
+        return self.add(_IF_STATEMENT, condition, then_branch, -1 if else_branch is None else else_branch)
+
+    def WhileLoop(self, condition, body):
+        return self.add(_WHILE_LOOP, condition, body)
+
+    def ForLoop(self, var_node, start_expr, end_expr, body, is_downto=False):
+        return self.add(_FOR_LOOP, var_node, start_expr, end_expr, body, 1 if is_downto else 0)
+
+    def Print(self, expressions, newline=True):
+        return self.add(_PRINT, 1 if newline else 0, *expressions)
+
+    def Type(self, token):
+        return self.add(_TYPE, self.constant(token))
+
+    def BinOp(self, left, op, right):
+        return self.add(_BIN_OP, left, self.constant(op), right)
+
+    def Num(self, token):
+        return self.add(_NUM, self.constant(token))
+
+    def UnaryOp(self, op, expr):
+        return self.add(_UNARY_OP, self.constant(op), expr)
+
+    def Compound(self, children=None):
+        return self.add(_COMPOUND, *(children or ()))
+
+    def Assign(self, left, op, right):
+        return self.add(_ASSIGN, left, self.constant(op), right)
+
+    def Var(self, token):
+        return self.add(_VAR, self.constant(token))
+
+    def NoOp(self):
+        return self.add(_NO_OP)
+
+
+class FlatNode:
+    """
+    View of one node of a FlatAST.
+    Each node kind has a view class of the same name as its ast_nodes class,
+    with the same attributes, so visitors dispatching on the class name walk
+    flat trees unchanged. Views are created on access and hold no data.
+    """
+    __slots__ = ('flat', 'index')
+    layout = ()
+    extra_fields = () #derived fields the ast_nodes class stores, e.g. Num.value
+
+    def __init__(self, flat, index):
+        self.flat = flat
+        self.index = index
+
+    def __eq__(self, other):
+        return isinstance(other, FlatNode) and self.flat is other.flat and self.index == other.index
+
+    def __hash__(self):
+        return hash((id(self.flat), self.index))
+
+    @property
+    def start(self):
+        return self.flat.starts[self.index]
+
+    @property
+    def end(self):
+        return self.flat.ends[self.index]
+
+    @property
+    def span(self):
+        """(start, end) source offsets of the node, or None if unknown."""
+        start = self.flat.starts[self.index]
+        if start < 0:
+            return None
+        return start, self.flat.ends[self.index]
+
+    def fields(self):
+        """Return the node's (name, value) pairs, like AST.fields."""
+        fields = [(name, getattr(self, name)) for name, _ in self.layout]
+        if 'value' in self.extra_fields:
+            fields.append(('value', self.value))
+        return fields
+
+
+def _field_property(position, code):
+    """Make the property reading one operand (or the operand list) of a view."""
+    if code == 'n':
+        def get(self):
+            return self.flat.node(self.flat.operands[self.flat.offsets[self.index] + position])
+    elif code == 'c':
+        def get(self):
+            return self.flat.constants[self.flat.operands[self.flat.offsets[self.index] + position]]
+    elif code == 'b':
+        def get(self):
+            return bool(self.flat.operands[self.flat.offsets[self.index] + position])
+    else:
+        def get(self):
+            flat = self.flat
+            operands = flat.operands
+            return [flat.node(child) for child in operands[flat.offsets[self.index] + position:flat.offsets[self.index + 1]]]
+    return property(get)
+
+
+def _view_class(kind_name):
+    layout = NODE_LAYOUTS[kind_name]
+    namespace = {'__slots__': (), 'layout': layout}
+    for position, (name, code) in enumerate(layout):
+        namespace[name] = _field_property(position, code)
+    if kind_name in ('Type', 'Num', 'Var'):
+        namespace['value'] = property(lambda self: self.token.value)
+        namespace['extra_fields'] = ('value',)
+    if kind_name in ('BinOp', 'UnaryOp', 'Assign'):
+        namespace['token'] = property(lambda self: self.op)
+    return type(kind_name, (FlatNode,), namespace)
+
+_VIEW_CLASSES = [_view_class(kind_name) for kind_name in NODE_KINDS]
+
+# Object constructors by kind for FlatAST.to_nodes: (operands, nodes, constants) -> node
+_NODE_BUILDERS = [
+    lambda o, n, c: ast_nodes.Program(c[o[0]], n[o[1]]),
+    lambda o, n, c: ast_nodes.Block([n[i] for i in o[1:]], n[o[0]]),
+    lambda o, n, c: ast_nodes.VarDecl(n[o[0]], n[o[1]]),
+    lambda o, n, c: ast_nodes.FunctionDecl(c[o[0]], [n[i] for i in o[3:]], n[o[1]], n[o[2]]),
+    lambda o, n, c: ast_nodes.Param(n[o[0]], n[o[1]]),
+    lambda o, n, c: ast_nodes.FunctionCall(c[o[0]], [n[i] for i in o[2:]], c[o[1]]),
+    lambda o, n, c: ast_nodes.BooleanOp(n[o[0]], c[o[1]], n[o[2]]),
+    lambda o, n, c: ast_nodes.ComparisonOp(n[o[0]], c[o[1]], n[o[2]]),
+    lambda o, n, c: ast_nodes.UnaryBoolOp(c[o[0]], n[o[1]]),
+    lambda o, n, c: ast_nodes.IfStatement(n[o[0]], n[o[1]], n[o[2]] if o[2] >= 0 else None),
+    lambda o, n, c: ast_nodes.WhileLoop(n[o[0]], n[o[1]]),
+    lambda o, n, c: ast_nodes.ForLoop(n[o[0]], n[o[1]], n[o[2]], n[o[3]], bool(o[4])),
+    lambda o, n, c: ast_nodes.Print([n[i] for i in o[1:]], bool(o[0])),
+    lambda o, n, c: ast_nodes.Type(c[o[0]]),
+    lambda o, n, c: ast_nodes.BinOp(n[o[0]], c[o[1]], n[o[2]]),
+    lambda o, n, c: ast_nodes.Num(c[o[0]]),
+    lambda o, n, c: ast_nodes.UnaryOp(c[o[0]], n[o[1]]),
+    lambda o, n, c: ast_nodes.Compound([n[i] for i in o]),
+    lambda o, n, c: ast_nodes.Assign(n[o[0]], c[o[1]], n[o[2]]),
+    lambda o, n, c: ast_nodes.Var(c[o[0]]),
+    lambda o, n, c: ast_nodes.NoOp(),
+]
@@ -3,70 +3,251 @@ Parser for building Abstract syntax trees.
 The parser consumes tokens from the lexer and builds an AST.
 """
 from src.lexer.token import (INTEGER_CONST, REAL_CONST, PLUS, MINUS, MUL, INTEGER_DIV, FLOAT_DIV, LPAREN, RPAREN, ID, ASSIGN, BEGIN, END, SEMI, DOT, PROGRAM, VAR, COLON, COMMA, INTEGER, REAL, FUNCTION, EQUAL, NOT_EQUAL, LESS_THAN, GREATER_THAN, LESS_EQUAL, GREATER_EQUAL, AND, OR, NOT, IF, THEN, ELSE, EOF, WHILE, FOR, DO, TO, DOWNTO, PRINT, WRITELN)
-from src.parser.ast_nodes import (Program, Block, VarDecl, FunctionDecl, Param, FunctionCall, Type, BinOp, Num, UnaryOp, Compound, Assign, Var, NoOp, ComparisonOp, BooleanOp, UnaryBoolOp, IfStatement, WhileLoop, ForLoop, Print)
+from src.parser import ast_nodes
+from src.parser.ast_nodes import AST
+from src.parser.flat_ast import FlatASTBuilder
+from src.lexer.token import TOKEN_KINDS
+from src.lexer.token_buffer import TokenBuffer
 from src.errors import ParserError
 
+_LPAREN_KIND = TOKEN_KINDS[LPAREN]
+_BEGIN_KIND = TOKEN_KINDS[BEGIN]
+_IF_KIND = TOKEN_KINDS[IF]
+_END_KIND = TOKEN_KINDS[END]
+_FUNCTION_KIND = TOKEN_KINDS[FUNCTION]
+_EOF_KIND = TOKEN_KINDS[EOF]
+
+# Binding powers for the Pratt expression parser; higher binds tighter.
+_BOOLEAN_BP = {OR: 1, AND: 2}
+_FACTOR_BP = 3 #above every boolean operator: parse one boolean factor
+_ARITHMETIC_BP = {PLUS: 4, MINUS: 4, MUL: 5, INTEGER_DIV: 5, FLOAT_DIV: 5}
+_UNARY_BP = 6 #above every arithmetic operator: parse one factor
+_COMPARISON_TYPES = frozenset((EQUAL, NOT_EQUAL, LESS_THAN, GREATER_THAN, LESS_EQUAL, GREATER_EQUAL))
+
 class Parser:
-    def __init__(self, lexer):
+    def __init__(self, lexer, flat=False, lazy=False):
+        """
+        Args:
+            lexer: Lexer to pull tokens from one at a time, or a TokenBuffer
+                (see tokenize_all) to consume by index
+            flat: build a FlatAST (see flat_ast) instead of node objects
+            lazy: skip function bodies and leave a DeferredBlock that parses
+                them on first use; needs a TokenBuffer and object nodes, and
+                is ignored otherwise
+        """
         self.lexer = lexer
-        self.current_token = self.lexer.get_next_token()
+        self.flat = flat
+        self.lazy = lazy and not flat and isinstance(lexer, TokenBuffer)
+        if flat:
+            self.nodes = FlatASTBuilder()
+            self._span = self._flat_span
+        else:
+            self.nodes = ast_nodes
+        if isinstance(lexer, TokenBuffer):
+            self.index = 0
+            self.next_token = self._next_buffered_token
+            self.peek_token = self._peek_buffered_token
+            self.call_follows = self._buffered_call_follows
+            self.token_position = self._buffered_token_position
+            self.offset = self._buffered_offset
+            self.end_offset = self._buffered_end_offset
+            self.current_token = lexer.token(0)
+        else:
+            self._previous_end = 0
+            self._peeked = None #token after current_token, once peek_token has read it
+            self.next_token = self._next_lexer_token
+            self.current_token = self.next_token()
+
+    @property
+    def names(self):
+        """NameTable of the identifiers in the source (ids are dense indices)."""
+        return self.lexer.names
 
     def error(self, message=None):
         msg = message or f"Invalid syntax: unexpected token '{self.current_token.type}'"
-        raise ParserError(msg)
+        line, column = self.token_position()
+        raise ParserError(msg, line, column)
     
     def eat(self, token_type):
         """
         Verify current token type and get next token.
         """
         if self.current_token.type==token_type:
-            self.current_token = self.lexer.get_next_token()
+            self.current_token = self.next_token()
         else:
             self.error(f"Expected token '{token_type}', got {self.current_token.type}")
 
+    def _next_lexer_token(self):
+        peeked = self._peeked
+        if peeked is not None:
+            self._peeked = None
+            self._previous_end = self._current_end
+            return peeked
+        self._previous_end = self.lexer.pos
+        return self.lexer.get_next_token()
+
+    def peek_token(self):
+        """
+        Return the token after current_token without consuming it.
+        The lexer has then moved past that token, so the current token's
+        offsets and position are saved first for offset and token_position.
+        """
+        if self._peeked is None:
+            lexer = self.lexer
+            self._current_start = lexer.token_start
+            self._current_end = lexer.pos
+            self._current_position = lexer.token_position()
+            self._peeked = lexer.get_next_token()
+        return self._peeked
+
+    def _peek_buffered_token(self):
+        return self.lexer.token(min(self.index+1, len(self.lexer)-1))
+
+    def token_position(self):
+        """Return the (line, column) of the current token."""
+        if self._peeked is not None:
+            return self._current_position
+        return self.lexer.token_position()
+
+    def _next_buffered_token(self):
+        self.index += 1
+        return self.lexer.token(self.index)
+
+    def _buffered_token_position(self):
+        return self.lexer.position(self.index)
+
+    def offset(self):
+        """Return the source offset at which the current token starts."""
+        if self._peeked is not None:
+            return self._current_start
+        return self.lexer.token_start
+
+    def end_offset(self):
+        """Return the source offset just past the last token eaten."""
+        return self._previous_end
+
+    def _buffered_offset(self):
+        return self.lexer.starts[self.index]
+
+    def _buffered_end_offset(self):
+        return self.lexer.ends[self.index-1] if self.index else 0
+
+    def _span(self, node, start, end=None):
+        """Give node the source span from start to end (default: the end of the last token eaten)."""
+        node.start = start
+        node.end = self.end_offset() if end is None else end
+        return node
+
+    def _flat_span(self, node, start, end=None):
+        return self.nodes.set_span(node, start, self.end_offset() if end is None else end)
+
+    def call_follows(self):
+        """Check whether the current ID token is followed by '(', i.e. starts a function call."""
+        return self.peek_token().type==LPAREN
+
+    def _buffered_call_follows(self):
+        return self.lexer.kinds[self.index+1]==_LPAREN_KIND
+
     def program(self):
+        start = self.offset()
         self.eat(PROGRAM)
-        var_node = self.variable()
-        prog_name = var_node.value
+        prog_name = self.current_token.value
+        self.variable()
         self.eat(SEMI)
         block_node = self.block()
-        program_node = Program(prog_name, block_node)
+        program_node = self.nodes.Program(prog_name, block_node)
         self.eat(DOT)
-        return program_node
+        return self._span(program_node, start)
     
     def block(self):
+        start = self.offset()
         declaration_nodes = self.declarations()
         compound_statement_node = self.compound_statement()
-        node = Block(declaration_nodes, compound_statement_node)
-        return node
+        node = self.nodes.Block(declaration_nodes, compound_statement_node)
+        return self._span(node, start)
     
     def declarations(self):
+        declarations = self.variable_declarations()
+        #Function declarations
+        while self.current_token.type==FUNCTION:
+            start = self.offset()
+            func_name, params, return_type = self.function_heading()
+            block_node = self._deferred_block() if self.lazy else None
+            if block_node is None:
+                block_node = self.block()
+            func_decl = self.nodes.FunctionDecl(func_name, params, return_type, block_node)
+            if isinstance(block_node, DeferredBlock):
+                block_node.owner = func_decl
+            declarations.append(self._span(func_decl, start))
+            self.eat(SEMI)
+        return declarations
+
+    def _deferred_block(self):
+        """
+        Skip the function body starting at the current token and return a
+        DeferredBlock for it, or None if its end cannot be found (the caller
+        then parses it normally so the syntax error is reported now).
+        The body ends at the END that closes its compound statement: BEGIN
+        and IF open a level, END closes one, and each nested FUNCTION at the
+        outer level owns one more balanced body before it.
+        """
+        tokens = self.lexer
+        kinds = tokens.kinds
+        first = index = self.index
+        depth = pending = 0
+        while True:
+            kind = kinds[index]
+            if kind==_EOF_KIND:
+                return None
+            if kind==_FUNCTION_KIND and depth==0:
+                pending += 1
+            elif kind==_BEGIN_KIND or kind==_IF_KIND:
+                depth += 1
+            elif kind==_END_KIND:
+                depth -= 1
+                if depth<0:
+                    return None
+                if depth==0:
+                    if pending==0:
+                        break
+                    pending -= 1
+            index += 1
+        self.index = index + 1
+        self.current_token = tokens.token(self.index)
+        node = DeferredBlock(tokens, first, self.index, type(self))
+        node.start = tokens.starts[first]
+        node.end = tokens.ends[index]
+        return node
+
+    def _seek(self, index):
+        """Continue parsing a TokenBuffer from token index."""
+        self.index = index
+        self.current_token = self.lexer.token(index)
+
+    def variable_declarations(self):
         declarations = []
-        #Variable declaraions
         if self.current_token.type==VAR:
             self.eat(VAR)
             while self.current_token.type==ID:
                 var_decl = self.variable_declaration()
                 declarations.extend(var_decl)
                 self.eat(SEMI)
-        #Function declarations
-        while self.current_token.type==FUNCTION:
-            self.eat(FUNCTION)
-            func_name = self.current_token.value
-            self.eat(ID)
-            params = []
-            if self.current_token.type==LPAREN:
-                self.eat(LPAREN)
-                params = self.formal_parameter_list()
-                self.eat(RPAREN)
-            self.eat(COLON)
-            return_type = self.type_spec()
-            self.eat(SEMI)
-            block_node = self.block()
-            func_decl = FunctionDecl(func_name, params, return_type, block_node)
-            declarations.append(func_decl)
-            self.eat(SEMI)
         return declarations
+
+    def function_heading(self):
+        """Parse 'FUNCTION name(params) : type;' and return its parts."""
+        self.eat(FUNCTION)
+        func_name = self.current_token.value
+        self.eat(ID)
+        params = []
+        if self.current_token.type==LPAREN:
+            self.eat(LPAREN)
+            params = self.formal_parameter_list()
+            self.eat(RPAREN)
+        self.eat(COLON)
+        return_type = self.type_spec()
+        self.eat(SEMI)
+        return func_name, params, return_type
     
     def formal_parameter_list(self):
         if self.current_token.type!=ID:
@@ -78,48 +259,44 @@ class Parser:
         return params
     
     def formal_parameters(self):
-        param_nodes = []
-        param_tokens = [self.current_token]
-        self.eat(ID)
+        start = self.offset()
+        var_nodes = [self.variable()]
         while self.current_token.type==COMMA:
             self.eat(COMMA)
-            param_tokens.append(self.current_token)
-            self.eat(ID)
+            var_nodes.append(self.variable())
         self.eat(COLON)
         type_node = self.type_spec()
-        for param_token in param_tokens:
-            param_nodes.append(Param(Var(param_token), type_node))
+        param_nodes = [self._span(self.nodes.Param(var_node, type_node), start) for var_node in var_nodes]
         return param_nodes
     
     def variable_declaration(self):
-        var_nodes = [Var(self.current_token)]
-        self.eat(ID)
+        start = self.offset()
+        var_nodes = [self.variable()]
         while self.current_token.type==COMMA:
             self.eat(COMMA)
-            var_nodes.append(Var(self.current_token))
-            self.eat(ID)
+            var_nodes.append(self.variable())
         self.eat(COLON)
         type_node = self.type_spec()
-        var_declarations = [VarDecl(var_node, type_node) for var_node in var_nodes]
+        var_declarations = [self._span(self.nodes.VarDecl(var_node, type_node), start) for var_node in var_nodes]
         return var_declarations
     
     def type_spec(self):
+        start = self.offset()
         token = self.current_token
         if self.current_token.type==INTEGER:
             self.eat(INTEGER)
         else:
             self.eat(REAL)
-        node = Type(token)
-        return node
+        node = self.nodes.Type(token)
+        return self._span(node, start)
     
     def compound_statement(self):
+        start = self.offset()
         self.eat(BEGIN)
         nodes = self.statement_list()
         self.eat(END)
-        root = Compound()
-        for node in nodes:
-            root.children.append(node)
-        return root
+        root = self.nodes.Compound(nodes)
+        return self._span(root, start)
     
     def statement_list(self):
         node = self.statement()
@@ -149,6 +326,7 @@ class Parser:
         return node
     
     def if_statement(self):
+        start = self.offset()
         self.eat(IF)
         condition = self.boolean_expression()
         self.eat(THEN)
@@ -158,16 +336,18 @@ class Parser:
             self.eat(ELSE)
             else_branch = self.statement()
         self.eat(END)
-        return IfStatement(condition, then_branch, else_branch)
+        return self._span(self.nodes.IfStatement(condition, then_branch, else_branch), start)
     
     def while_statement(self):
+        start = self.offset()
         self.eat(WHILE)
         condition = self.boolean_expression()
         self.eat(DO)
         body = self.statement()
-        return WhileLoop(condition, body)
+        return self._span(self.nodes.WhileLoop(condition, body), start)
     
     def for_statement(self):
+        start = self.offset()
         self.eat(FOR)
         var_node = self.variable()
         self.eat(ASSIGN)
@@ -184,9 +364,10 @@ class Parser:
         end_expr = self.expr()
         self.eat(DO)
         body = self.statement()
-        return ForLoop(var_node, start_expr, end_expr, body, is_downto)
+        return self._span(self.nodes.ForLoop(var_node, start_expr, end_expr, body, is_downto), start)
     
     def print_statement(self):
+        start = self.offset()
         newline = True
         if self.current_token.type==PRINT:
             self.eat(PRINT)
@@ -201,103 +382,29 @@ class Parser:
             self.eat(COMMA)
             expressions.append(self.expr())
         self.eat(RPAREN)
-        return Print(expressions, newline)
-    
-    def boolean_expression(self):
-        node = self.boolean_term()
-        while self.current_token.type == OR:
-            token = self.current_token
-            self.eat(OR)
-            node = BooleanOp(left=node, op=token, right=self.boolean_term())
-        return node
-    
-    def boolean_term(self):
-        node = self.boolean_factor()
-        while self.current_token.type == AND:
-            token = self.current_token
-            self.eat(AND)
-            node = BooleanOp(left=node, op=token, right=self.boolean_factor())
-        return node
-    
-    def boolean_factor(self):
-        if self.current_token.type == NOT:
-            token = self.current_token
-            self.eat(NOT)
-            return UnaryBoolOp(op=token, expr=self.boolean_factor())
-        elif self.current_token.type == LPAREN:
-            self.eat(LPAREN)
-            node = self.boolean_expression()
-            self.eat(RPAREN)
-            return node
-        else:
-            return self.comparison()
-        
-    def comparison(self):
-        node = self.expr()
-        if self.current_token.type in (EQUAL, NOT_EQUAL, LESS_THAN, GREATER_THAN, 
-                                       LESS_EQUAL, GREATER_EQUAL):
-            token = self.current_token
-            if token.type == EQUAL:
-                self.eat(EQUAL)
-            elif token.type == NOT_EQUAL:
-                self.eat(NOT_EQUAL)
-            elif token.type == LESS_THAN:
-                self.eat(LESS_THAN)
-            elif token.type == GREATER_THAN:
-                self.eat(GREATER_THAN)
-            elif token.type == LESS_EQUAL:
-                self.eat(LESS_EQUAL)
-            elif token.type == GREATER_EQUAL:
-                self.eat(GREATER_EQUAL)
-            node = ComparisonOp(left=node, op=token, right=self.expr())
-        return node
+        return self._span(self.nodes.Print(expressions, newline), start)
     
     def assignment_statement(self):
+        start = self.offset()
         left = self.variable()
         token = self.current_token
         self.eat(ASSIGN)
         right = self.expr()
-        node = Assign(left, token, right)
-        return node
+        node = self.nodes.Assign(left, token, right)
+        return self._span(node, start)
     
     def variable(self):
-        node = Var(self.current_token)
+        start = self.offset()
+        node = self.nodes.Var(self.current_token)
         self.eat(ID)
-        return node
+        return self._span(node, start)
     
     def empty(self):
-        return NoOp()
-
-    def factor(self):
-        token = self.current_token
-        if token.type==PLUS:
-            self.eat(PLUS)
-            node = UnaryOp(token, self.factor())
-            return node
-        elif token.type==MINUS:
-            self.eat(MINUS)
-            node = UnaryOp(token, self.factor())
-            return node
-        elif token.type==INTEGER_CONST:
-            self.eat(INTEGER_CONST)
-            return Num(token)
-        elif token.type==REAL_CONST:
-            self.eat(REAL_CONST)
-            return Num(token)
-        elif token.type==LPAREN:
-            self.eat(LPAREN)
-            node = self.expr()
-            self.eat(RPAREN)
-            return node
-        elif token.type==ID:
-            if self.lexer.current_char=='(':
-                return self.function_call()
-            else:
-                return self.variable()
-        else:
-            self.error()
-
+        start = self.offset()
+        return self._span(self.nodes.NoOp(), start, start)
+    
     def function_call(self):
+        start = self.offset()
         token = self.current_token
         func_name = self.current_token.value
         self.eat(ID)
@@ -309,36 +416,330 @@ class Parser:
                 self.eat(COMMA)
                 actual_params.append(self.expr())
         self.eat(RPAREN)
-        return FunctionCall(func_name, actual_params, token)
+        return self._span(self.nodes.FunctionCall(func_name, actual_params, token), start)
         
-    def term(self):
-        node = self.factor()
-        while self.current_token.type in (MUL, INTEGER_DIV, FLOAT_DIV):
-            token = self.current_token
-            if token.type==MUL:
-                self.eat(MUL)
-            elif token.type==INTEGER_DIV:
-                self.eat(INTEGER_DIV)
-            elif token.type==FLOAT_DIV:
-                self.eat(FLOAT_DIV)
-            node = BinOp(node, token, self.factor())
-        return node
-    
     def expr(self):
-        node = self.term()
-        while self.current_token.type in (PLUS, MINUS):
+        return self._expression(0)
+
+    def boolean_expression(self):
+        return self._boolean(0)
+
+    def _expression(self, min_bp):
+        """
+        Parse an arithmetic expression whose operators bind at least min_bp.
+        Pratt parser: one call per operand instead of one per precedence level.
+        Binary nodes span from the start of their left operand's text, so a
+        parenthesized left operand includes its parentheses.
+        """
+        start = self.offset()
+        token = self.current_token
+        token_type = token.type
+        if token_type==INTEGER_CONST or token_type==REAL_CONST:
+            self.current_token = self.next_token()
+            node = self._span(self.nodes.Num(token), start)
+        elif token_type==ID:
+            if self.call_follows():
+                node = self.function_call()
+            else:
+                self.current_token = self.next_token()
+                node = self._span(self.nodes.Var(token), start)
+        elif token_type==PLUS or token_type==MINUS:
+            self.current_token = self.next_token()
+            node = self._span(self.nodes.UnaryOp(token, self._expression(_UNARY_BP)), start)
+        elif token_type==LPAREN:
+            self.current_token = self.next_token()
+            node = self._expression(0)
+            self.eat(RPAREN)
+        else:
+            self.error()
+        while True:
             token = self.current_token
-            if token.type==PLUS:
-                self.eat(PLUS)
-            elif token.type==MINUS:
-                self.eat(MINUS)
-            node = BinOp(node, token, self.term())
-        return node
+            bp = _ARITHMETIC_BP.get(token.type)
+            if bp is None or bp < min_bp:
+                return node
+            self.current_token = self.next_token()
+            node = self._span(self.nodes.BinOp(node, token, self._expression(bp + 1)), start)
+
+    def _boolean(self, min_bp):
+        """
+        Parse a boolean expression whose AND/OR operators bind at least min_bp.
+        A min_bp above AND parses a single boolean factor: NOT, a parenthesized
+        boolean expression or a comparison of two arithmetic expressions.
+        """
+        start = self.offset()
+        token = self.current_token
+        if token.type==NOT:
+            self.current_token = self.next_token()
+            node = self._span(self.nodes.UnaryBoolOp(op=token, expr=self._boolean(_FACTOR_BP)), start)
+        elif token.type==LPAREN:
+            self.current_token = self.next_token()
+            node = self._boolean(0)
+            self.eat(RPAREN)
+        else:
+            node = self._expression(0)
+            token = self.current_token
+            if token.type in _COMPARISON_TYPES:
+                self.current_token = self.next_token()
+                node = self._span(self.nodes.ComparisonOp(left=node, op=token, right=self._expression(0)), start)
+        while True:
+            token = self.current_token
+            bp = _BOOLEAN_BP.get(token.type)
+            if bp is None or bp < min_bp:
+                return node
+            self.current_token = self.next_token()
+            node = self._span(self.nodes.BooleanOp(left=node, op=token, right=self._boolean(bp + 1)), start)
     
     def parse(self):
         node = self.program()
         if self.current_token.type!=EOF:
             self.error()
-        return node
-    
-    
\ No newline at end of file
+        return self.nodes.finish(node) if self.flat else node
+
+
+class StackParser(Parser):
+    """
+    Parser that keeps the grammar's nesting on an explicit stack.
+    Each rule that can nest is a generator which yields the sub-rule it needs
+    and is resumed with the resulting node, so nested BEGIN/END blocks, IF
+    chains and parentheses cost heap memory instead of Python call frames
+    and depth is bounded only by memory. Trees and errors match Parser's.
+    """
+    def parse(self):
+        node = self._run(self._parse_program())
+        if self.current_token.type!=EOF:
+            self.error()
+        return self.nodes.finish(node) if self.flat else node
+
+    def program(self):
+        return self._run(self._parse_program())
+
+    def block(self):
+        return self._run(self._parse_block())
+
+    def statement(self):
+        return self._run(self._parse_statement())
+
+    def expr(self):
+        return self._run(self._parse_expression(0))
+
+    def boolean_expression(self):
+        return self._run(self._parse_boolean(0))
+
+    @staticmethod
+    def _run(rule):
+        """Drive a rule generator and the sub-rules it yields to completion."""
+        stack = [rule]
+        value = None
+        while stack:
+            try:
+                child = stack[-1].send(value)
+            except StopIteration as done:
+                stack.pop()
+                value = done.value
+            else:
+                stack.append(child)
+                value = None
+        return value
+
+    def _parse_program(self):
+        start = self.offset()
+        self.eat(PROGRAM)
+        prog_name = self.current_token.value
+        self.variable()
+        self.eat(SEMI)
+        block_node = yield self._parse_block()
+        program_node = self.nodes.Program(prog_name, block_node)
+        self.eat(DOT)
+        return self._span(program_node, start)
+
+    def _parse_block(self):
+        start = self.offset()
+        declarations = self.variable_declarations()
+        while self.current_token.type==FUNCTION:
+            func_start = self.offset()
+            func_name, params, return_type = self.function_heading()
+            block_node = self._deferred_block() if self.lazy else None
+            if block_node is None:
+                block_node = yield self._parse_block()
+            func_decl = self.nodes.FunctionDecl(func_name, params, return_type, block_node)
+            if isinstance(block_node, DeferredBlock):
+                block_node.owner = func_decl
+            declarations.append(self._span(func_decl, func_start))
+            self.eat(SEMI)
+        compound_statement_node = yield self._parse_compound_statement()
+        return self._span(self.nodes.Block(declarations, compound_statement_node), start)
+
+    def _parse_compound_statement(self):
+        start = self.offset()
+        self.eat(BEGIN)
+        nodes = [(yield self._parse_statement())]
+        while self.current_token.type==SEMI:
+            self.eat(SEMI)
+            nodes.append((yield self._parse_statement()))
+        if self.current_token.type==ID:
+            self.error()
+        self.eat(END)
+        root = self.nodes.Compound(nodes)
+        return self._span(root, start)
+
+    def _parse_statement(self):
+        start = self.offset()
+        token_type = self.current_token.type
+        if token_type==BEGIN:
+            return (yield self._parse_compound_statement())
+        elif token_type==IF:
+            self.eat(IF)
+            condition = yield self._parse_boolean(0)
+            self.eat(THEN)
+            then_branch = yield self._parse_statement()
+            else_branch = None
+            if self.current_token.type==ELSE:
+                self.eat(ELSE)
+                else_branch = yield self._parse_statement()
+            self.eat(END)
+            return self._span(self.nodes.IfStatement(condition, then_branch, else_branch), start)
+        elif token_type==WHILE:
+            self.eat(WHILE)
+            condition = yield self._parse_boolean(0)
+            self.eat(DO)
+            body = yield self._parse_statement()
+            return self._span(self.nodes.WhileLoop(condition, body), start)
+        elif token_type==FOR:
+            self.eat(FOR)
+            var_node = self.variable()
+            self.eat(ASSIGN)
+            start_expr = yield self._parse_expression(0)
+            is_downto = False
+            if self.current_token.type==TO:
+                self.eat(TO)
+            elif self.current_token.type==DOWNTO:
+                self.eat(DOWNTO)
+                is_downto = True
+            else:
+                self.error()
+            end_expr = yield self._parse_expression(0)
+            self.eat(DO)
+            body = yield self._parse_statement()
+            return self._span(self.nodes.ForLoop(var_node, start_expr, end_expr, body, is_downto), start)
+        elif token_type in (PRINT, WRITELN):
+            self.eat(token_type)
+            self.eat(LPAREN)
+            expressions = [(yield self._parse_expression(0))]
+            while self.current_token.type==COMMA:
+                self.eat(COMMA)
+                expressions.append((yield self._parse_expression(0)))
+            self.eat(RPAREN)
+            return self._span(self.nodes.Print(expressions, token_type==WRITELN), start)
+        elif token_type==ID:
+            left = self.variable()
+            token = self.current_token
+            self.eat(ASSIGN)
+            right = yield self._parse_expression(0)
+            return self._span(self.nodes.Assign(left, token, right), start)
+        return self.empty()
+
+    def _parse_function_call(self):
+        start = self.offset()
+        token = self.current_token
+        self.eat(ID)
+        self.eat(LPAREN)
+        actual_params = []
+        if self.current_token.type!=RPAREN:
+            actual_params.append((yield self._parse_expression(0)))
+            while self.current_token.type==COMMA:
+                self.eat(COMMA)
+                actual_params.append((yield self._parse_expression(0)))
+        self.eat(RPAREN)
+        return self._span(self.nodes.FunctionCall(token.value, actual_params, token), start)
+
+    def _parse_expression(self, min_bp):
+        """Generator form of Parser._expression."""
+        start = self.offset()
+        token = self.current_token
+        token_type = token.type
+        if token_type==INTEGER_CONST or token_type==REAL_CONST:
+            self.current_token = self.next_token()
+            node = self._span(self.nodes.Num(token), start)
+        elif token_type==ID:
+            if self.call_follows():
+                node = yield self._parse_function_call()
+            else:
+                self.current_token = self.next_token()
+                node = self._span(self.nodes.Var(token), start)
+        elif token_type==PLUS or token_type==MINUS:
+            self.current_token = self.next_token()
+            node = self._span(self.nodes.UnaryOp(token, (yield self._parse_expression(_UNARY_BP))), start)
+        elif token_type==LPAREN:
+            self.current_token = self.next_token()
+            node = yield self._parse_expression(0)
+            self.eat(RPAREN)
+        else:
+            self.error()
+        while True:
+            token = self.current_token
+            bp = _ARITHMETIC_BP.get(token.type)
+            if bp is None or bp < min_bp:
+                return node
+            self.current_token = self.next_token()
+            node = self._span(self.nodes.BinOp(node, token, (yield self._parse_expression(bp + 1))), start)
+
+    def _parse_boolean(self, min_bp):
+        """Generator form of Parser._boolean."""
+        start = self.offset()
+        token = self.current_token
+        if token.type==NOT:
+            self.current_token = self.next_token()
+            node = self._span(self.nodes.UnaryBoolOp(op=token, expr=(yield self._parse_boolean(_FACTOR_BP))), start)
+        elif token.type==LPAREN:
+            self.current_token = self.next_token()
+            node = yield self._parse_boolean(0)
+            self.eat(RPAREN)
+        else:
+            node = yield self._parse_expression(0)
+            token = self.current_token
+            if token.type in _COMPARISON_TYPES:
+                self.current_token = self.next_token()
+                node = self._span(self.nodes.ComparisonOp(left=node, op=token, right=(yield self._parse_expression(0))), start)
+        while True:
+            token = self.current_token
+            bp = _BOOLEAN_BP.get(token.type)
+            if bp is None or bp < min_bp:
+                return node
+            self.current_token = self.next_token()
+            node = self._span(self.nodes.BooleanOp(left=node, op=token, right=(yield self._parse_boolean(bp + 1))), start)
+
+
+class DeferredBlock(AST):
+    """
+    Function body skipped by a lazy parser: the token range first:last of
+    its TokenBuffer. resolve() parses it, runs the passes registered on it
+    (see ConstantFolder) and puts the Block into its FunctionDecl, so only
+    the first use pays for parsing and later visits see a normal tree.
+    """
+    __slots__ = ('tokens', 'first', 'last', 'parser_class', 'owner', 'passes')
+
+    def __init__(self, tokens, first, last, parser_class):
+        self.tokens = tokens
+        self.first = first
+        self.last = last
+        self.parser_class = parser_class
+        self.owner = None #FunctionDecl whose body this is
+        self.passes = [] #callables applied to the parsed Block, returning the Block to use
+
+    def fields(self):
+        return []
+
+    def resolve(self):
+        """Parse the body, install it in the owning FunctionDecl and return it."""
+        if self.owner is not None and self.owner.block_node is not self:
+            return self.owner.block_node
+        parser = self.parser_class(self.tokens, lazy=True)
+        parser._seek(self.first)
+        block = parser.block()
+        if parser.index!=self.last:
+            parser.error()
+        for transform in self.passes:
+            block = transform(block)
+        if self.owner is not None:
+            self.owner.block_node = block
+        return block
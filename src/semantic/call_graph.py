@@ -0,0 +1,273 @@
+"""
+Call graph and purity analysis.
+Runs on trees that passed semantic analysis, records which functions call
+which, finds recursive functions (strongly connected components of the
+graph) and tells pure functions from impure ones.
+"""
+from src.parser.parser import DeferredBlock
+
+class NodeVisitor:
+    """Base visitor class"""
+    def visit(self, node):
+        method_name = 'visit_'+type(node).__name__
+        visitor = getattr(self, method_name, self.generic_visit)
+        return visitor(node)
+
+    def generic_visit(self, node):
+        raise Exception(f'No visit_{type(node).__name__} method')
+
+
+class CallGraph(NodeVisitor):
+    """
+    Call graph of a program.
+    Vertices are the Program node and every FunctionDecl; calls maps each
+    of them to the functions it calls, in order of first call.
+    A function is pure if its result depends only on its arguments and
+    calling it has no effect: it only uses its own return value, parameters
+    and local variables, never prints and calls only pure functions. Reading
+    or writing a global or a variable of an enclosing function makes it
+    impure. Functions whose lazily parsed body was never parsed (so never
+    called) are impure, as nothing is known about them.
+    """
+    def __init__(self):
+        self.program = None
+        self.functions = [] #FunctionDecls in declaration order
+        self.calls = {} #Program or FunctionDecl -> list of FunctionDecls called
+        self.impurity = {} #FunctionDecl -> why it is impure, None if pure
+        self.scopes = [] #per routine: name -> FunctionDecl, or None for variables
+        self.current = None #Program or FunctionDecl whose body is visited
+        self._sccs = None
+
+    def build(self, tree):
+        """Walk tree, then classify every function; return self."""
+        self.visit(tree)
+        self._sccs = self._find_sccs()
+        self._classify()
+        return self
+
+    #graph queries
+
+    def callees(self, routine):
+        """Functions called by a FunctionDecl or the Program node."""
+        return list(self.calls.get(routine, ()))
+
+    def callers(self, func):
+        """Routines (FunctionDecls or the Program node) calling func."""
+        return [routine for routine, called in self.calls.items() if func in called]
+
+    def sccs(self):
+        """
+        Strongly connected components of the functions, each a list of
+        FunctionDecls. Components come callees first: a component only
+        calls functions in itself or in the components before it.
+        """
+        return [list(component) for component in self._sccs]
+
+    def component(self, func):
+        """The strongly connected component func belongs to."""
+        for component in self._sccs:
+            if func in component:
+                return list(component)
+        raise KeyError(func)
+
+    def is_recursive(self, func):
+        """True if func can call itself, directly or through other functions."""
+        component = self.component(func)
+        return len(component) > 1 or func in self.calls[func]
+
+    def is_pure(self, func):
+        return self.impurity[func] is None
+
+    def pure_functions(self):
+        return [func for func in self.functions if self.impurity[func] is None]
+
+    def reason(self, func):
+        """Why func is impure, e.g. "prints" or "calls impure 'Log'"; None if it is pure."""
+        return self.impurity[func]
+
+    #collecting the graph
+
+    def lookup_function(self, name):
+        for scope in reversed(self.scopes):
+            if scope.get(name) is not None:
+                return scope[name]
+        return None
+
+    def is_local(self, name):
+        """True if name is a variable of the function being visited, not of an enclosing routine."""
+        return self.current is not self.program and name in self.scopes[-1]
+
+    def effect(self, reason):
+        """Record that the function being visited is impure, keeping the first reason found."""
+        if self.current is not self.program and self.impurity[self.current] is None:
+            self.impurity[self.current] = reason
+
+    def visit_FlatAST(self, node):
+        self.visit(node.tree)
+
+    def visit_Program(self, node):
+        self.program = self.current = node
+        self.calls[node] = []
+        self.scopes.append({})
+        self.visit(node.block)
+        self.scopes.pop()
+
+    def visit_Block(self, node):
+        for declaration in node.declarations:
+            if type(declaration).__name__ == 'VarDecl':
+                self.scopes[-1][declaration.var_node.value] = None
+        for declaration in node.declarations:
+            self.visit(declaration)
+        self.visit(node.compound_statement)
+
+    def visit_VarDecl(self, node):
+        pass
+
+    def visit_FunctionDecl(self, node):
+        self.scopes[-1][node.func_name] = node
+        self.functions.append(node)
+        self.calls[node] = []
+        self.impurity[node] = None
+        saved = self.current
+        self.current = node
+        self.scopes.append({node.func_name: None})
+        for param in node.params:
+            self.scopes[-1][param.var_node.value] = None
+        if isinstance(node.block_node, DeferredBlock):
+            self.impurity[node] = 'body not parsed'
+        else:
+            self.visit(node.block_node)
+        self.scopes.pop()
+        self.current = saved
+
+    def visit_Compound(self, node):
+        for child in node.children:
+            self.visit(child)
+
+    def visit_NoOp(self, node):
+        pass
+
+    def visit_Assign(self, node):
+        if not self.is_local(node.left.value):
+            self.effect(f"assigns '{node.left.value}' outside its frame")
+        self.visit(node.right)
+
+    def visit_Var(self, node):
+        if not self.is_local(node.value):
+            self.effect(f"reads '{node.value}' outside its frame")
+
+    def visit_FunctionCall(self, node):
+        func = self.lookup_function(node.func_name)
+        called = self.calls[self.current]
+        if func is not None and func not in called:
+            called.append(func)
+        for arg in node.actual_params:
+            self.visit(arg)
+
+    def visit_IfStatement(self, node):
+        self.visit(node.condition)
+        self.visit(node.then_branch)
+        if node.else_branch:
+            self.visit(node.else_branch)
+
+    def visit_WhileLoop(self, node):
+        self.visit(node.condition)
+        self.visit(node.body)
+
+    def visit_ForLoop(self, node):
+        if not self.is_local(node.var_node.value):
+            self.effect(f"assigns '{node.var_node.value}' outside its frame")
+        self.visit(node.start_expr)
+        self.visit(node.end_expr)
+        self.visit(node.body)
+
+    def visit_Print(self, node):
+        self.effect('prints')
+        for expr in node.expressions:
+            self.visit(expr)
+
+    def visit_Num(self, node):
+        pass
+
+    def visit_BinOp(self, node):
+        self.visit(node.left)
+        self.visit(node.right)
+
+    def visit_UnaryOp(self, node):
+        self.visit(node.expr)
+
+    visit_ComparisonOp = visit_BinOp
+    visit_BooleanOp = visit_BinOp
+    visit_UnaryBoolOp = visit_UnaryOp
+
+    #analysis
+
+    def _find_sccs(self):
+        """Tarjan's algorithm, with an explicit stack so long call chains do not hit the recursion limit."""
+        index = {}
+        lowlink = {}
+        on_stack = set()
+        stack = []
+        components = []
+        for root in self.functions:
+            if root in index:
+                continue
+            work = [(root, 0)]
+            while work:
+                func, i = work.pop()
+                if i == 0:
+                    index[func] = lowlink[func] = len(index)
+                    stack.append(func)
+                    on_stack.add(func)
+                callees = self.calls[func]
+                for i in range(i, len(callees)):
+                    callee = callees[i]
+                    if callee not in index:
+                        work.append((func, i+1))
+                        work.append((callee, 0))
+                        break
+                    if callee in on_stack:
+                        lowlink[func] = min(lowlink[func], index[callee])
+                else:
+                    if lowlink[func] == index[func]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member is func:
+                                break
+                        components.append(component)
+                    if work:
+                        caller = work[-1][0]
+                        lowlink[caller] = min(lowlink[caller], lowlink[func])
+        return components
+
+    def _classify(self):
+        """
+        Propagate impurity from callees to callers, a component at a time:
+        a function calling an impure function, directly or through the other
+        functions of its component, is impure.
+        """
+        for component in self._sccs:
+            origin = None #an impure member, or an impure function a member calls
+            for func in component:
+                if self.impurity[func] is not None:
+                    origin = func
+                    break
+                for callee in self.calls[func]:
+                    if callee not in component and self.impurity[callee] is not None:
+                        origin = callee
+                        break
+                if origin is not None:
+                    break
+            if origin is None:
+                continue
+            for func in component:
+                if self.impurity[func] is None:
+                    self.impurity[func] = f"calls impure '{origin.func_name}'"
+
+
+def build_call_graph(tree):
+    """Build the CallGraph of an analyzed tree (object or flat)."""
+    return CallGraph().build(tree)
@@ -3,13 +3,12 @@ Semantic analyzer for the Pascal interpreter.
 Builds symbol table and performs semantic checks.
 """
 import os
+from itertools import islice
 from src.parser.ast_nodes import (Program, Block, VarDecl, FunctionDecl, Param, FunctionCall, Type, BinOp, Num, UnaryOp, Compound, Assign, Var, NoOp, ComparisonOp, BooleanOp, UnaryBoolOp, IfStatement, WhileLoop, ForLoop, Print)
-from src.semantic.symbols import SymbolTable, VarSymbol, BuiltinTypeSymbol, FunctionSymbol, ScopedSymbolTable
+from src.parser.parser import DeferredBlock
+from src.semantic.symbols import SymbolTable, VarSymbol, BuiltinTypeSymbol, FunctionSymbol, ScopedSymbolTable, PrintListener
 from src.errors import SemanticError
 
-# Control debug output via environment variable
-_DEBUG = os.environ.get('PASCAL_DEBUG', '0') == '1'
-
 class NodeVisitor:
     """Base visitor class"""
     def visit(self, node):
@@ -24,30 +23,62 @@ class SemanticAnalyzer(NodeVisitor):
     """
     Semantic analyzer that builds symbol table and checks semantics.
     supports nested scopes for BEGIN...END blocks and functions.
+    It also resolves names: every variable gets a slot in the activation
+    record of its routine, and Var and FunctionCall nodes are annotated with
+    where their variable or FunctionDecl lives, so the interpreter never
+    looks names up.
     """
-    def __init__(self):
+    def __init__(self, listener=None):
+        """
+        Args:
+            listener: ScopeListener told about every scope, definition and
+                lookup; PASCAL_DEBUG=1 in the environment prints them
+        """
+        if listener is None and os.environ.get('PASCAL_DEBUG', '0') == '1':
+            listener = PrintListener()
+        self.listener = listener
         self.current_scope=None
         self.scope_counter = 0
         self.global_scope = None  # Store reference for tests
+        self.deferred_bodies = {} #FunctionSymbol -> (DeferredBlock, function scope, level, snapshot) not analyzed yet
+        self.routine_scope = None #scope of the program or function whose body is analyzed
+        self.routine_level = 0 #its nesting level, program=0
+        self.annotate = True
         
     def error(self, message):
         raise SemanticError(message)
 
+    def define_variable(self, var_symbol):
+        """Define a variable in the current scope, in the next slot of its routine's activation record."""
+        var_symbol.level = self.routine_level
+        var_symbol.slot = self.routine_scope.slot_count
+        self.routine_scope.slot_count += 1
+        self.current_scope.define(var_symbol)
+
+    def visit_FlatAST(self, node):
+        """Analyze a flat tree through its node views, which cannot be annotated."""
+        self.annotate = False
+        try:
+            self.visit(node.tree)
+        finally:
+            self.annotate = True
+
     def visit_Program(self, node):
-        if _DEBUG:
-            print('ENTER scope: global')
         global_scope = ScopedSymbolTable(
             scope_name='global',
             scope_level=1,
-            enclosing_scope=self.current_scope #None for global
+            enclosing_scope=self.current_scope, #None for global
+            listener=self.listener
         )
+        if self.listener is not None:
+            self.listener.enter_scope(global_scope)
         global_scope._init_builtins()
         self.current_scope = global_scope
         self.global_scope = global_scope  # Store for later access
+        self.routine_scope = global_scope
         self.visit(node.block)
-        if _DEBUG:
-            print(global_scope)
-            print('LEAVE scope: global')
+        if self.listener is not None:
+            self.listener.leave_scope(global_scope)
         self.current_scope = self.current_scope.enclosing_scope
 
     def visit_Block(self, node):
@@ -65,7 +96,7 @@ class SemanticAnalyzer(NodeVisitor):
             self.error(f"Duplicate identifier '{var_name}'")
         # Define variable symbol with its type
         var_symbol = VarSymbol(var_name, type_symbol)
-        self.current_scope.define(var_symbol)
+        self.define_variable(var_symbol)
 
     def visit_FunctionDecl(self, node):
         """Visit function declaration node."""
@@ -76,20 +107,22 @@ class SemanticAnalyzer(NodeVisitor):
         # Get return type
         return_type_symbol = self.current_scope.lookup(node.return_type.value)
         # Create function symbol with parameters
-        func_symbol = FunctionSymbol(func_name, return_type=return_type_symbol)
+        func_symbol = FunctionSymbol(func_name, return_type=return_type_symbol, decl=node, level=self.routine_level)
         self.current_scope.define(func_symbol)
         # Create new scope for function
-        if _DEBUG:
-            print(f'ENTER scope: {func_name}')
         function_scope = ScopedSymbolTable(
             scope_name=func_name,
             scope_level=self.current_scope.scope_level + 1,
             enclosing_scope=self.current_scope
         )
+        if self.listener is not None:
+            self.listener.enter_scope(function_scope)
         self.current_scope = function_scope
+        saved_routine = self.routine_scope, self.routine_level
+        self.routine_scope, self.routine_level = function_scope, self.routine_level + 1
         # Define function name as variable in its own scope (for return value assignment)
         func_return_var = VarSymbol(func_name, return_type_symbol)
-        self.current_scope.define(func_return_var)
+        self.define_variable(func_return_var)
         # Define parameters in function scope
         for param in node.params:
             param_type = self.current_scope.lookup(param.type_node.value)
@@ -98,14 +131,18 @@ class SemanticAnalyzer(NodeVisitor):
             if self.current_scope.lookup(param_name, current_scope_only=True) is not None:
                 self.error(f"Duplicate parameter '{param_name}'")
             var_symbol = VarSymbol(param_name, param_type)
-            self.current_scope.define(var_symbol)
+            self.define_variable(var_symbol)
             func_symbol.params.append(var_symbol)
-        # Visit function body
-        self.visit(node.block_node)
-        if _DEBUG:
-            print(function_scope)
-            print(f'LEAVE scope: {func_name}')
+        # Visit function body; a lazily parsed one waits for its first call
+        if isinstance(node.block_node, DeferredBlock):
+            snapshot = [(scope, len(scope._symbols)) for scope in self.enclosing_scopes(function_scope)]
+            self.deferred_bodies[func_symbol] = (node.block_node, function_scope, self.routine_level, snapshot)
+        else:
+            self.visit(node.block_node)
+        if self.listener is not None:
+            self.listener.leave_scope(function_scope)
         self.current_scope = self.current_scope.enclosing_scope
+        self.routine_scope, self.routine_level = saved_routine
 
     def visit_FunctionCall(self, node):
         """Visit function call node."""
@@ -124,15 +161,62 @@ class SemanticAnalyzer(NodeVisitor):
         
         if func_symbol is None:
             self.error(f"Undefined function '{func_name}'")
+        if func_symbol in self.deferred_bodies:
+            self.analyze_deferred_body(func_symbol)
         
         # Check parameter count
         expected_params = len(func_symbol.params)
         actual_params = len(node.actual_params) if node.actual_params else 0
         if expected_params != actual_params:
             self.error(f"Function '{func_name}' expects {expected_params} parameter(s), got {actual_params}")
+        if self.annotate:
+            node.depth = self.routine_level - func_symbol.level
+            node.decl = func_symbol.decl
         for param_node in (node.actual_params or []):
             self.visit(param_node)
 
+    def enclosing_scopes(self, scope):
+        """Yield the scopes enclosing scope, innermost first."""
+        scope = scope.enclosing_scope
+        while scope is not None:
+            yield scope
+            scope = scope.enclosing_scope
+
+    def restore_scopes(self, snapshot):
+        """
+        Return the enclosing scopes recorded in snapshot as they were then:
+        scopes that have gained symbols since are replaced by copies holding
+        only the symbols they had, so declarations that followed stay invisible.
+        """
+        parent = None
+        changed = False
+        for scope, count in reversed(snapshot):
+            if not changed and len(scope._symbols) == count:
+                parent = scope
+                continue
+            changed = True
+            copy = ScopedSymbolTable(scope.scope_name, scope.scope_level, parent, scope.listener)
+            copy._symbols = dict(islice(scope._symbols.items(), count))
+            copy._definitions = scope._definitions
+            parent = copy
+        return parent
+
+    def analyze_deferred_body(self, func_symbol):
+        """
+        Parse and analyze a lazily parsed function body in the scope it was
+        declared in, seeing only what was declared before the function, as
+        an eager analysis would.
+        """
+        deferred, function_scope, level, snapshot = self.deferred_bodies.pop(func_symbol)
+        function_scope.enclosing_scope = self.restore_scopes(snapshot)
+        saved = self.current_scope, self.routine_scope, self.routine_level
+        self.current_scope = self.routine_scope = function_scope
+        self.routine_level = level
+        try:
+            self.visit(deferred.resolve())
+        finally:
+            self.current_scope, self.routine_scope, self.routine_level = saved
+
     def visit_Compound(self, node):
         """
         Visit compound statement (BEGIN...END block).
@@ -143,18 +227,17 @@ class SemanticAnalyzer(NodeVisitor):
         if self.current_scope.scope_level>1 or self._is_nested_compound(node):
             self.scope_counter+=1
             scope_name = f'block{self.scope_counter}'
-            if _DEBUG:
-                print(f'ENTER scope: {scope_name}')
             nested_scope = ScopedSymbolTable(
                 scope_name=scope_name, scope_level=self.current_scope.scope_level+1, enclosing_scope=self.current_scope
             )
+            if self.listener is not None:
+                self.listener.enter_scope(nested_scope)
             self.current_scope=nested_scope
             #visit children
             for child in node.children:
                 self.visit(child)
-            if _DEBUG:
-                print(nested_scope)
-                print(f'LEAVE scope: {scope_name}')
+            if self.listener is not None:
+                self.listener.leave_scope(nested_scope)
             self.current_scope = self.current_scope.enclosing_scope
         else:
             for child in node.children:
@@ -170,6 +253,7 @@ class SemanticAnalyzer(NodeVisitor):
         var_symbol = self.current_scope.lookup(var_name)
         if var_symbol is None:
             self.error(f"Cannot assign to undeclared variable '{var_name}'")
+        self.resolve(node.left, var_symbol)
         self.visit(node.right)
 
     def visit_Var(self, node):
@@ -178,7 +262,14 @@ class SemanticAnalyzer(NodeVisitor):
         var_symbol = self.current_scope.lookup(var_name)
         if var_symbol is None:
             self.error(f"Undeclared variable '{var_name}'")
-        
+        self.resolve(node, var_symbol)
+
+    def resolve(self, var_node, var_symbol):
+        """Annotate a Var node with the (depth, slot) address of its variable."""
+        if self.annotate and isinstance(var_symbol, VarSymbol):
+            var_node.depth = self.routine_level - var_symbol.level
+            var_node.slot = var_symbol.slot
+
     def visit_BinOp(self, node):
         self.visit(node.left)
         self.visit(node.right)
@@ -216,6 +307,7 @@ class SemanticAnalyzer(NodeVisitor):
         var_symbol = self.current_scope.lookup(var_name)
         if var_symbol is None:
             self.error(f"undefined variable '{var_name}' in FOR loop")
+        self.resolve(node.var_node, var_symbol)
         self.visit(node.start_expr)
         self.visit(node.end_expr)
         self.visit(node.body)
@@ -2,10 +2,6 @@
 Symbol table for semantic analysis.
 Tracks variable declarations and their types with scope support.
 """
-import os
-
-# Control debug output via environment variable
-_DEBUG = os.environ.get('PASCAL_DEBUG', '0') == '1'
 
 class Symbol:
     """Base class for all symbols"""
@@ -25,9 +21,15 @@ class BuiltinTypeSymbol(Symbol):
         return f"{self.__class__.__name__}(name='{self.name}')"
     
 class VarSymbol(Symbol):
-    """Represents a variable symbol."""
-    def __init__(self, name, type):
+    """
+    Represents a variable symbol.
+    level is the nesting level of the routine whose activation record holds
+    the variable (program=0) and slot its index there.
+    """
+    def __init__(self, name, type, level=None, slot=None):
         super().__init__(name, type)
+        self.level = level
+        self.slot = slot
 
     def __str__(self):
         return f"<{self.name}:{self.type}>"
@@ -36,11 +38,17 @@ class VarSymbol(Symbol):
         return f"<{self.__class__.__name__}(name='{self.name}', type='{self.type}')>"
     
 class FunctionSymbol(Symbol):
-    """Represents a function symbol."""
-    def __init__(self, name, params=None, return_type=None):
+    """
+    Represents a function symbol.
+    decl is its FunctionDecl and level the nesting level of the routine it
+    is declared in.
+    """
+    def __init__(self, name, params=None, return_type=None, decl=None, level=None):
         super().__init__(name, return_type)
         self.params = params if params is not None else []
         self.return_type = return_type
+        self.decl = decl
+        self.level = level
 
     def __str__(self):
         params_str = ', '.join(str(p) for p in self.params)
@@ -49,16 +57,65 @@ class FunctionSymbol(Symbol):
     def __repr__(self):
         return f"<{self.__class__.__name__}(name='{self.name}', params={self.params}, return_type={self.return_type})>"
     
+class ScopeListener:
+    """
+    Observer of scopes and symbols, for tracing and tools.
+    Subclasses override the events they want; scopes without a listener
+    pay nothing for the hooks.
+    """
+    def enter_scope(self, scope):
+        pass
+
+    def leave_scope(self, scope):
+        pass
+
+    def define(self, scope, symbol):
+        pass
+
+    def lookup(self, scope, name, symbol):
+        """Called after name was looked up from scope and resolved to symbol (None if undefined)."""
+        pass
+
+class PrintListener(ScopeListener):
+    """Listener printing every scope change, definition and lookup (PASCAL_DEBUG=1)."""
+    def enter_scope(self, scope):
+        print(f'ENTER scope: {scope.scope_name}')
+
+    def leave_scope(self, scope):
+        print(scope)
+        print(f'LEAVE scope: {scope.scope_name}')
+
+    def define(self, scope, symbol):
+        print(f'Define: {symbol}')
+
+    def lookup(self, scope, name, symbol):
+        print(f'Lookup: {name}. (Scope name: {scope.scope_name})')
+
 class ScopedSymbolTable:
     """
     scoped symbol table with support for nested scopes.
     Each scope has a name, level and optional parent scope.
+    Names found in enclosing scopes are remembered in a per-scope cache, so
+    looking them up again from a deeply nested scope takes one dict access.
+    Every scope of a tree shares a definition counter; a define anywhere
+    invalidates all the caches, as it may shadow a cached symbol.
     """
-    def __init__(self, scope_name, scope_level, enclosing_scope=None):
+    def __init__(self, scope_name, scope_level, enclosing_scope=None, listener=None):
         self._symbols = {}
         self.scope_name = scope_name
         self.scope_level = scope_level
         self.enclosing_scope = enclosing_scope #parent scope
+        self.slot_count = 0 #activation record slots given out, in routine scopes
+        self._definitions = enclosing_scope._definitions if enclosing_scope else [0] #shared define counter
+        self._cache = {} #name -> symbol found in an enclosing scope
+        self._cache_version = 0 #value of the define counter the cache is valid for
+        if listener is None and enclosing_scope is not None:
+            listener = enclosing_scope.listener
+        self.listener = listener
+        if listener is not None:
+            #shadow the methods with traced ones; untraced scopes have no checks
+            self.define = self._traced_define
+            self.lookup = self._traced_lookup
 
     def _init_builtins(self):
         """Initialize built-in type symbols."""
@@ -82,9 +139,8 @@ class ScopedSymbolTable:
     
     def define(self, symbol):
         """Define a symbol in the current scope only."""
-        if _DEBUG:
-            print(f'Define: {symbol}')
         self._symbols[symbol.name] = symbol
+        self._definitions[0] += 1
 
     def lookup(self, name, current_scope_only=False):
         """
@@ -92,15 +148,42 @@ class ScopedSymbolTable:
         If current_scope_only=True, only search this scope.
         Otherwise, search this scope and all enclosing scopes.
         """
-        if _DEBUG:
-            print(f'Lookup: {name}. (Scope name: {self.scope_name})')
         symbol = self._symbols.get(name)
+        if symbol is not None or current_scope_only:
+            return symbol
+        version = self._definitions[0]
+        if self._cache_version != version:
+            self._cache.clear()
+            self._cache_version = version
+        symbol = self._cache.get(name)
         if symbol is not None:
             return symbol
-        
-        if not current_scope_only and self.enclosing_scope is not None:
-            return self.enclosing_scope.lookup(name)
+        path = [self]
+        scope = self.enclosing_scope
+        while scope is not None:
+            symbol = scope._symbols.get(name)
+            if symbol is None and scope._cache_version == version:
+                symbol = scope._cache.get(name)
+            if symbol is not None:
+                #remember it in every scope walked through, for lookups from their other children
+                for walked in path:
+                    if walked._cache_version != version:
+                        walked._cache.clear()
+                        walked._cache_version = version
+                    walked._cache[name] = symbol
+                return symbol
+            path.append(scope)
+            scope = scope.enclosing_scope
         return None
+
+    def _traced_define(self, symbol):
+        ScopedSymbolTable.define(self, symbol)
+        self.listener.define(self, symbol)
+
+    def _traced_lookup(self, name, current_scope_only=False):
+        symbol = ScopedSymbolTable.lookup(self, name, current_scope_only)
+        self.listener.lookup(self, name, symbol)
+        return symbol
     
 class SymbolTable:
     """Symbol table to store and lookup symbols."""
@@ -0,0 +1,209 @@
+"""
+Static type checker for INTEGER/REAL expressions.
+Runs on trees that passed semantic analysis, gives every expression node
+its static type in node.type and reports type errors.
+"""
+from src.lexer.token import REAL_CONST, INTEGER_DIV, FLOAT_DIV
+from src.parser.parser import DeferredBlock
+from src.errors import SemanticError
+
+INTEGER = 'INTEGER'
+REAL = 'REAL'
+BOOLEAN = 'BOOLEAN' #comparisons and AND/OR/NOT; not a declarable type
+
+class NodeVisitor:
+    """Base visitor class"""
+    def visit(self, node):
+        method_name = 'visit_'+type(node).__name__
+        visitor = getattr(self, method_name, self.generic_visit)
+        return visitor(node)
+
+    def generic_visit(self, node):
+        raise Exception(f'No visit_{type(node).__name__} method')
+
+
+class TypeChecker(NodeVisitor):
+    """
+    Type inference and checking pass.
+    INTEGER op INTEGER is INTEGER for +, - and *; any REAL operand or '/'
+    makes a REAL. DIV takes INTEGER operands only, an INTEGER may be used
+    where a REAL is expected but not the other way round, and FOR loops run
+    over INTEGER variables and bounds.
+    With strict=True the first type error is raised as a SemanticError;
+    otherwise errors are collected in self.errors and checking goes on. The
+    types annotated are only guaranteed to hold at runtime for programs
+    without type errors.
+    """
+    def __init__(self, strict=True):
+        self.strict = strict
+        self.errors = [] #messages of the type errors found
+        self.scopes = [] #per routine: name -> declared type, or FunctionDecl for functions
+        self.annotate = True
+
+    def error(self, message):
+        if self.strict:
+            raise SemanticError(message)
+        self.errors.append(message)
+
+    def lookup(self, name):
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        return None
+
+    def lookup_function(self, name):
+        """Find a FunctionDecl, skipping the return value variable of the same name inside it."""
+        for scope in reversed(self.scopes):
+            if not isinstance(scope.get(name, ''), str):
+                return scope[name]
+        return None
+
+    def typed(self, node, type_name):
+        """Annotate node with its static type and return the type."""
+        if self.annotate:
+            node.type = type_name
+        return type_name
+
+    def expect(self, type_name, expected, context):
+        """Report a value of type_name used where expected is required."""
+        if type_name != expected and not (type_name == INTEGER and expected == REAL):
+            self.error(f"Type mismatch: {context} expects {expected}, got {type_name}")
+
+    def visit_FlatAST(self, node):
+        """Check a flat tree through its node views, which cannot be annotated."""
+        self.annotate = False
+        try:
+            self.visit(node.tree)
+        finally:
+            self.annotate = True
+
+    def visit_Program(self, node):
+        self.scopes.append({})
+        self.visit(node.block)
+        self.scopes.pop()
+
+    def visit_Block(self, node):
+        for declaration in node.declarations:
+            self.visit(declaration)
+        self.visit(node.compound_statement)
+
+    def visit_VarDecl(self, node):
+        self.scopes[-1][node.var_node.value] = node.type_node.value
+
+    def visit_FunctionDecl(self, node):
+        self.scopes[-1][node.func_name] = node
+        scope = {node.func_name: node.return_type.value}
+        for param in node.params:
+            scope[param.var_node.value] = param.type_node.value
+        self.scopes.append(scope)
+        if isinstance(node.block_node, DeferredBlock):
+            #checked when the body is parsed, in the scopes it is declared in
+            node.block_node.passes.append(self._body_check(list(self.scopes)))
+        else:
+            self.visit(node.block_node)
+        self.scopes.pop()
+
+    def _body_check(self, scopes):
+        def check(block):
+            saved, self.scopes = self.scopes, scopes
+            try:
+                self.visit(block)
+            finally:
+                self.scopes = saved
+            return block
+        return check
+
+    def visit_Compound(self, node):
+        for child in node.children:
+            self.visit(child)
+
+    def visit_NoOp(self, node):
+        pass
+
+    def visit_Assign(self, node):
+        target = self.visit(node.left)
+        self.expect(self.visit(node.right), target, f"assignment to '{node.left.value}'")
+
+    def visit_IfStatement(self, node):
+        self.visit(node.condition)
+        self.visit(node.then_branch)
+        if node.else_branch:
+            self.visit(node.else_branch)
+
+    def visit_WhileLoop(self, node):
+        self.visit(node.condition)
+        self.visit(node.body)
+
+    def visit_ForLoop(self, node):
+        var_name = node.var_node.value
+        if self.visit(node.var_node) != INTEGER:
+            self.error(f"Type mismatch: FOR variable '{var_name}' must be INTEGER")
+        self.expect(self.visit(node.start_expr), INTEGER, f"FOR loop over '{var_name}'")
+        self.expect(self.visit(node.end_expr), INTEGER, f"FOR loop over '{var_name}'")
+        self.visit(node.body)
+
+    def visit_Print(self, node):
+        for expr in node.expressions:
+            self.visit(expr)
+
+    def visit_Num(self, node):
+        if node.token.type == REAL_CONST or type(node.value) is float:
+            return self.typed(node, REAL)
+        if type(node.value) is bool: #a folded comparison
+            return self.typed(node, BOOLEAN)
+        return self.typed(node, INTEGER)
+
+    def visit_Var(self, node):
+        type_name = self.lookup(node.value)
+        if not isinstance(type_name, str):
+            self.error(f"'{node.value}' is not a variable")
+            type_name = None
+        return self.typed(node, type_name)
+
+    def visit_FunctionCall(self, node):
+        func_node = self.lookup_function(node.func_name)
+        for param, arg in zip(func_node.params, node.actual_params):
+            self.expect(self.visit(arg), param.type_node.value,
+                        f"parameter '{param.var_node.value}' of '{node.func_name}'")
+        return self.typed(node, func_node.return_type.value)
+
+    def visit_BinOp(self, node):
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        if BOOLEAN in (left, right):
+            self.error(f"Type mismatch: '{node.op.value}' expects numbers, got BOOLEAN")
+        if node.op.type == FLOAT_DIV:
+            return self.typed(node, REAL)
+        if node.op.type == INTEGER_DIV:
+            if left == REAL or right == REAL:
+                self.error(f"Type mismatch: '{node.op.value}' expects INTEGER operands, got REAL")
+            return self.typed(node, INTEGER)
+        return self.typed(node, INTEGER if left == right == INTEGER else REAL)
+
+    def visit_UnaryOp(self, node):
+        operand = self.visit(node.expr)
+        if operand == BOOLEAN:
+            self.error(f"Type mismatch: unary '{node.op.value}' expects a number, got BOOLEAN")
+        return self.typed(node, operand)
+
+    def visit_ComparisonOp(self, node):
+        for operand in (self.visit(node.left), self.visit(node.right)):
+            if operand == BOOLEAN:
+                self.error(f"Type mismatch: '{node.op.value}' expects numbers, got BOOLEAN")
+        return self.typed(node, BOOLEAN)
+
+    def visit_BooleanOp(self, node):
+        self.visit(node.left)
+        self.visit(node.right)
+        return self.typed(node, BOOLEAN)
+
+    def visit_UnaryBoolOp(self, node):
+        self.visit(node.expr)
+        return self.typed(node, BOOLEAN)
+
+
+def check_types(tree, strict=True):
+    """Annotate tree with static types; return the TypeChecker, whose errors lists what was found."""
+    checker = TypeChecker(strict)
+    checker.visit(tree)
+    return checker
@@ -0,0 +1,26 @@
+"""
+Shared pytest configuration.
+Throughput regression tests carry the perf marker and only run with
+--run-perf, since their timings depend on the machine and its load.
+"""
+import pytest
+from benchmarks.lexer_suite import DEFAULT_TOLERANCE
+
+
+def pytest_addoption(parser):
+    parser.addoption('--run-perf', action='store_true', help='run throughput regression tests (perf marker)')
+    parser.addoption('--perf-tolerance', type=float, default=DEFAULT_TOLERANCE,
+                     help='allowed fractional throughput drop against the stored baseline')
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'perf: throughput regression test compared against a stored baseline')
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('--run-perf'):
+        return
+    skip = pytest.mark.skip(reason='throughput test, use --run-perf')
+    for item in items:
+        if 'perf' in item.keywords:
+            item.add_marker(skip)
@@ -0,0 +1,129 @@
+"""
+Tests for the compiled-AST (.pasc) cache.
+"""
+import marshal
+import os
+import pytest
+from run_interpreter import compile_file, run_file
+from src.parser.ast_cache import ASTCache, CACHE_DIRNAME, MAGIC
+from src.interpreter.interpreter import Interpreter
+from src.errors import SemanticError
+
+PROGRAM_TEXT = """PROGRAM Cached;
+VAR x, y : INTEGER;
+FUNCTION Inc(n : INTEGER) : INTEGER;
+BEGIN
+    Inc := n + 1
+END;
+BEGIN
+    x := 10;
+    y := Inc(x)
+END.
+"""
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'program.pas'
+    path.write_text(PROGRAM_TEXT)
+    return str(path)
+
+def run(filename, cache):
+    """Helper compiling and running filename, returning the global variables."""
+    Interpreter.GLOBAL_SCOPE.clear()
+    Interpreter(None).run(compile_file(filename, ast_cache=cache))
+    return dict(Interpreter.GLOBAL_SCOPE)
+
+def test_second_run_loads_cache(source):
+    """The first run compiles and stores, the next one loads the same program."""
+    cache = ASTCache()
+    assert run(source, cache) == {'x': 10, 'y': 11}
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert os.path.exists(os.path.join(os.path.dirname(source), CACHE_DIRNAME, 'program.pas.pasc'))
+    assert run(source, cache) == {'x': 10, 'y': 11}
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_changed_source_recompiles(source):
+    """An entry whose source hash no longer matches is ignored and replaced."""
+    cache = ASTCache()
+    run(source, cache)
+    with open(source, 'w') as f:
+        f.write(PROGRAM_TEXT.replace('x := 10', 'x := 20'))
+    assert run(source, cache) == {'x': 20, 'y': 21}
+    assert cache.hits == 0
+    assert run(source, cache)['y'] == 21
+    assert cache.hits == 1
+
+def test_stale_version_recompiles(source):
+    """Entries written by another format version are not used."""
+    cache = ASTCache()
+    run(source, cache)
+    path = cache.path(source)
+    with open(path, 'rb') as f:
+        magic, versions, digest, payload = marshal.loads(f.read())
+    with open(path, 'wb') as f:
+        f.write(marshal.dumps((MAGIC, (0,) + tuple(versions[1:]), digest, payload)))
+    assert run(source, cache)['y'] == 11
+    assert cache.hits == 0
+
+def test_corrupt_entry_recompiles(source):
+    """A truncated or garbage entry behaves like a miss."""
+    cache = ASTCache()
+    run(source, cache)
+    with open(cache.path(source), 'wb') as f:
+        f.write(b'not a pasc file')
+    assert run(source, cache)['y'] == 11
+    assert run(source, cache)['y'] == 11
+    assert cache.hits == 1
+
+def test_shared_cache_directory(tmp_path, source):
+    """With a cache directory, entries go there and same-named sources do not collide."""
+    other_dir = tmp_path / 'other'
+    other_dir.mkdir()
+    other = other_dir / 'program.pas'
+    other.write_text(PROGRAM_TEXT.replace('x := 10', 'x := 5'))
+    cache = ASTCache(str(tmp_path / 'cache'))
+    assert run(source, cache)['y'] == 11
+    assert run(str(other), cache)['y'] == 6
+    assert len(os.listdir(tmp_path / 'cache')) == 2
+    assert not os.path.exists(os.path.join(os.path.dirname(source), CACHE_DIRNAME))
+
+def test_errors_are_not_cached(source):
+    """Programs failing semantic analysis leave no entry behind."""
+    with open(source, 'w') as f:
+        f.write("PROGRAM P; BEGIN x := 1 END.")
+    cache = ASTCache()
+    with pytest.raises(SemanticError):
+        compile_file(source, ast_cache=cache)
+    assert not os.path.exists(cache.path(source))
+
+def test_run_file_no_cache(source, capsys):
+    """run_file caches by default and writes nothing with use_cache=False."""
+    Interpreter.GLOBAL_SCOPE.clear()
+    assert run_file(source, use_cache=False) == 0
+    assert not os.path.exists(os.path.join(os.path.dirname(source), CACHE_DIRNAME))
+    for _ in range(2):
+        Interpreter.GLOBAL_SCOPE.clear()
+        assert run_file(source) == 0
+        assert Interpreter.GLOBAL_SCOPE['y'] == 11
+    assert os.path.exists(ASTCache().path(source))
+
+def test_warm_run_binds_like_cold_run(tmp_path):
+    """Nested functions of the same name resolve lexically in runs loaded from the cache."""
+    path = tmp_path / 'shadow.pas'
+    path.write_text("""PROGRAM Shadow;
+VAR r : INTEGER;
+FUNCTION A : INTEGER;
+    FUNCTION H : INTEGER; BEGIN H := 1 END;
+BEGIN A := H() END;
+FUNCTION B : INTEGER;
+    FUNCTION H : INTEGER; BEGIN H := 2 END;
+BEGIN B := H() + A() * 10 + H() * 100 END;
+BEGIN
+    r := B()
+END.
+""")
+    cache = ASTCache()
+    assert run(str(path), None)['r'] == 212
+    assert run(str(path), cache)['r'] == 212
+    assert run(str(path), cache)['r'] == 212
+    assert cache.hits == 1
@@ -0,0 +1,90 @@
+"""
+Tests for the AST node classes and their source spans.
+"""
+import io
+import pytest
+from src.lexer.lexer import Lexer
+from src.lexer.stream_lexer import StreamLexer
+from src.lexer.token_buffer import tokenize_all
+from src.parser import ast_nodes
+from src.parser.ast_nodes import AST, BinOp, Num, Var
+from src.parser.parser import Parser, StackParser
+from src.lexer.token import Token, PLUS, INTEGER_CONST
+
+PROGRAM_TEXT = """PROGRAM Spans;
+VAR
+    a, b : INTEGER;
+FUNCTION Twice(n : INTEGER) : INTEGER;
+BEGIN
+    Twice := n * 2
+END;
+BEGIN
+    a := (1 + 2) * Twice(3);
+    IF a > 1 AND NOT (b = 2) THEN b := -a END;
+    WHILE b < 10 DO b := b + 1;
+    FOR a := 1 TO 3 DO WRITELN(a, b)
+END.
+"""
+
+NODE_CLASSES = [cls for cls in vars(ast_nodes).values() if isinstance(cls, type) and cls is not AST]
+
+def walk(node):
+    """Helper yielding every node of a tree."""
+    if isinstance(node, list):
+        for item in node:
+            yield from walk(item)
+    elif isinstance(node, AST):
+        yield node
+        for _, value in node.fields():
+            yield from walk(value)
+
+def spans(tree, text):
+    """Helper returning (node type, spanned text) for every node."""
+    return [(type(node).__name__, text[node.start:node.end]) for node in walk(tree)]
+
+@pytest.mark.parametrize("cls", NODE_CLASSES, ids=lambda cls: cls.__name__)
+def test_nodes_are_slotted(cls):
+    """Every node class should derive from AST and have no instance __dict__."""
+    assert issubclass(cls, AST)
+    assert '__slots__' in vars(cls)
+    assert not hasattr(object.__new__(cls), '__dict__')
+
+def test_operator_token_alias():
+    """BinOp keeps exposing its operator as token."""
+    node = BinOp(Num(Token(INTEGER_CONST, 1)), Token(PLUS, '+'), Num(Token(INTEGER_CONST, 2)))
+    assert node.token is node.op
+    assert node.span is None
+
+def test_spans_cover_source_text():
+    """Node spans should cover exactly the source text each node was parsed from."""
+    found = spans(Parser(Lexer(PROGRAM_TEXT)).parse(), PROGRAM_TEXT)
+    assert found[0] == ('Program', PROGRAM_TEXT.rstrip())
+    for expected in [
+        ('VarDecl', 'a, b : INTEGER'),
+        ('FunctionDecl', 'FUNCTION Twice(n : INTEGER) : INTEGER;\nBEGIN\n    Twice := n * 2\nEND'),
+        ('Param', 'n : INTEGER'),
+        ('Assign', 'a := (1 + 2) * Twice(3)'),
+        ('BinOp', '(1 + 2) * Twice(3)'),
+        ('BinOp', '1 + 2'),
+        ('FunctionCall', 'Twice(3)'),
+        ('IfStatement', 'IF a > 1 AND NOT (b = 2) THEN b := -a END'),
+        ('BooleanOp', 'a > 1 AND NOT (b = 2)'),
+        ('UnaryBoolOp', 'NOT (b = 2)'),
+        ('ComparisonOp', 'b = 2'),
+        ('UnaryOp', '-a'),
+        ('WhileLoop', 'WHILE b < 10 DO b := b + 1'),
+        ('ForLoop', 'FOR a := 1 TO 3 DO WRITELN(a, b)'),
+        ('Print', 'WRITELN(a, b)'),
+        ('Type', 'INTEGER'),
+        ('Num', '3'),
+        ('Var', 'Twice'),
+    ]:
+        assert expected in found
+
+def test_spans_agree_across_token_sources():
+    """Lexers, the regex engine, token buffers, streams and StackParser should give the same spans."""
+    expected = spans(Parser(Lexer(PROGRAM_TEXT)).parse(), PROGRAM_TEXT)
+    stream = StreamLexer(io.BytesIO(PROGRAM_TEXT.encode()), chunk_size=7)
+    for tree in (Parser(Lexer(PROGRAM_TEXT, use_regex=True)).parse(), Parser(tokenize_all(PROGRAM_TEXT)).parse(),
+                 Parser(stream).parse(), StackParser(Lexer(PROGRAM_TEXT)).parse()):
+        assert spans(tree, PROGRAM_TEXT) == expected
@@ -0,0 +1,80 @@
+"""
+Tests for the parallel batch compiler.
+"""
+import pytest
+from src.batch_compiler import compile_batch, compile_one, BatchStats, STAGES
+from src.lexer.token_buffer import tokenize_all
+from src.parser.parser import Parser
+from src.parser.flat_ast import FlatAST
+from src.interpreter.interpreter import Interpreter
+from benchmarks.programs import generate_program
+
+GOOD = "PROGRAM Good{n}; VAR x : INTEGER; BEGIN x := {n} * 2 END."
+SOURCES = {
+    'syntax.pas': ("PROGRAM Bad; BEGIN\n  x := (1 + END.", ('ParserError', 2, 13)),
+    'semantic.pas': ("PROGRAM Bad; BEGIN x := 1 END.", ('SemanticError', None, None)),
+    'lexer.pas': ("PROGRAM Bad;\nBEGIN @ END.", ('LexerError', 2, 7)),
+}
+
+@pytest.fixture
+def files(tmp_path):
+    """Helper writing five good programs and one of each kind of error."""
+    names = {}
+    for n in range(5):
+        path = tmp_path / f'good{n}.pas'
+        path.write_text(GOOD.format(n=n))
+        names[str(path)] = None
+    for name, (text, expected) in SOURCES.items():
+        path = tmp_path / name
+        path.write_text(text)
+        names[str(path)] = expected
+    return names
+
+def check(results, files):
+    """Helper checking one result per file, with the expected AST or error."""
+    assert sorted(result.filename for result in results) == sorted(files)
+    for result in results:
+        expected = files[result.filename]
+        if expected is None:
+            assert result.error is None and set(result.timings) == set(STAGES)
+            Interpreter.GLOBAL_SCOPE.clear()
+            Interpreter(None).run(FlatAST.loads(result.ast))
+            n = int(result.filename[-5])
+            assert Interpreter.GLOBAL_SCOPE == {'x': n * 2}
+        else:
+            assert result.ast is None
+            assert (result.error.kind, result.error.line, result.error.column) == expected
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_batch_results(files, workers):
+    """Every file yields its serialized AST or its error with position."""
+    check(list(compile_batch(files, workers=workers)), files)
+
+def test_results_stream(files):
+    """compile_batch is a generator: results are available before the batch ends."""
+    results = compile_batch(files, workers=2)
+    first = next(results)
+    assert first.filename in files
+    results.close()
+
+def test_stats(files):
+    """BatchStats counts programs and failures and sums stage timings."""
+    stats = BatchStats()
+    results = list(compile_batch(files, workers=2, stats=stats))
+    assert (stats.programs, stats.failures) == (len(files), len(SOURCES))
+    assert stats.wall_seconds > 0 and stats.throughput > 0
+    assert stats.stage_seconds['parse'] == pytest.approx(sum(result.timings.get('parse', 0) for result in results))
+    assert 'programs/s' in stats.summary()
+
+def test_missing_file(tmp_path):
+    """Unreadable files are reported as errors without a position."""
+    result = compile_one(str(tmp_path / 'missing.pas'))
+    assert result.error.kind == 'FileNotFoundError' and result.error.line is None
+
+def test_ast_matches_direct_parse(tmp_path):
+    """The serialized AST is the tree the parser builds for the file."""
+    text = generate_program(20)
+    path = tmp_path / 'program.pas'
+    path.write_text(text)
+    tree = FlatAST.loads(compile_one(str(path)).ast)
+    assert tree.dumps() == Parser(tokenize_all(text), flat=True).parse().dumps()
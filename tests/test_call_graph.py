@@ -0,0 +1,141 @@
+"""
+Tests for the call graph, recursion detection and purity analysis.
+"""
+from src.lexer.lexer import Lexer
+from src.lexer.token_buffer import tokenize_all
+from src.parser.parser import Parser
+from src.semantic.semantic_analyzer import SemanticAnalyzer
+from src.semantic.call_graph import build_call_graph
+
+NESTED_TEXT = """PROGRAM Calls;
+VAR n : INTEGER;
+FUNCTION Log(x : INTEGER) : INTEGER;
+BEGIN
+    WRITELN(x);
+    Log := x
+END;
+FUNCTION IsEven(x : INTEGER) : INTEGER;
+    FUNCTION IsOdd(y : INTEGER) : INTEGER;
+    BEGIN
+        IF y = 0 THEN IsOdd := 0 ELSE IsOdd := IsEven(y - 1) END
+    END;
+BEGIN
+    IF x = 0 THEN IsEven := 1 ELSE IsEven := IsOdd(x - 1) END
+END;
+FUNCTION Traced(x : INTEGER) : INTEGER;
+    FUNCTION Step(y : INTEGER) : INTEGER;
+    BEGIN
+        IF y > 0 THEN Step := Traced(y - 1) + Log(y) ELSE Step := 0 END
+    END;
+BEGIN
+    Traced := Step(x)
+END;
+BEGIN
+    n := IsEven(4) + Traced(2)
+END.
+"""
+
+def graph_of(text, **parser_options):
+    """Helper parsing and analyzing text; returns (graph, name -> FunctionDecl)."""
+    source = tokenize_all(text) if parser_options else Lexer(text)
+    tree = Parser(source, **parser_options).parse()
+    SemanticAnalyzer().visit(tree)
+    graph = build_call_graph(tree)
+    return graph, {func.func_name: func for func in graph.functions}
+
+def names(funcs):
+    """Helper returning the names of FunctionDecls."""
+    return sorted(func.func_name for func in funcs)
+
+def function(body, declarations=""):
+    """Helper wrapping a body in FUNCTION F of a program with a global g."""
+    return f"""PROGRAM P; VAR g : INTEGER;
+    FUNCTION F(x : INTEGER) : INTEGER; {declarations} BEGIN {body} END;
+    BEGIN g := F(1) END."""
+
+def test_example_functions_are_pure():
+    """Fact and Fib only use their parameters and locals; Fact is recursive, Fib is not."""
+    with open('example.txt') as f:
+        graph, funcs = graph_of(f.read())
+    assert names(graph.pure_functions()) == ['Fact', 'Fib']
+    assert graph.is_recursive(funcs['Fact'])
+    assert not graph.is_recursive(funcs['Fib'])
+    assert graph.callees(funcs['Fact']) == [funcs['Fact']]
+    assert names(graph.callees(graph.program)) == ['Fact', 'Fib']
+
+def test_mutual_recursion_forms_one_component():
+    """A nested function calling its enclosing one puts both in a strongly connected component."""
+    graph, funcs = graph_of(NESTED_TEXT)
+    assert names(graph.component(funcs['IsEven'])) == ['IsEven', 'IsOdd']
+    assert graph.is_recursive(funcs['IsOdd'])
+    assert not graph.is_recursive(funcs['Log'])
+    assert graph.callers(funcs['IsEven']) == [graph.program, funcs['IsOdd']]
+
+def test_components_come_callees_first():
+    """Every component only calls functions of itself or of earlier components."""
+    graph, funcs = graph_of(NESTED_TEXT)
+    seen = set()
+    for component in graph.sccs():
+        seen.update(component)
+        for func in component:
+            assert all(callee in seen for callee in graph.callees(func))
+    assert len(seen) == len(graph.functions)
+
+def test_print_makes_impure():
+    graph, funcs = graph_of(function("WRITELN(x); F := x"))
+    assert graph.reason(funcs['F']) == 'prints'
+
+def test_global_write_makes_impure():
+    graph, funcs = graph_of(function("g := x; F := x"))
+    assert graph.reason(funcs['F']) == "assigns 'g' outside its frame"
+
+def test_global_read_makes_impure():
+    """A function reading a global does not depend on its arguments only."""
+    graph, funcs = graph_of(function("F := x + g"))
+    assert graph.reason(funcs['F']) == "reads 'g' outside its frame"
+
+def test_global_loop_variable_makes_impure():
+    graph, funcs = graph_of(function("FOR g := 1 TO x DO F := x"))
+    assert not graph.is_pure(funcs['F'])
+
+def test_locals_and_shadowing_are_pure():
+    """Locals, loops over locals and a local shadowing the global g keep a function pure."""
+    body = "g := 0; FOR i := 1 TO x DO g := g + i; F := g"
+    graph, funcs = graph_of(function(body, "VAR g, i : INTEGER;"))
+    assert graph.is_pure(funcs['F'])
+
+def test_enclosing_variable_makes_nested_impure():
+    """A nested function using a variable of its enclosing function is impure, and so is the caller."""
+    text = """PROGRAM P; VAR g : INTEGER;
+    FUNCTION Outer(x : INTEGER) : INTEGER;
+        FUNCTION Inner(y : INTEGER) : INTEGER;
+        BEGIN Inner := x + y END;
+    BEGIN Outer := Inner(1) END;
+    BEGIN g := Outer(1) END."""
+    graph, funcs = graph_of(text)
+    assert graph.reason(funcs['Inner']) == "reads 'x' outside its frame"
+    assert graph.reason(funcs['Outer']) == "calls impure 'Inner'"
+
+def test_impurity_propagates_through_calls():
+    """Calling an impure function makes every function of the calling component impure."""
+    graph, funcs = graph_of(NESTED_TEXT)
+    assert names(graph.pure_functions()) == ['IsEven', 'IsOdd']
+    assert graph.reason(funcs['Traced']) == "calls impure 'Log'"
+    assert graph.reason(funcs['Step']) == "calls impure 'Log'"
+
+def test_unparsed_bodies_are_impure():
+    """Lazily parsed bodies that were never called are not classified as pure."""
+    text = """PROGRAM P; VAR g : INTEGER;
+    FUNCTION Used(x : INTEGER) : INTEGER; BEGIN Used := x END;
+    FUNCTION Unused(x : INTEGER) : INTEGER; BEGIN Unused := x END;
+    BEGIN g := Used(1) END."""
+    graph, funcs = graph_of(text, lazy=True)
+    assert graph.is_pure(funcs['Used'])
+    assert graph.reason(funcs['Unused']) == 'body not parsed'
+
+def test_flat_tree():
+    """Flat trees give the same graph through their node views."""
+    with open('example.txt') as f:
+        graph, funcs = graph_of(f.read(), flat=True)
+    assert names(graph.pure_functions()) == ['Fact', 'Fib']
+    assert graph.is_recursive(funcs['Fact'])
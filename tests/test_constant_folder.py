@@ -0,0 +1,137 @@
+"""
+Tests for constant folding.
+"""
+import pytest
+from src.lexer.lexer import Lexer
+from src.parser.parser import Parser
+from src.parser.ast_nodes import Assign, BinOp, Num, Var, NoOp, IfStatement
+from src.semantic.semantic_analyzer import SemanticAnalyzer
+from src.semantic.type_checker import check_types
+from src.optimizer.constant_folder import fold_constants
+from src.interpreter.interpreter import Interpreter
+from src.errors import RuntimeError
+from benchmarks.programs import generate_program, expression_heavy
+
+def statements(body, declarations="VAR x, y : INTEGER; r : REAL;", checked=False):
+    """Helper returning the folded statements of a program body, type checked first if checked."""
+    text = f"PROGRAM P; {declarations} BEGIN {body} END."
+    tree = Parser(Lexer(text)).parse()
+    if checked:
+        SemanticAnalyzer().visit(tree)
+        check_types(tree)
+    return fold_constants(tree).block.compound_statement.children
+
+def value_of(body, checked=False):
+    """Helper returning the folded right-hand side of a single assignment."""
+    node = statements(body, checked=checked)[0].right
+    return node.value if isinstance(node, Num) else node
+
+def run(text, optimize):
+    """Helper interpreting text and returning the global variables."""
+    Interpreter.GLOBAL_SCOPE.clear()
+    Interpreter(Parser(Lexer(text)), optimize=optimize).interpret()
+    return dict(Interpreter.GLOBAL_SCOPE)
+
+def test_arithmetic_folds():
+    """Constant arithmetic subtrees become Num nodes."""
+    assert value_of("x := 2 * 3 + 4") == 10
+    assert value_of("x := -(7 DIV 2)") == -3
+    assert value_of("r := 1 / 4") == 0.25
+    assert value_of("x := 2 * (3 + 4) - -1") == 15
+
+def test_partial_folding():
+    """Constant operands of an expression with variables are still folded."""
+    node = value_of("x := y + 2 * 3")
+    assert isinstance(node, BinOp) and isinstance(node.left, Var) and node.right.value == 6
+
+@pytest.mark.parametrize("body", ["x := y + 0", "x := y - 0", "x := y * 1", "x := 0 + y", "x := 1 * y", "x := (y * 1) + 0"])
+def test_identities_removed(body):
+    """x + 0, x - 0, x * 1, 0 + x and 1 * x are just x for an INTEGER x."""
+    node = value_of(body, checked=True)
+    assert isinstance(node, Var) and node.value == 'y'
+
+@pytest.mark.parametrize("body", ["r := y + 0.0", "r := y * 1.0", "r := y / 1", "x := y DIV 1", "x := 0 - y"])
+def test_type_changing_operations_kept(body):
+    """Operations that may change the value's type or sign are not identities."""
+    assert isinstance(value_of(body, checked=True), BinOp)
+
+@pytest.mark.parametrize("body", ["r := r + 0", "r := r - 0", "r := 0 + r", "x := y + 0"])
+def test_additive_zero_needs_integer(body):
+    """x + 0 is only x for a known INTEGER x: REAL and untyped operands are kept."""
+    assert isinstance(value_of(body, checked=body.startswith("r")), BinOp)
+
+def test_negative_zero_kept(capsys):
+    """-0.0 + 0 is 0.0, so a REAL plus zero prints the same with and without folding."""
+    text = "PROGRAM P; VAR a : REAL; BEGIN a := -0.0; WRITELN(a + 0, a - 0, 0 + a, a * 1) END."
+    run(text, optimize=False)
+    printed = capsys.readouterr().out
+    run(text, optimize=True)
+    assert capsys.readouterr().out == printed
+
+def test_division_by_constant_zero_kept():
+    """Division by a constant zero is not folded and still fails when executed."""
+    assert isinstance(value_of("x := 1 DIV 0"), BinOp)
+    with pytest.raises(RuntimeError, match="Division by zero"):
+        run("PROGRAM P; VAR x : INTEGER; BEGIN x := 1 DIV (2 - 2) END.", optimize=True)
+
+def test_unreached_division_by_zero():
+    """A pruned branch dividing by zero never raises, as before folding."""
+    text = "PROGRAM P; VAR x : INTEGER; BEGIN x := 1; IF 1 > 2 THEN x := 1 DIV 0 END END."
+    assert run(text, optimize=True) == run(text, optimize=False) == {'x': 1}
+
+def test_boolean_folds():
+    """Constant comparisons, AND/OR and NOT fold to their values."""
+    condition = lambda text: statements(f"IF {text} THEN x := 1 ELSE x := 2 END")[0]
+    assert condition("1 < 2").right.value == 1
+    assert condition("NOT (1 < 2)").right.value == 2
+    assert condition("1 < 2 AND 2 < 1").right.value == 2
+    assert condition("1 > 2 OR 3 = 3").right.value == 1
+
+def test_boolean_short_circuit_with_variables():
+    """A constant left operand decides AND/OR; the variable side is kept when it matters."""
+    [node] = statements("IF 1 < 2 AND y > 0 THEN x := 1 END")
+    assert isinstance(node, IfStatement) and node.condition.left.value == 'y'
+    [node] = statements("IF 1 > 2 AND y > 0 THEN x := 1 END")
+    assert isinstance(node, NoOp)
+
+def test_if_branches_pruned():
+    """IF statements with constant conditions keep only the branch that runs."""
+    then_branch, else_branch, no_branch = statements(
+        "IF 1 = 1 THEN x := 1 ELSE x := 2 END; IF 1 = 2 THEN x := 1 ELSE x := 2 END; IF 1 = 2 THEN x := 1 END")
+    assert isinstance(then_branch, Assign) and then_branch.right.value == 1
+    assert isinstance(else_branch, Assign) and else_branch.right.value == 2
+    assert isinstance(no_branch, NoOp)
+
+def test_folded_nodes_keep_spans():
+    """A folded node covers the text of the expression it replaced."""
+    text = "PROGRAM P; VAR x : INTEGER; BEGIN x := 2 * 3 + 4 END."
+    node = fold_constants(Parser(Lexer(text)).parse()).block.compound_statement.children[0].right
+    assert text[node.start:node.end] == "2 * 3 + 4"
+
+def test_function_bodies_folded():
+    """Folding reaches into function declarations."""
+    text = "PROGRAM P; VAR x : INTEGER; FUNCTION F(a : INTEGER) : INTEGER; BEGIN F := a * (2 + 3) END; BEGIN x := F(2) END."
+    tree = fold_constants(Parser(Lexer(text)).parse())
+    assert tree.block.declarations[1].block_node.compound_statement.children[0].right.right.value == 5
+    assert run(text, optimize=True) == {'x': 10}
+
+PROGRAMS = [
+    generate_program(40),
+    expression_heavy(2048),
+    """PROGRAM P; VAR x, y : INTEGER; r : REAL;
+    BEGIN
+        y := 3; x := 0;
+        WHILE x < 2 * 5 DO x := x + 1 * 1;
+        r := (y + 0) / 2 + 0;
+        IF NOT (1 = 1) OR y > 2 THEN y := y * (4 - 3) ELSE y := 0 END;
+        FOR x := 10 - 9 TO 2 + 1 DO r := r + x * 0.5
+    END.""",
+]
+
+@pytest.mark.parametrize("text", PROGRAMS, ids=["generated", "expressions", "mixed"])
+def test_folding_preserves_results(text, capsys):
+    """Programs compute the same values and output with and without folding."""
+    expected = run(text, optimize=False)
+    printed = capsys.readouterr().out
+    assert run(text, optimize=True) == expected
+    assert capsys.readouterr().out == printed
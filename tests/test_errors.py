@@ -123,4 +123,27 @@ def test_error_with_line_numbers():
         interpreter = Interpreter(parser)
         interpreter.interpret()
     error_msg = str(exc_info.value)
-    assert "line" in error_msg.lower() or "undeclared" in error_msg.lower()
\ No newline at end of file
+    assert "line" in error_msg.lower() or "undeclared" in error_msg.lower()
+
+
+def test_parser_error_reports_token_position():
+    """Test that parser errors point at the unexpected token."""
+    text = "PROGRAM Test;\nVAR x : INTEGER;\nBEGIN\n    x := 5\n    x := 6\nEND."
+    lexer = Lexer(text)
+    parser = Parser(lexer)
+    with pytest.raises(ParserError) as exc_info:
+        parser.parse()
+    assert (exc_info.value.line, exc_info.value.column) == (5, 5)
+    assert "line 5, column 5" in str(exc_info.value)
+
+
+def test_parser_error_position_from_token_buffer():
+    """Test that parsing a token buffer reports the same position."""
+    from src.lexer.token_buffer import tokenize_all
+    text = "PROGRAM Test;\nBEGIN\n  x := (1 + 2\nEND."
+    with pytest.raises(ParserError) as from_lexer:
+        Parser(Lexer(text)).parse()
+    with pytest.raises(ParserError) as from_buffer:
+        Parser(tokenize_all(text)).parse()
+    assert str(from_buffer.value) == str(from_lexer.value)
+    assert from_lexer.value.line == 4
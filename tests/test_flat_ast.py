@@ -0,0 +1,89 @@
+"""
+Tests for the flat, array-backed AST.
+"""
+import pytest
+from src.lexer.lexer import Lexer
+from src.lexer.token_buffer import tokenize_all
+from src.parser.ast_nodes import AST
+from src.parser.flat_ast import FlatAST, FlatNode, NODE_KINDS
+from src.parser.parser import Parser, StackParser
+from src.interpreter.interpreter import Interpreter
+from src.errors import SemanticError
+from benchmarks.programs import generate_program, expression_heavy
+
+PROGRAM_TEXT = """PROGRAM Flat;
+VAR
+    a, b : INTEGER;
+    r : REAL;
+FUNCTION Twice(n : INTEGER) : INTEGER;
+BEGIN
+    Twice := n * 2
+END;
+BEGIN
+    a := (1 + 2) * Twice(3);
+    r := a / 4;
+    b := 2;
+    IF a > 1 AND NOT (b = 2) THEN b := -a ELSE b := 0 END;
+    WHILE b < 10 DO b := b + 1;
+    FOR a := 3 DOWNTO 1 DO BEGIN PRINT(a); END
+END.
+"""
+
+def dump(node):
+    """Helper turning an object or flat tree into nested tuples for comparison."""
+    if isinstance(node, list):
+        return [dump(item) for item in node]
+    if isinstance(node, (AST, FlatNode)):
+        return (type(node).__name__, node.span, {name: dump(value) for name, value in node.fields()})
+    return node
+
+def run(text, flat):
+    """Helper interpreting text and returning the global variables."""
+    Interpreter.GLOBAL_SCOPE.clear()
+    Interpreter(Parser(tokenize_all(text), flat=flat)).interpret()
+    return dict(Interpreter.GLOBAL_SCOPE)
+
+@pytest.mark.parametrize("text", [PROGRAM_TEXT, generate_program(30), expression_heavy(2048)],
+                         ids=["program", "generated", "expressions"])
+@pytest.mark.parametrize("parser_class", [Parser, StackParser])
+def test_views_match_object_tree(parser_class, text):
+    """Views of a flat tree should show the same nodes, fields and spans as the object tree."""
+    tree = parser_class(Lexer(text), flat=True).parse()
+    assert isinstance(tree, FlatAST)
+    assert dump(tree.tree) == dump(parser_class(Lexer(text)).parse())
+
+def test_nodes_stored_in_arrays():
+    """Nodes live in parallel arrays with children before their parents."""
+    tree = Parser(tokenize_all(PROGRAM_TEXT), flat=True).parse()
+    assert len(tree.kinds) == len(tree.starts) == len(tree.ends) == len(tree.offsets) - 1 == len(tree)
+    assert NODE_KINDS[tree.kinds[tree.root]] == 'Program'
+    assert tree.root == len(tree) - 1
+    for index in range(len(tree)):
+        for name, value in tree.node(index).fields():
+            for child in value if isinstance(value, list) else [value]:
+                if isinstance(child, FlatNode):
+                    assert child.index < index, name
+
+def test_interpreter_runs_flat_tree(capsys):
+    """SemanticAnalyzer and Interpreter should walk a flat tree like an object tree."""
+    expected = run(PROGRAM_TEXT, flat=False)
+    printed = capsys.readouterr().out
+    assert run(PROGRAM_TEXT, flat=True) == expected == {'a': 0, 'b': 10, 'r': 4.5}
+    assert capsys.readouterr().out == printed
+
+def test_semantic_errors_on_flat_tree():
+    """Semantic errors should still be reported for flat trees."""
+    with pytest.raises(SemanticError):
+        run("PROGRAM P; BEGIN x := 1 END.", flat=True)
+
+def test_serialization_round_trip():
+    """dumps/loads should restore an identical tree."""
+    tree = Parser(tokenize_all(PROGRAM_TEXT), flat=True).parse()
+    restored = FlatAST.loads(tree.dumps())
+    assert dump(restored.tree) == dump(tree.tree)
+    assert restored.constants == tree.constants
+
+def test_to_nodes_rebuilds_object_tree():
+    """to_nodes should rebuild exactly the object tree the parser builds."""
+    tree = Parser(tokenize_all(PROGRAM_TEXT), flat=True).parse()
+    assert dump(tree.to_nodes()) == dump(Parser(tokenize_all(PROGRAM_TEXT)).parse())
@@ -0,0 +1,102 @@
+"""
+Tests for hash-consing of pure expression subtrees.
+"""
+import pytest
+from src.lexer.lexer import Lexer
+from src.lexer.token_buffer import tokenize_all
+from src.parser.parser import Parser, DeferredBlock
+from src.parser.ast_nodes import FunctionCall
+from src.optimizer.hash_consing import SubtreeSharer, share_subtrees
+from src.interpreter.interpreter import Interpreter
+from benchmarks.programs import generate_program, expression_heavy, function_library
+
+PROGRAM_TEXT = """PROGRAM Share;
+VAR a, b, x, y, z : INTEGER; r : REAL;
+FUNCTION Next(n : INTEGER) : INTEGER;
+VAR a : INTEGER;
+BEGIN
+    a := n;
+    Next := a + 1
+END;
+BEGIN
+    a := 2; b := 3;
+    x := a * b + 1;
+    y := a * b + 1;
+    z := Next(a) + Next(a);
+    r := 1.0 + 1;
+    IF a + 1 > b THEN x := a + 1 END
+END.
+"""
+
+def statements(tree):
+    """Helper returning the statements of the main block."""
+    return tree.block.compound_statement.children
+
+def functions(tree):
+    """Helper returning the function declarations of a program."""
+    return [node for node in tree.block.declarations if type(node).__name__ == 'FunctionDecl']
+
+def run(text, share, lazy=False):
+    """Helper interpreting text and returning the global variables."""
+    Interpreter.GLOBAL_SCOPE.clear()
+    Interpreter(Parser(tokenize_all(text), lazy=lazy), share=share).interpret()
+    return dict(Interpreter.GLOBAL_SCOPE)
+
+def test_identical_expressions_are_shared():
+    """Structurally identical pure expressions become one node."""
+    tree = share_subtrees(Parser(Lexer(PROGRAM_TEXT)).parse())
+    _, _, x, y, _, _, if_node = statements(tree)
+    assert x.right is y.right
+    assert if_node.condition.left is if_node.then_branch.right
+    assert x.left is not y.left #assignment targets are never shared as whole statements
+
+def test_calls_are_not_shared():
+    """Function calls, and expressions containing them, keep their own nodes."""
+    tree = share_subtrees(Parser(Lexer(PROGRAM_TEXT)).parse())
+    z = statements(tree)[4].right
+    assert isinstance(z.left, FunctionCall) and z.left is not z.right
+    assert z.left.actual_params[0] is z.right.actual_params[0]
+    tree = share_subtrees(Parser(Lexer("PROGRAM P; VAR x : INTEGER; BEGIN x := Next(1) + 1; x := Next(2) + 1 END.")).parse())
+    first, second = statements(tree)
+    assert first.right is not second.right and first.right.right is second.right.right
+
+def test_constants_keep_their_types():
+    """1.0 and 1 are equal in Python but are not the same constant."""
+    tree = share_subtrees(Parser(Lexer(PROGRAM_TEXT)).parse())
+    r = statements(tree)[5].right
+    assert r.left is not r.right
+    assert type(r.left.value) is float and type(r.right.value) is int
+
+def test_signed_zeros_kept_apart(capsys):
+    """0.0 and -0.0 are equal in Python but print differently."""
+    run("PROGRAM P; BEGIN WRITELN(-0.0, 0.0, 0.0 * -1) END.", share=True)
+    assert capsys.readouterr().out == "-0.0 0.0 -0.0\n"
+
+def test_tables_are_per_routine():
+    """Expressions in a function body are not shared with the main program."""
+    tree = share_subtrees(Parser(Lexer(PROGRAM_TEXT)).parse())
+    body = functions(tree)[0].block_node.compound_statement.children
+    assert body[1].right is not statements(tree)[6].then_branch.right
+
+def test_shared_count():
+    """The sharer counts the nodes it replaced."""
+    sharer = SubtreeSharer()
+    sharer.visit(Parser(Lexer("PROGRAM P; VAR x : INTEGER; BEGIN x := x + 1; x := x + 1 END.")).parse())
+    assert sharer.shared == 6 #every x after the declaration, the second 1 and the second x + 1
+
+@pytest.mark.parametrize("text", [PROGRAM_TEXT, generate_program(30), expression_heavy(4096)],
+                         ids=['program', 'mixed', 'expressions'])
+def test_results_unchanged(text, capsys):
+    """Sharing does not change what a program computes or prints."""
+    expected = run(text, share=False)
+    printed = capsys.readouterr().out
+    assert run(text, share=True) == expected
+    assert capsys.readouterr().out == printed
+
+def test_lazy_bodies_are_shared():
+    """Deferred bodies are shared when they are parsed."""
+    text = function_library(20, 4, 5)
+    assert run(text, share=True, lazy=True) == run(text, share=False)
+    tree = share_subtrees(Parser(tokenize_all(PROGRAM_TEXT), lazy=True).parse())
+    block = functions(tree)[0].block_node
+    assert isinstance(block, DeferredBlock) and block.passes
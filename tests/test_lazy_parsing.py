@@ -0,0 +1,152 @@
+"""
+Tests for lazy parsing of function bodies.
+"""
+import pytest
+from src.lexer.lexer import Lexer
+from src.lexer.token_buffer import tokenize_all
+from src.parser.ast_nodes import AST, Block
+from src.parser.parser import Parser, StackParser, DeferredBlock
+from src.semantic.semantic_analyzer import SemanticAnalyzer
+from src.interpreter.interpreter import Interpreter
+from src.errors import ParserError, SemanticError
+from benchmarks.programs import function_library
+
+PROGRAM_TEXT = """PROGRAM Lazy;
+VAR x, y : INTEGER;
+FUNCTION Outer(n : INTEGER) : INTEGER;
+VAR t : INTEGER;
+FUNCTION Inner(m : INTEGER) : INTEGER;
+BEGIN
+    IF m > 0 THEN Inner := m * 2 ELSE BEGIN Inner := 0 END END
+END;
+BEGIN
+    t := Inner(n);
+    BEGIN t := t + 1 END;
+    Outer := t
+END;
+FUNCTION Unused(n : INTEGER) : INTEGER;
+BEGIN
+    Unused := n
+END;
+BEGIN
+    x := Outer(3);
+    y := Outer(x)
+END.
+"""
+
+def dump(node):
+    """Helper turning a tree into nested tuples, parsing deferred bodies first."""
+    if isinstance(node, list):
+        return [dump(item) for item in node]
+    if isinstance(node, DeferredBlock):
+        return dump(node.resolve())
+    if isinstance(node, AST):
+        return (type(node).__name__, node.span, {name: dump(value) for name, value in node.fields()})
+    return node
+
+def functions(tree):
+    """Helper returning the function declarations of a program."""
+    return [node for node in tree.block.declarations if type(node).__name__ == 'FunctionDecl']
+
+def run(text, lazy):
+    """Helper interpreting text and returning the global variables."""
+    Interpreter.GLOBAL_SCOPE.clear()
+    Interpreter(Parser(tokenize_all(text), lazy=lazy)).interpret()
+    return dict(Interpreter.GLOBAL_SCOPE)
+
+def test_bodies_are_deferred():
+    """A lazy parse leaves every function body as a DeferredBlock."""
+    tree = Parser(tokenize_all(PROGRAM_TEXT), lazy=True).parse()
+    outer, unused = functions(tree)
+    assert isinstance(outer.block_node, DeferredBlock)
+    assert isinstance(unused.block_node, DeferredBlock)
+    assert PROGRAM_TEXT[outer.block_node.start:outer.block_node.end].startswith("VAR t : INTEGER;")
+    assert PROGRAM_TEXT[outer.block_node.start:outer.block_node.end].endswith("Outer := t\nEND")
+
+@pytest.mark.parametrize("parser_class", [Parser, StackParser])
+def test_resolved_tree_matches_eager_tree(parser_class):
+    """Once resolved, deferred bodies are exactly the blocks an eager parse builds."""
+    lazy_tree = parser_class(tokenize_all(PROGRAM_TEXT), lazy=True).parse()
+    assert dump(lazy_tree) == dump(parser_class(tokenize_all(PROGRAM_TEXT)).parse())
+    assert all(isinstance(node.block_node, Block) for node in functions(lazy_tree))
+
+def test_only_called_functions_are_parsed():
+    """Running a program parses the bodies of the functions it calls and no others."""
+    tree = Parser(tokenize_all(PROGRAM_TEXT), lazy=True).parse()
+    Interpreter.GLOBAL_SCOPE.clear()
+    SemanticAnalyzer().visit(tree)
+    Interpreter(None).run(tree)
+    outer, unused = functions(tree)
+    assert isinstance(outer.block_node, Block)
+    assert isinstance(unused.block_node, DeferredBlock)
+    assert Interpreter.GLOBAL_SCOPE == {'x': 7, 'y': 15}
+
+def test_results_match_eager(capsys):
+    """Lazy and eager parsing run programs identically."""
+    text = function_library(20, 4, 5)
+    expected = run(text, lazy=False)
+    printed = capsys.readouterr().out
+    assert run(text, lazy=True) == expected
+    assert capsys.readouterr().out == printed
+
+def test_syntax_error_in_called_function():
+    """A syntax error in a body is reported, with its position, when the function is first used."""
+    text = PROGRAM_TEXT.replace("Outer := t", "Outer := t +")
+    with pytest.raises(ParserError) as eager:
+        Parser(tokenize_all(text)).parse()
+    tree = Parser(tokenize_all(text), lazy=True).parse()
+    with pytest.raises(ParserError) as lazy:
+        functions(tree)[0].block_node.resolve()
+    assert str(lazy.value) == str(eager.value)
+
+def test_errors_in_unused_functions_are_deferred():
+    """Bodies of functions that are never called are not parsed or analyzed."""
+    text = PROGRAM_TEXT.replace("Unused := n", "Unused := undeclared + ")
+    with pytest.raises(ParserError):
+        run(text, lazy=False)
+    assert run(text, lazy=True) == {'x': 7, 'y': 15}
+
+def test_semantic_error_in_called_function():
+    """Semantic errors in a called body are still reported before the program runs."""
+    text = PROGRAM_TEXT.replace("Outer := t", "Outer := missing")
+    with pytest.raises(SemanticError, match="missing"):
+        run(text, lazy=True)
+    assert Interpreter.GLOBAL_SCOPE == {}
+
+@pytest.mark.parametrize("text", [
+    """PROGRAM P; VAR x : INTEGER;
+    FUNCTION A : INTEGER; BEGIN A := B() END;
+    FUNCTION B : INTEGER; BEGIN B := 7 END;
+    BEGIN x := A() END.""",
+    """PROGRAM P; VAR x : INTEGER;
+    FUNCTION A(n : INTEGER) : INTEGER;
+        FUNCTION C : INTEGER; BEGIN C := n + D() END;
+        FUNCTION D : INTEGER; BEGIN D := 1 END;
+    BEGIN A := C() END;
+    BEGIN x := A(2) END.""",
+])
+@pytest.mark.parametrize("lazy", [False, True])
+def test_forward_references_rejected(text, lazy):
+    """A called body sees only what was declared before its function, lazy or not."""
+    with pytest.raises(SemanticError, match="Undefined function"):
+        run(text, lazy)
+
+def test_earlier_siblings_visible():
+    """Functions declared before a lazily analyzed body, and the function itself, stay callable."""
+    text = """PROGRAM P; VAR x : INTEGER;
+    FUNCTION B(n : INTEGER) : INTEGER; BEGIN IF n > 0 THEN B := B(n - 1) + 1 ELSE B := 0 END END;
+    FUNCTION A : INTEGER; BEGIN A := B(3) END;
+    FUNCTION Later : INTEGER; BEGIN Later := A() END;
+    BEGIN x := Later() END."""
+    assert run(text, lazy=True) == run(text, lazy=False) == {'x': 3}
+
+def test_unbalanced_body_reported_eagerly():
+    """A body whose end cannot be found is parsed immediately so the error is reported."""
+    text = "PROGRAM P; FUNCTION F : INTEGER; BEGIN F := 1; BEGIN F := 2 END. "
+    with pytest.raises(ParserError):
+        Parser(tokenize_all(text), lazy=True).parse()
+
+def test_lexer_source_parses_eagerly():
+    """Lazy mode needs random access to tokens; a Lexer source is parsed normally."""
+    tree = Parser(Lexer(PROGRAM_TEXT), lazy=True).parse()
+    assert all(isinstance(node.block_node, Block) for node in functions(tree))
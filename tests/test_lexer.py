@@ -0,0 +1,153 @@
+"""
+Tests for the lexer engines.
+"""
+import pytest
+from src.lexer.lexer import Lexer
+from src.lexer.token import (ID, INTEGER_CONST, REAL_CONST, ASSIGN, BEGIN, END, INTEGER_DIV, LESS_EQUAL, NOT_EQUAL, EOF)
+from src.errors import LexerError
+
+PROGRAM_TEXT = """
+PROGRAM Test;
+VAR
+    x, y : INTEGER;
+    r : REAL;
+{ a comment
+  spanning lines }
+BEGIN
+    x := 10 // 3;
+    y := x DIV 2;
+    r := 3.14 / 2;
+    IF (x <= y) AND (x <> 1) THEN WRITELN(x) END
+END.
+"""
+
+def tokenize(text, use_regex=False):
+    """Helper returning (type, value, line, column) for every token."""
+    lexer = Lexer(text, use_regex=use_regex)
+    tokens = []
+    while True:
+        token = lexer.get_next_token()
+        tokens.append((token.type, token.value, lexer.line, lexer.column))
+        if token.type == EOF:
+            return tokens
+
+def lexer_error(text, use_regex=False):
+    """Helper returning the LexerError raised while tokenizing text."""
+    lexer = Lexer(text, use_regex=use_regex)
+    with pytest.raises(LexerError) as exc_info:
+        while lexer.get_next_token().type != EOF:
+            pass
+    return exc_info.value
+
+def test_basic_token_stream():
+    """Test token types and values for a short statement."""
+    types = [(t, v) for t, v, _, _ in tokenize('BEGIN x := 12 // 3.5 END')]
+    assert types == [(BEGIN, 'BEGIN'), (ID, 'x'), (ASSIGN, ':='), (INTEGER_CONST, 12),
+                     (INTEGER_DIV, '//'), (REAL_CONST, 3.5), (END, 'END'), (EOF, None)]
+
+def test_keywords_are_case_insensitive():
+    """Test that keywords are recognised in any case."""
+    types = [t for t, _, _, _ in tokenize('begin End bEgIn')]
+    assert types == [BEGIN, END, BEGIN, EOF]
+
+def test_regex_engine_matches_char_engine():
+    """Test that the regex engine produces the same tokens and positions."""
+    assert tokenize(PROGRAM_TEXT, use_regex=True) == tokenize(PROGRAM_TEXT)
+
+def test_regex_engine_operators():
+    """Test that multi-character operators win over their prefixes."""
+    types = [t for t, _, _, _ in tokenize('<= <> := //', use_regex=True)]
+    assert types == [LESS_EQUAL, NOT_EQUAL, ASSIGN, INTEGER_DIV, EOF]
+
+@pytest.mark.parametrize('text', [
+    'BEGIN x := 5 @ 3 END.',
+    'BEGIN\n  x := 1.\nEND',
+    'PROGRAM Test;\nBEGIN { never closed\n\n',
+    'x }',
+])
+def test_regex_engine_errors_match_char_engine(text):
+    """Test that both engines report the same error and location."""
+    expected = lexer_error(text)
+    actual = lexer_error(text, use_regex=True)
+    assert str(actual) == str(expected)
+    assert (actual.line, actual.column) == (expected.line, expected.column)
+
+def test_regex_engine_keeps_current_char():
+    """Test that current_char points at the character after the last token."""
+    lexer = Lexer('Foo(1)', use_regex=True)
+    assert lexer.get_next_token().value == 'Foo'
+    assert lexer.current_char == '('
+
+def test_token_positions_are_computed_from_offsets():
+    """Test line/column lookup of recorded token offsets."""
+    lexer = Lexer('BEGIN\n  { note }\n    total := 1\nEND')
+    lexer.get_next_token()
+    lexer.get_next_token()
+    assert lexer.token_start == 21
+    assert lexer.token_position() == (3, 5)
+    assert lexer.line_column(0) == (1, 1)
+
+@pytest.mark.parametrize('use_regex', [False, True])
+def test_lexer_error_location(use_regex):
+    """Test that errors still report where the bad character is."""
+    error = lexer_error('PROGRAM Test;\nBEGIN\n   x := 5 @ 3\nEND.', use_regex)
+    assert (error.line, error.column) == (3, 11)
+
+@pytest.mark.parametrize('use_regex', [False, True])
+def test_identifiers_are_interned(use_regex):
+    """Test that repeated identifiers share one string and get dense ids."""
+    text = 'total := total + ' + 'x' + ' ; y := x'
+    lexer = Lexer(text, use_regex=use_regex)
+    values = []
+    while True:
+        token = lexer.get_next_token()
+        if token.type == EOF:
+            break
+        if token.type == ID:
+            values.append(token.value)
+    assert values[0] is values[1]
+    assert values[2] is values[4]
+    assert lexer.names.names == ['total', 'x', 'y']
+    assert lexer.names.id_of('y') == 2
+
+def test_keyword_table_covers_every_spelling():
+    """Test that keywords resolve in mixed case without becoming identifiers."""
+    from src.lexer.token import CASE_INSENSITIVE_KEYWORDS, RESERVED_KEYWORDS
+    assert CASE_INSENSITIVE_KEYWORDS['wRiTeLn'] is RESERVED_KEYWORDS['WRITELN']
+    lexer = Lexer('DownTo dOwNtO')
+    assert lexer.get_next_token().value == 'DOWNTO'
+    assert lexer.get_next_token().value == 'DOWNTO'
+    assert len(lexer.names) == 0
+
+def test_name_table_is_shared_with_parser():
+    """Test that the parser exposes the identifiers of the source."""
+    from src.parser.parser import Parser
+    from src.lexer.token_buffer import tokenize_all
+    text = 'PROGRAM P; VAR a, b : INTEGER; BEGIN a := b END.'
+    lexer = Lexer(text)
+    assert Parser(lexer).names is lexer.names
+    parser = Parser(tokenize_all(text))
+    parser.parse()
+    assert parser.names.names == ['P', 'a', 'b']
+
+def test_tokens_are_immutable():
+    """Test that tokens cannot be modified after creation."""
+    token = Lexer('x').get_next_token()
+    with pytest.raises(AttributeError):
+        token.value = 'y'
+    assert str(token) == "Token(ID, 'x')"
+
+@pytest.mark.parametrize('use_regex', [False, True])
+def test_fixed_text_tokens_are_singletons(use_regex):
+    """Test that operators, keywords and repeated identifiers share one token."""
+    lexer = Lexer('a := a + 1; a := a + 2', use_regex=use_regex)
+    tokens = []
+    while True:
+        token = lexer.get_next_token()
+        tokens.append(token)
+        if token.type == EOF:
+            break
+    assert tokens[1] is tokens[7]  # :=
+    assert tokens[3] is tokens[9]  # +
+    assert tokens[0] is tokens[2] is tokens[6]  # a
+    assert tokens[4] is not tokens[10]
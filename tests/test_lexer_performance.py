@@ -0,0 +1,28 @@
+"""
+Lexer throughput regression tests.
+Each case lexes a synthetic source and fails if tokens/second dropped more
+than --perf-tolerance below benchmarks/lexer_baseline.json. Run with
+python -m pytest -m perf --run-perf, and refresh the baseline with
+python -m benchmarks.lexer_suite --save-baseline after intended changes.
+"""
+import pytest
+from benchmarks.lexer_suite import ENGINES, case_name, load_baseline, measure, regression
+from benchmarks.programs import SYNTHETIC_SOURCES
+
+SIZE = 64 * 1024
+
+pytestmark = pytest.mark.perf
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("workload", sorted(SYNTHETIC_SOURCES))
+def test_lexer_throughput(workload, engine, request, record_property):
+    """Throughput should not regress beyond the configured tolerance."""
+    expected = load_baseline().get(case_name(workload, SIZE, engine))
+    if expected is None:
+        pytest.skip("no baseline for this case")
+    result = measure(SYNTHETIC_SOURCES[workload](SIZE), engine, repeats=5)
+    record_property('tokens_per_sec', round(result['tokens_per_sec']))
+    record_property('bytes_per_sec', round(result['bytes_per_sec']))
+    drop = regression(result, expected, request.config.getoption('--perf-tolerance'))
+    assert drop is None, (f"{result['tokens_per_sec']:,.0f} tokens/s is {drop:.0%} below the baseline "
+                          f"of {expected['tokens_per_sec']:,} tokens/s")
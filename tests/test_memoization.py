@@ -0,0 +1,92 @@
+"""
+Tests for memoization of pure function calls.
+"""
+import sys
+from src.lexer.lexer import Lexer
+from src.lexer.token_buffer import tokenize_all
+from src.parser.parser import Parser
+from src.semantic.semantic_analyzer import SemanticAnalyzer
+from src.interpreter.interpreter import Interpreter
+from src.interpreter.memo import FunctionCache, MISSING
+from benchmarks.programs import recursive_functions
+import run_interpreter
+
+def run(text, **options):
+    """Helper running text; returns the interpreter."""
+    Interpreter.GLOBAL_SCOPE.clear()
+    interpreter = Interpreter(Parser(Lexer(text)), **options)
+    interpreter.interpret()
+    return interpreter
+
+def stats(interpreter):
+    """Helper returning function name -> (hits, misses, entries)."""
+    return {cache.name: (cache.hits, cache.misses, len(cache)) for cache in interpreter.memo_stats()}
+
+def test_memoized_results_match():
+    """Memoized runs compute the same globals as plain ones, whatever the cache size."""
+    text = recursive_functions(12)
+    expected = dict(run(text).GLOBAL_SCOPE)
+    for size in (1024, 3, 1):
+        assert run(text, memoize=True, memo_size=size).GLOBAL_SCOPE == expected
+
+def test_each_argument_computed_once():
+    """With a cache holding every result, Fib(n) runs once per distinct argument."""
+    interpreter = run(recursive_functions(15), memoize=True)
+    assert stats(interpreter)['Fib'] == (13, 16, 16)
+
+def test_impure_functions_never_cached(capsys):
+    """Count writes a global and Log prints: both run on every call."""
+    text = """PROGRAM P; VAR calls, r : INTEGER;
+    FUNCTION Log(x : INTEGER) : INTEGER; BEGIN WRITELN(x); Log := x END;
+    FUNCTION Count(x : INTEGER) : INTEGER; BEGIN calls := calls + 1; Count := x END;
+    BEGIN calls := 0; r := Log(7) + Log(7) + Count(1) + Count(1) END."""
+    interpreter = run(text, memoize=True)
+    assert interpreter.memo_stats() == []
+    assert interpreter.GLOBAL_SCOPE['calls'] == 2
+    assert capsys.readouterr().out == "7\n7\n"
+
+def test_off_by_default():
+    interpreter = run(recursive_functions(5))
+    assert interpreter.memo_stats() == []
+
+def test_lru_eviction():
+    """The least recently used entry is dropped when a cache is full."""
+    cache = FunctionCache('F', maxsize=2)
+    cache.put((1,), 'a')
+    cache.put((2,), 'b')
+    assert cache.get((1,)) == 'a'
+    cache.put((3,), 'c')
+    assert cache.get((2,)) is MISSING
+    assert cache.get((1,)) == 'a'
+    assert (cache.hits, cache.misses, len(cache)) == (2, 1, 2)
+
+def test_keys_tell_integer_from_real():
+    """F(1) and F(1.0) are cached separately, as their results print differently."""
+    text = """PROGRAM P; VAR a, b : REAL;
+    FUNCTION Twice(x : REAL) : REAL; BEGIN Twice := x * 2 END;
+    BEGIN a := Twice(1); b := Twice(1.0) END."""
+    interpreter = run(text, memoize=True)
+    assert repr(interpreter.GLOBAL_SCOPE['a']) == '2'
+    assert repr(interpreter.GLOBAL_SCOPE['b']) == '2.0'
+    assert stats(interpreter)['Twice'] == (0, 2, 2)
+
+def test_flat_tree():
+    """Flat trees run through their views are memoized by FunctionDecl view."""
+    tree = Parser(tokenize_all(recursive_functions(10)), flat=True).parse()
+    SemanticAnalyzer().visit(tree)
+    Interpreter.GLOBAL_SCOPE.clear()
+    interpreter = Interpreter(None, memoize=True)
+    interpreter.run(tree)
+    assert interpreter.GLOBAL_SCOPE['fib'] == 57
+    assert stats(interpreter)['Fib'] == (8, 11, 11)
+
+def test_command_line_flags(tmp_path, monkeypatch, capsys):
+    """--memoize is a plain flag, so it may come before the file; --memo-size bounds the caches."""
+    source = tmp_path / 'fib.pas'
+    source.write_text(recursive_functions(8))
+    Interpreter.GLOBAL_SCOPE.clear()
+    monkeypatch.setattr(sys, 'argv', ['run_interpreter.py', '--memoize', '--memo-size', '3', '--no-cache', str(source)])
+    assert run_interpreter.main() == 0
+    out = capsys.readouterr().out
+    assert "Memoized functions:" in out
+    assert "Fib: 6 hits, 9 misses, 3/3 entries" in out
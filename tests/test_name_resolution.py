@@ -0,0 +1,127 @@
+"""
+Tests for the (depth, slot) addresses the semantic analyzer gives variables
+and function calls, and for running programs through them.
+"""
+import pytest
+from src.lexer.lexer import Lexer
+from src.lexer.token_buffer import tokenize_all
+from src.parser.parser import Parser
+from src.parser.ast_nodes import Var
+from src.semantic.semantic_analyzer import SemanticAnalyzer
+from src.interpreter.interpreter import Interpreter
+from src.errors import RuntimeError
+import run_interpreter
+
+PROGRAM_TEXT = """PROGRAM Nested;
+VAR x, total : INTEGER;
+FUNCTION Outer(n : INTEGER) : INTEGER;
+VAR t : INTEGER;
+FUNCTION Inner(m : INTEGER) : INTEGER;
+BEGIN
+    total := total + 1;
+    Inner := m + t
+END;
+BEGIN
+    t := n * 10;
+    Outer := Inner(n)
+END;
+BEGIN
+    total := 0;
+    FOR x := 1 TO 3 DO total := total + Outer(x)
+END.
+"""
+
+def analyzed(text):
+    """Helper parsing and analyzing text."""
+    tree = Parser(Lexer(text)).parse()
+    SemanticAnalyzer().visit(tree)
+    return tree
+
+def functions(block):
+    """Helper returning the function declarations of a block."""
+    return [node for node in block.declarations if type(node).__name__ == 'FunctionDecl']
+
+def run(tree):
+    """Helper running an analyzed tree and returning the global variables."""
+    Interpreter.GLOBAL_SCOPE.clear()
+    Interpreter(None).run(tree)
+    return dict(Interpreter.GLOBAL_SCOPE)
+
+def test_addresses():
+    """Vars, assignment targets, FOR variables and calls carry their resolved addresses."""
+    tree = analyzed(PROGRAM_TEXT)
+    outer, = functions(tree.block)
+    inner, = functions(outer.block_node)
+    first, loop = tree.block.compound_statement.children
+    assert (first.left.depth, first.left.slot) == (0, 1)
+    assert (loop.var_node.depth, loop.var_node.slot) == (0, 0)
+    call = loop.body.right.right
+    assert call.decl is outer and call.depth == 0
+    count, result = inner.block_node.compound_statement.children
+    assert (count.left.depth, count.left.slot) == (2, 1) #total, two routines up
+    assert (result.left.depth, result.left.slot) == (0, 0) #Inner's return value
+    assert (result.right.left.depth, result.right.left.slot) == (0, 1) #m
+    assert (result.right.right.depth, result.right.right.slot) == (1, 2) #t: Outer, n, t
+    assert outer.block_node.compound_statement.children[1].right.decl is inner
+
+def test_annotations_are_not_fields():
+    """Addresses are annotations, not children of the node."""
+    tree = analyzed(PROGRAM_TEXT)
+    var = tree.block.compound_statement.children[0].left
+    assert [name for name, _ in var.fields()] == ['token', 'value']
+
+def test_nested_function_reads_enclosing_locals():
+    """Inner functions see the locals of the function they are declared in."""
+    assert run(analyzed(PROGRAM_TEXT)) == {'x': 4, 'total': 66} #Inner's increments are overwritten
+
+def test_function_assigns_global():
+    """A global first assigned inside a function is the global, not a new local."""
+    text = """PROGRAM P; VAR g, r : INTEGER;
+    FUNCTION F : INTEGER; BEGIN g := 5; F := g + 1 END;
+    BEGIN r := F(); r := r + g END."""
+    assert run(analyzed(text)) == {'g': 5, 'r': 11}
+
+def test_local_shadows_global():
+    """A local variable shadows a global of the same name."""
+    text = """PROGRAM P; VAR a, r : INTEGER;
+    FUNCTION F(a : INTEGER) : INTEGER; BEGIN F := a * 2 END;
+    BEGIN a := 1; r := F(10) + a END."""
+    assert run(analyzed(text)) == {'a': 1, 'r': 21}
+
+def test_recursion_uses_fresh_records():
+    """Every recursive call has its own slots."""
+    text = """PROGRAM P; VAR r : INTEGER;
+    FUNCTION Fact(n : INTEGER) : INTEGER;
+    BEGIN IF n <= 1 THEN Fact := 1 ELSE Fact := n * Fact(n - 1) END END;
+    BEGIN r := Fact(10) END."""
+    assert run(analyzed(text)) == {'r': 3628800}
+
+def test_unassigned_local():
+    """Reading a local before assigning it is an error even if a global has the name."""
+    text = """PROGRAM P; VAR t, r : INTEGER;
+    FUNCTION F : INTEGER; VAR t : INTEGER; BEGIN F := t END;
+    BEGIN t := 1; r := F() END."""
+    with pytest.raises(RuntimeError, match="'t' used before assignment"):
+        run(analyzed(text))
+
+def test_unanalyzed_tree_fails():
+    """Names are never looked up at runtime: a tree that skipped analysis is an error."""
+    tree = Parser(tokenize_all(PROGRAM_TEXT)).parse()
+    with pytest.raises(RuntimeError, match="Unresolved name 'total'"):
+        run(tree)
+
+def test_flat_tree_is_analyzed():
+    """A flat tree, whose views cannot be annotated, is converted and analyzed by run."""
+    tree = Parser(tokenize_all(PROGRAM_TEXT), flat=True).parse()
+    assert run(tree) == {'x': 4, 'total': 66}
+
+def test_repl_keeps_globals(monkeypatch, capsys):
+    """The REPL starts each input's declared globals with the values of the inputs before it."""
+    inputs = iter(["PROGRAM A; VAR x : INTEGER; BEGIN x := 4 END.",
+                   "PROGRAM B; VAR x, y : INTEGER; BEGIN y := x * 2; WRITELN(x, y) END.",
+                   "show", "exit"])
+    monkeypatch.setattr('builtins.input', lambda prompt: next(inputs))
+    Interpreter.GLOBAL_SCOPE.clear()
+    run_interpreter.run_repl()
+    out = capsys.readouterr().out
+    assert "4 8\n" in out and "x = 4" in out and "y = 8" in out
@@ -0,0 +1,62 @@
+"""
+Tests for parallel chunked tokenization.
+"""
+import pytest
+from src.lexer.token_buffer import tokenize_all
+from src.lexer.parallel_lexer import chunk_boundaries, merge_chunks, tokenize_parallel, _tokenize_chunk
+from src.errors import LexerError
+from benchmarks.programs import generate_program
+
+def buffer_snapshot(buffer):
+    """Helper returning everything observable about a buffer's token stream."""
+    return (list(buffer), list(buffer.starts), list(buffer.ends), list(buffer.lines), list(buffer.line_starts))
+
+def serial_merge(text, parts):
+    """Helper running the chunk workers in-process and merging their output."""
+    bases = chunk_boundaries(text, parts)
+    results = [_tokenize_chunk(text[start:end], start, text.count('\n', 0, start)) for start, end in zip(bases, bases[1:])]
+    return merge_chunks(results)
+
+def test_boundaries_avoid_comments_and_tokens():
+    """Split points should fall on whitespace outside comments."""
+    text = "x := 1;{ a long comment with spaces }y := 22;\nz := 333"
+    for parts in range(2, 12):
+        bases = chunk_boundaries(text, parts)
+        assert bases[0] == 0 and bases[-1] == len(text)
+        assert bases == sorted(set(bases))
+        for pos in bases[1:-1]:
+            assert text[pos] in ' \t\r\n'
+            assert not (text.index('{') < pos < text.index('}'))
+
+def test_boundaries_without_split_points():
+    """A source with no usable whitespace stays a single chunk."""
+    assert chunk_boundaries("x:=1;{ all one comment", 4) == [0, 22]
+
+@pytest.mark.parametrize("parts", [1, 2, 3, 7, 16])
+def test_merged_buffer_matches_serial(parts):
+    """Merging chunk buffers should reproduce tokenize_all exactly."""
+    text = generate_program(200)
+    merged = serial_merge(text, parts)
+    assert buffer_snapshot(merged) == buffer_snapshot(tokenize_all(text))
+
+def test_merged_identifiers_are_interned():
+    """Identifiers from different chunks should share one NameTable entry."""
+    text = generate_program(50)
+    merged = serial_merge(text, 4)
+    names = [merged.value_at(i) for i in range(len(merged)) if merged.type_at(i) == 'ID']
+    assert all(name is merged.names.intern(name) for name in names)
+
+def test_parallel_tokenization_uses_workers():
+    """tokenize_parallel should agree with tokenize_all when it uses processes."""
+    text = generate_program(300)
+    buffer = tokenize_parallel(text, workers=3, threshold=0)
+    assert buffer_snapshot(buffer) == buffer_snapshot(tokenize_all(text))
+
+def test_parallel_error_matches_serial():
+    """A lexer error in any chunk should be reported as the serial lexer does."""
+    text = generate_program(300).replace('ratio := ratio', 'ratio := @ratio', 1)
+    with pytest.raises(LexerError) as serial:
+        tokenize_all(text)
+    with pytest.raises(LexerError) as parallel:
+        tokenize_parallel(text, workers=2, threshold=0)
+    assert str(parallel.value) == str(serial.value)
@@ -0,0 +1,93 @@
+"""
+Tests for the Pratt expression parser.
+Its trees and errors are compared with the recursive descent parser it
+replaced, kept in benchmarks/parser_expressions.py.
+"""
+import random
+import pytest
+from src.lexer.lexer import Lexer
+from src.lexer.token_buffer import tokenize_all
+from src.parser.ast_nodes import AST
+from src.parser.parser import Parser
+from src.errors import ParserError
+from benchmarks.parser_expressions import RecursiveDescentParser
+from benchmarks.programs import expression_heavy
+
+def dump(node):
+    """Helper turning an AST into nested tuples for comparison."""
+    if isinstance(node, list):
+        return [dump(item) for item in node]
+    if isinstance(node, AST):
+        return (type(node).__name__, node.span, {name: dump(value) for name, value in node.fields()})
+    return node
+
+def parse_with(parser_class, text, source=Lexer):
+    """Helper returning the dumped tree, or the error message, for text."""
+    try:
+        return dump(parser_class(source(text)).parse())
+    except ParserError as e:
+        return str(e)
+
+def program(condition, value):
+    return f"PROGRAM T; VAR a, b, c : INTEGER; BEGIN IF {condition} THEN a := {value} END END."
+
+EXPRESSIONS = [
+    "1", "-1", "+-a", "a + b * c", "a * b + c", "a - b - c", "a / b // c * 2.5",
+    "(a + b) * c", "-(a + b) * -c", "((a))", "Add(a, b * 2) + 1", "a +", "a * * b", "(a + b",
+]
+
+CONDITIONS = [
+    "a > 1", "a > 1 AND b < 2", "a = 1 OR b = 2 AND c = 3", "NOT a = 1", "NOT NOT (a = 1)",
+    "(a = 1 OR b = 2) AND c <> 3", "a + 1 >= b * 2", "a", "(a + 1) > 2", "a > 1 > 2",
+    "NOT (a = 1) OR (b = 2)", "a = 1 OR", "a AND b", "((a < b))",
+]
+
+@pytest.mark.parametrize("value", EXPRESSIONS)
+def test_expressions_match_recursive_descent(value):
+    """Arithmetic expressions should parse to the same trees (or errors)."""
+    text = program("a = 1", value)
+    assert parse_with(Parser, text) == parse_with(RecursiveDescentParser, text)
+
+@pytest.mark.parametrize("condition", CONDITIONS)
+def test_conditions_match_recursive_descent(condition):
+    """Boolean expressions should parse to the same trees (or errors)."""
+    text = program(condition, "1")
+    assert parse_with(Parser, text) == parse_with(RecursiveDescentParser, text)
+
+def test_random_expressions_match_recursive_descent():
+    """Randomly generated expressions should parse identically."""
+    rng = random.Random(11)
+    def arithmetic(depth):
+        if depth == 0 or rng.random() < 0.3:
+            return rng.choice(['a', 'b', '1', '2.5', '-c', 'Add(a, 1)'])
+        if rng.random() < 0.2:
+            return f"({arithmetic(depth - 1)})"
+        return f"{arithmetic(depth - 1)} {rng.choice('+-*/')} {arithmetic(depth - 1)}"
+    def boolean(depth):
+        roll = rng.random()
+        if depth == 0 or roll < 0.3:
+            return f"{arithmetic(2)} {rng.choice(['=', '<>', '<', '>', '<=', '>='])} {arithmetic(2)}"
+        if roll < 0.45:
+            return f"NOT {boolean(depth - 1)}"
+        if roll < 0.6:
+            return f"({boolean(depth - 1)})"
+        return f"{boolean(depth - 1)} {rng.choice(['AND', 'OR'])} {boolean(depth - 1)}"
+    for _ in range(200):
+        text = program(boolean(3), arithmetic(4))
+        assert parse_with(Parser, text) == parse_with(RecursiveDescentParser, text)
+
+def test_buffer_source_matches_recursive_descent():
+    """The Pratt parser should agree with the old one when reading a TokenBuffer."""
+    text = expression_heavy(8 * 1024)
+    assert parse_with(Parser, text, tokenize_all) == parse_with(RecursiveDescentParser, text, tokenize_all)
+
+def test_precedence_and_associativity():
+    """Operators should group by precedence, left to right within a level."""
+    tree = Parser(Lexer(program("a = 1 OR b = 2 AND NOT c = 3", "a - b - c * 2"))).parse()
+    if_node = tree.block.compound_statement.children[0]
+    assert if_node.condition.op.type == 'OR'
+    assert if_node.condition.right.op.type == 'AND'
+    assert if_node.condition.right.right.op.type == 'NOT'
+    value = if_node.then_branch.right
+    assert value.op.type == 'MINUS' and value.left.op.type == 'MINUS'
+    assert value.right.op.type == 'MUL'
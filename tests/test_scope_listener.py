@@ -0,0 +1,93 @@
+"""
+Tests for scope listeners and cached symbol lookup.
+"""
+from src.lexer.lexer import Lexer
+from src.parser.parser import Parser
+from src.semantic.semantic_analyzer import SemanticAnalyzer
+from src.semantic.symbols import ScopedSymbolTable, ScopeListener, VarSymbol, BuiltinTypeSymbol
+from benchmarks.programs import nested_blocks
+
+PROGRAM_TEXT = """PROGRAM Events;
+VAR x : INTEGER;
+FUNCTION F(n : INTEGER) : INTEGER;
+BEGIN
+    BEGIN F := n + x END
+END;
+BEGIN
+    x := F(1)
+END.
+"""
+
+class Recorder(ScopeListener):
+    """Helper listener recording events as tuples."""
+    def __init__(self):
+        self.events = []
+
+    def enter_scope(self, scope):
+        self.events.append(('enter', scope.scope_name))
+
+    def leave_scope(self, scope):
+        self.events.append(('leave', scope.scope_name))
+
+    def define(self, scope, symbol):
+        self.events.append(('define', scope.scope_name, symbol.name))
+
+    def lookup(self, scope, name, symbol):
+        self.events.append(('lookup', scope.scope_name, name, symbol is not None))
+
+def analyze(text, listener=None):
+    """Helper analyzing text."""
+    SemanticAnalyzer(listener).visit(Parser(Lexer(text)).parse())
+
+def test_listener_events():
+    """A listener sees scopes open and close and every define and lookup."""
+    recorder = Recorder()
+    analyze(PROGRAM_TEXT, recorder)
+    scopes = [event for event in recorder.events if event[0] in ('enter', 'leave')]
+    assert scopes == [('enter', 'global'), ('enter', 'F'), ('enter', 'block1'), ('enter', 'block2'),
+                      ('leave', 'block2'), ('leave', 'block1'), ('leave', 'F'),
+                      ('enter', 'block3'), ('leave', 'block3'), ('leave', 'global')]
+    assert ('define', 'F', 'n') in recorder.events
+    assert ('lookup', 'block2', 'x', True) in recorder.events
+
+def test_no_hooks_without_listener():
+    """Scopes without a listener use the plain methods."""
+    scope = ScopedSymbolTable('global', 1)
+    assert 'lookup' not in vars(scope) and 'define' not in vars(scope)
+    child = ScopedSymbolTable('F', 2, scope, listener=ScopeListener())
+    assert 'lookup' in vars(child)
+    assert ScopedSymbolTable('block', 3, child).listener is child.listener
+
+def test_debug_environment_prints(monkeypatch, capsys):
+    """PASCAL_DEBUG=1 installs a listener printing the trace."""
+    monkeypatch.setenv('PASCAL_DEBUG', '1')
+    analyze(PROGRAM_TEXT)
+    out = capsys.readouterr().out
+    assert 'ENTER scope: F' in out and 'LEAVE scope: global' in out
+    assert 'Define: <n:INTEGER>' in out and 'Lookup: x. (Scope name: block2)' in out
+
+def test_cached_lookup_sees_new_definitions():
+    """A name cached from an outer scope is looked up again once something is defined."""
+    integer = BuiltinTypeSymbol('INTEGER')
+    outer = ScopedSymbolTable('global', 1)
+    outer.define(VarSymbol('x', integer))
+    middle = ScopedSymbolTable('F', 2, outer)
+    inner = ScopedSymbolTable('block1', 3, middle)
+    assert inner.lookup('x') is outer.lookup('x')
+    shadow = VarSymbol('x', integer)
+    middle.define(shadow)
+    assert inner.lookup('x') is shadow
+    assert inner.lookup('missing') is None
+    assert inner.lookup('x', current_scope_only=True) is None
+
+def test_deep_nesting():
+    """Lookups through hundreds of nested scopes do not recurse."""
+    scope = ScopedSymbolTable('global', 1)
+    scope.define(VarSymbol('x', None))
+    for level in range(5000):
+        scope = ScopedSymbolTable(f'block{level}', level + 2, scope)
+    assert scope.lookup('x').name == 'x'
+
+def test_nested_blocks_program():
+    """The lookup benchmark program analyzes cleanly."""
+    analyze(nested_blocks(200, 40, working_set=20))
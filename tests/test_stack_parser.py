@@ -0,0 +1,114 @@
+"""
+Tests for the explicit-stack parser used for deeply nested programs.
+"""
+import time
+import pytest
+from src.lexer.lexer import Lexer
+from src.lexer.token_buffer import tokenize_all
+from src.parser.parser import Parser, StackParser
+from src.parser.ast_nodes import AST, Compound, IfStatement, BinOp, UnaryOp
+from src.interpreter.interpreter import Interpreter
+from src.errors import ParserError
+from benchmarks.programs import generate_program, expression_heavy
+
+DEPTH = 100000
+TIME_BUDGET = 30.0 #seconds per stress test, generous for slow machines
+
+def dump(node):
+    """Helper turning an AST into nested tuples for comparison."""
+    if isinstance(node, list):
+        return [dump(item) for item in node]
+    if isinstance(node, AST):
+        return (type(node).__name__, node.span, {name: dump(value) for name, value in node.fields()})
+    return node
+
+def parse_with(parser_class, text):
+    """Helper returning the dumped tree, or the error message, for text."""
+    try:
+        return dump(parser_class(Lexer(text)).parse())
+    except ParserError as e:
+        return str(e)
+
+def depth_of(node, child):
+    """Helper measuring nesting depth iteratively by following child(node)."""
+    depth = 0
+    while node is not None:
+        depth += 1
+        node = child(node)
+    return depth
+
+PROGRAMS = [
+    generate_program(50),
+    expression_heavy(4 * 1024),
+    """PROGRAM P; VAR x : REAL;
+    FUNCTION F(a, b : INTEGER; c : REAL) : REAL;
+    VAR t : INTEGER;
+    FUNCTION G : INTEGER; BEGIN G := 1 END;
+    BEGIN t := G(); F := a + b * c END;
+    BEGIN
+        WHILE x < 10 DO BEGIN x := x + F(1, 2, 3.0); PRINT(x, 1) END;
+        FOR x := 10 DOWNTO 1 DO WRITELN(x);
+        IF NOT (x = 1) THEN BEGIN END ELSE ; END;
+    END.""",
+]
+
+ERRORS = [
+    "PROGRAM P; BEGIN x := END.",
+    "PROGRAM P; BEGIN x := 1 y := 2 END.",
+    "PROGRAM P; BEGIN IF x THEN y := 1 END.",
+    "PROGRAM P; BEGIN FOR i := 1 UPTO 3 DO x := 1 END.",
+    "PROGRAM P; FUNCTION F BEGIN END; BEGIN END.",
+    "PROGRAM P; BEGIN x := (1 + 2 END.",
+    "PROGRAM P; BEGIN END. extra",
+]
+
+@pytest.mark.parametrize("text", PROGRAMS, ids=["generated", "expressions", "functions"])
+def test_trees_match_recursive_parser(text):
+    """StackParser should build exactly the trees Parser builds."""
+    assert parse_with(StackParser, text) == parse_with(Parser, text)
+
+@pytest.mark.parametrize("text", ERRORS)
+def test_errors_match_recursive_parser(text):
+    """StackParser should report the same syntax errors at the same places."""
+    assert parse_with(StackParser, text) == parse_with(Parser, text)
+
+def test_stack_parser_runs_programs():
+    """Trees from StackParser should execute normally."""
+    Interpreter.GLOBAL_SCOPE.clear()
+    text = "PROGRAM P; VAR x : INTEGER; BEGIN x := ((2 + 3) * 4); IF x > 10 THEN x := x + 1 END END."
+    Interpreter(StackParser(tokenize_all(text))).interpret()
+    assert Interpreter.GLOBAL_SCOPE['x'] == 21
+
+def test_recursive_parser_overflows():
+    """The recursive parser cannot handle the depths StackParser is for."""
+    text = "PROGRAM P; BEGIN " + "BEGIN " * DEPTH + "END " * DEPTH + "END."
+    with pytest.raises(RecursionError):
+        Parser(tokenize_all(text)).parse()
+
+def test_deep_compound_statements():
+    """100k nested BEGIN/END blocks should parse within the time budget."""
+    text = "PROGRAM P; BEGIN " + "BEGIN " * DEPTH + "END " * DEPTH + "END."
+    start = time.perf_counter()
+    tree = StackParser(tokenize_all(text)).parse()
+    assert time.perf_counter() - start < TIME_BUDGET
+    outer = tree.block.compound_statement
+    assert depth_of(outer, lambda node: node.children[0] if isinstance(node, Compound) else None) == DEPTH + 2
+
+def test_deep_if_chains():
+    """100k nested IF statements should parse within the time budget."""
+    text = "PROGRAM P; VAR x : INTEGER; BEGIN " + "IF x = 1 THEN " * DEPTH + "x := 1" + " END" * DEPTH + " END."
+    start = time.perf_counter()
+    tree = StackParser(tokenize_all(text)).parse()
+    assert time.perf_counter() - start < TIME_BUDGET
+    outer = tree.block.compound_statement.children[0]
+    assert depth_of(outer, lambda node: node.then_branch if isinstance(node, IfStatement) else None) == DEPTH + 1
+
+def test_deep_parentheses_and_unary_operators():
+    """100k nested parentheses and unary minuses should parse within the time budget."""
+    text = "PROGRAM P; VAR x : INTEGER; BEGIN x := " + "(1 + " * DEPTH + "x" + ")" * DEPTH + "; x := " + "-" * DEPTH + "1 END."
+    start = time.perf_counter()
+    tree = StackParser(tokenize_all(text)).parse()
+    assert time.perf_counter() - start < TIME_BUDGET
+    first, second = tree.block.compound_statement.children
+    assert depth_of(first.right, lambda node: node.right if isinstance(node, BinOp) else None) == DEPTH + 1
+    assert depth_of(second.right, lambda node: node.expr if isinstance(node, UnaryOp) else None) == DEPTH + 1
@@ -0,0 +1,108 @@
+"""
+Tests for the streaming (chunked / memory-mapped) lexer.
+"""
+import io
+import pytest
+from src.lexer.lexer import Lexer
+from src.lexer.stream_lexer import StreamLexer
+from src.lexer.token import EOF
+from src.parser.parser import Parser
+from src.interpreter.interpreter import Interpreter
+from src.errors import LexerError
+
+PROGRAM_TEXT = """PROGRAM Test;
+VAR
+    counter, result : INTEGER;
+    ratio : REAL;
+{ a comment that is long enough to be split
+  across several small chunks }
+BEGIN
+    counter := 12345;
+    ratio := 1234.5678 / 2;
+    IF counter >= 100 THEN result := counter // 5 ELSE result := 0 END
+END.
+"""
+
+def tokens(lexer):
+    """Helper returning (type, value, line, column) for every token."""
+    result = []
+    while True:
+        token = lexer.get_next_token()
+        result.append((token.type, token.value, lexer.line, lexer.column))
+        if token.type == EOF:
+            return result
+
+def stream(text, chunk_size):
+    """Helper creating a StreamLexer over text."""
+    return StreamLexer(io.BytesIO(text.encode('ascii')), chunk_size)
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 16, 4096])
+def test_stream_matches_lexer_for_any_chunk_size(chunk_size):
+    """Test that tokens straddling chunk boundaries are reassembled."""
+    assert tokens(stream(PROGRAM_TEXT, chunk_size)) == tokens(Lexer(PROGRAM_TEXT))
+
+def test_stream_iterates_lazily():
+    """Test iterating a stream yields tokens up to EOF."""
+    types = [token.type for token in stream('BEGIN x := 1 END', 2)]
+    assert types[0] == 'BEGIN' and types[-1] == EOF and len(types) == 6
+
+def test_comment_spanning_many_chunks_keeps_memory_bounded():
+    """Test that a huge comment never accumulates in the buffer."""
+    text = 'BEGIN {' + 'x\n' * 5000 + '} y := 1 END'
+    lexer = stream(text, 64)
+    largest = 0
+    while lexer.get_next_token().type != EOF:
+        largest = max(largest, len(lexer._buffer))
+    assert largest <= 128
+    assert lexer.line == 5001
+
+def test_unterminated_comment_across_chunks():
+    """Test unterminated comment error position across chunk boundaries."""
+    text = 'PROGRAM Test;\nBEGIN { never\nclosed'
+    with pytest.raises(LexerError) as expected:
+        tokens(Lexer(text))
+    with pytest.raises(LexerError) as actual:
+        tokens(stream(text, 4))
+    assert str(actual.value) == str(expected.value)
+
+def test_invalid_character_position():
+    """Test invalid character errors carry the same line and column."""
+    text = 'BEGIN\n  x := 5 @ 3\nEND'
+    with pytest.raises(LexerError) as exc_info:
+        tokens(stream(text, 5))
+    assert (exc_info.value.line, exc_info.value.column) == (2, 10)
+
+def test_invalid_character_fails_without_reading_ahead():
+    """Test an invalid character early in a large source is reported before the rest is buffered."""
+    text = 'BEGIN @ x := 1 END\n' + 'x := 1;\n' * 100000
+    lexer = stream(text, 64)
+    with pytest.raises(LexerError) as exc_info:
+        tokens(lexer)
+    assert (exc_info.value.line, exc_info.value.column) == (1, 7)
+    assert len(lexer._buffer) <= 128
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 5])
+def test_invalid_character_after_blanks_across_chunks(chunk_size):
+    """Test blanks cut by a chunk boundary still defer the decision to the next chunk."""
+    text = 'BEGIN x :=    \t  @ END'
+    with pytest.raises(LexerError) as expected:
+        tokens(Lexer(text))
+    with pytest.raises(LexerError) as actual:
+        tokens(stream(text, chunk_size))
+    assert str(actual.value) == str(expected.value)
+
+def test_open_memory_maps_file(tmp_path):
+    """Test running a program tokenized from a memory-mapped file."""
+    path = tmp_path / 'program.txt'
+    path.write_text(PROGRAM_TEXT)
+    Interpreter.GLOBAL_SCOPE.clear()
+    with StreamLexer.open(str(path), chunk_size=8) as lexer:
+        Interpreter(Parser(lexer)).interpret()
+    assert Interpreter.GLOBAL_SCOPE['result'] == 2469
+
+def test_open_empty_file(tmp_path):
+    """Test that an empty file yields only EOF."""
+    path = tmp_path / 'empty.txt'
+    path.write_text('')
+    with StreamLexer.open(str(path)) as lexer:
+        assert lexer.get_next_token().type == EOF
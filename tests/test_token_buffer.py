@@ -0,0 +1,197 @@
+"""
+Tests for bulk tokenization into compact token buffers.
+"""
+import pytest
+from src.lexer.lexer import Lexer
+from src.lexer.token import EOF, ID, INTEGER_DIV
+from src.lexer.token_buffer import TokenBuffer, tokenize_all, relex
+from src.parser.parser import Parser
+from src.interpreter.interpreter import Interpreter
+from src.errors import LexerError
+
+PROGRAM_TEXT = """
+PROGRAM Test;
+VAR
+    x, y, result : INTEGER;
+    r : REAL;
+
+FUNCTION Add(a : INTEGER; b : INTEGER) : INTEGER;
+BEGIN
+    Add := a + b
+END;
+
+{ main program }
+BEGIN
+    x := 7 DIV 2;
+    y := x // 2;
+    r := 1.5 * 2.0;
+    result := Add(x, y) + Add(1, 2)
+END.
+"""
+
+def lexer_tokens(text):
+    """Helper returning (type, value) pairs produced by Lexer."""
+    lexer = Lexer(text)
+    tokens = []
+    while True:
+        token = lexer.get_next_token()
+        tokens.append((token.type, token.value))
+        if token.type == EOF:
+            return tokens
+
+def test_buffer_matches_lexer_stream():
+    """Test that the buffer holds exactly the Lexer token stream."""
+    buffer = tokenize_all(PROGRAM_TEXT)
+    assert [(t.type, t.value) for t in buffer] == lexer_tokens(PROGRAM_TEXT)
+    assert len(buffer) == len(lexer_tokens(PROGRAM_TEXT))
+
+def test_buffer_arrays_are_compact():
+    """Test that token kinds are stored as bytes and values are shared."""
+    buffer = tokenize_all('PROGRAM T; BEGIN x := x + x END.')
+    assert buffer.kinds.itemsize == 1
+    assert buffer.values == ['T', 'x']
+    assert buffer.value_at(4) == 'x' and buffer.type_at(4) == ID
+
+def test_buffer_keeps_keyword_spelling():
+    """Test that DIV keeps its keyword value rather than '//'."""
+    buffer = tokenize_all('7 DIV 2 // 1')
+    assert [(t.type, t.value) for t in buffer][1:4:2] == [(INTEGER_DIV, 'DIV'), (INTEGER_DIV, '//')]
+
+def test_buffer_offsets_and_lines():
+    """Test start/end offsets and line numbers of tokens."""
+    text = 'BEGIN\n  { c }\n  abc := 12\nEND'
+    buffer = tokenize_all(text)
+    assert [text[s:e] for s, e in zip(buffer.starts, buffer.ends)] == ['BEGIN', 'abc', ':=', '12', 'END', '']
+    assert list(buffer.lines) == [1, 3, 3, 3, 4, 4]
+
+@pytest.mark.parametrize('text', ['x := 5 @ 3', 'x := 1.;', 'BEGIN { open', 'a } b'])
+def test_buffer_errors_match_lexer(text):
+    """Test that bulk tokenization reports the same lexer errors."""
+    lexer = Lexer(text)
+    with pytest.raises(LexerError) as expected:
+        while lexer.get_next_token().type != EOF:
+            pass
+    with pytest.raises(LexerError) as actual:
+        tokenize_all(text)
+    assert str(actual.value) == str(expected.value)
+
+def test_parser_consumes_buffer():
+    """Test that a program parsed from a buffer runs like one parsed from a Lexer."""
+    Interpreter.GLOBAL_SCOPE.clear()
+    Interpreter(Parser(tokenize_all(PROGRAM_TEXT))).interpret()
+    from_buffer = dict(Interpreter.GLOBAL_SCOPE)
+    Interpreter.GLOBAL_SCOPE.clear()
+    Interpreter(Parser(Lexer(PROGRAM_TEXT))).interpret()
+    assert from_buffer == Interpreter.GLOBAL_SCOPE
+    assert from_buffer['result'] == 7
+
+def test_empty_buffer_is_eof():
+    """Test that empty input produces a lone EOF token."""
+    buffer = tokenize_all('  \n ')
+    assert isinstance(buffer, TokenBuffer)
+    assert [t.type for t in buffer] == [EOF]
+
+
+def buffer_snapshot(buffer):
+    """Helper returning everything observable about a buffer's token stream."""
+    return (list(buffer), list(buffer.starts), list(buffer.ends), list(buffer.lines), list(buffer.line_starts))
+
+def apply_edit(text, offset, removed, inserted):
+    """Helper tokenizing text, editing it and re-lexing incrementally."""
+    buffer = tokenize_all(text)
+    new_text = text[:offset] + inserted + text[offset + removed:]
+    return relex(buffer, new_text, offset, removed, inserted), new_text
+
+@pytest.mark.parametrize("old, new", [
+    ("x := 7 DIV 2;", "x := 17 DIV 2;"),
+    ("    y := x // 2;", "    yy := x // 2;"),
+    ("    r := 1.5 * 2.0;", "    r := 1.5 * 2.0;\n    r := r + 1;"),
+    ("{ main program }\n", ""),
+    ("{ main program }", "{ main"),
+    ("Add := a + b", "Add := a\n\n + b"),
+    ("PROGRAM Test;", "PROGRAM Test2 ;"),
+    ("END.", "END.\n{ trailing }\n"),
+])
+def test_relex_matches_full_tokenization(old, new):
+    """Incremental re-lexing should give the same stream as lexing from scratch."""
+    if old == "{ main program }":
+        new_text = PROGRAM_TEXT.replace("{ main program }", "{ main } program")
+    else:
+        new_text = PROGRAM_TEXT.replace(old, new)
+    offset = PROGRAM_TEXT.index(old)
+    inserted = new_text[offset:len(new_text) - (len(PROGRAM_TEXT) - offset - len(old))]
+    buffer, edited = apply_edit(PROGRAM_TEXT, offset, len(old), inserted)
+    assert edited == new_text
+    assert buffer_snapshot(buffer) == buffer_snapshot(tokenize_all(new_text))
+
+def test_relex_random_edits():
+    """Random insertions and deletions should always agree with tokenize_all."""
+    import random
+    rng = random.Random(7)
+    pieces = [' ', '\n', 'x', '1', '.5', ':=', ';', '{ c }', 'BEGIN ', 'END', '(', ')', '+']
+    text = PROGRAM_TEXT
+    buffer = tokenize_all(text)
+    for _ in range(300):
+        offset = rng.randrange(len(text) + 1)
+        removed = min(rng.randrange(4), len(text) - offset)
+        inserted = rng.choice(pieces) if rng.random() < 0.7 else ''
+        new_text = text[:offset] + inserted + text[offset + removed:]
+        try:
+            expected = tokenize_all(new_text)
+        except LexerError:
+            continue
+        relex(buffer, new_text, offset, removed, inserted)
+        assert buffer_snapshot(buffer) == buffer_snapshot(expected)
+        text = new_text
+
+def test_relex_stops_at_resync(monkeypatch):
+    """A local edit should re-lex a handful of tokens, not the rest of the file."""
+    text = "BEGIN\n" + "    x := x + 1;\n" * 1000 + "END."
+    buffer = tokenize_all(text)
+    calls = []
+    original = Lexer._regex_next_token
+    monkeypatch.setattr(Lexer, '_regex_next_token', lambda self: calls.append(1) or original(self))
+    offset = text.index("x + 1")
+    new_text = text[:offset] + "y" + text[offset + 1:]
+    relex(buffer, new_text, offset, 1, "y")
+    assert len(calls) < 5
+    assert buffer.value_at(3) == 'y'
+
+def test_relex_error_leaves_buffer_unchanged():
+    """A lexer error in the edited region should propagate without patching."""
+    buffer = tokenize_all(PROGRAM_TEXT)
+    before = buffer_snapshot(buffer)
+    offset = PROGRAM_TEXT.index("{ main")
+    with pytest.raises(LexerError):
+        relex(buffer, PROGRAM_TEXT[:offset] + "@" + PROGRAM_TEXT[offset:], offset, 0, "@")
+    assert buffer_snapshot(buffer) == before
+
+def test_relex_edits_before_reading():
+    """Edits applied one after another, reading positions only at the end, agree with tokenize_all."""
+    text = PROGRAM_TEXT
+    buffer = tokenize_all(text)
+    for old, new in [("x := 7", "xx := 7"), ("{ main program }\n", ""), ("BEGIN", "BEGIN\n\n"), ("2.0", "2.25")]:
+        offset = text.index(old)
+        text = text[:offset] + new + text[offset + len(old):]
+        relex(buffer, text, offset, len(old), new)
+    assert buffer_snapshot(buffer) == buffer_snapshot(tokenize_all(text))
+
+def test_relex_insert_does_not_scale_with_tail():
+    """An insert leaves the tail's offsets and lines stored as they were, shifting them on first use."""
+    import time
+    def insert_time(lines):
+        """Helper returning (best time of a one-character insert, the buffer and tail before it)."""
+        text = "BEGIN\n" + "    x := x + 1;\n" * lines + "END."
+        best = float('inf')
+        for _ in range(5):
+            buffer = tokenize_all(text)
+            tail = list(buffer.starts[20:])
+            start = time.perf_counter()
+            relex(buffer, text[:10] + "y" + text[10:], 10, 0, "y")
+            best = min(best, time.perf_counter() - start)
+        return best, buffer, tail
+    short, _, _ = insert_time(400)
+    long, buffer, tail = insert_time(20000)
+    assert list(buffer._shifted['starts'].data[20:]) == tail #not rewritten
+    assert buffer.starts[20:].tolist() == [start + 1 for start in tail]
+    assert long < short * 10
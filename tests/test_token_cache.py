@@ -0,0 +1,115 @@
+"""
+Tests for the on-disk token buffer cache.
+"""
+import marshal
+import os
+from array import array
+import pytest
+from src.lexer import token_cache
+from src.lexer.token_buffer import TokenBuffer, tokenize_all
+from src.lexer.token_cache import TokenCache
+from src.interpreter.interpreter import Interpreter
+from run_interpreter import run_file
+
+PROGRAM_TEXT = """
+PROGRAM Cached;
+VAR
+    x, y : INTEGER;
+    r : REAL;
+BEGIN
+    x := 7 DIV 2;
+    y := x // 2 + 10;
+    r := 1.5 * 2.0
+END.
+"""
+
+def buffer_snapshot(buffer):
+    """Helper returning everything observable about a buffer's token stream."""
+    return (list(buffer), list(buffer.starts), list(buffer.ends), list(buffer.lines), list(buffer.line_starts))
+
+def test_buffer_round_trips_through_bytes():
+    """dumps/loads should reproduce the token stream with names re-interned."""
+    buffer = tokenize_all(PROGRAM_TEXT)
+    loaded = TokenBuffer.loads(buffer.dumps())
+    assert buffer_snapshot(loaded) == buffer_snapshot(buffer)
+    assert loaded.value_at(4) is loaded.names.intern('x')
+
+def test_loads_rejects_other_versions(monkeypatch):
+    """Buffers from another lexer version should not load."""
+    data = tokenize_all(PROGRAM_TEXT).dumps()
+    monkeypatch.setattr('src.lexer.token_buffer.LEXER_VERSION', -1)
+    with pytest.raises(ValueError):
+        TokenBuffer.loads(data)
+
+def test_hit_skips_lexing(tmp_path, monkeypatch):
+    """A second lookup of the same text should come from disk."""
+    cache = TokenCache(str(tmp_path))
+    first = cache.tokenize(PROGRAM_TEXT)
+    monkeypatch.setattr(token_cache, 'tokenize_all', lambda *args: pytest.fail("re-lexed a cached source"))
+    second = TokenCache(str(tmp_path)).tokenize(PROGRAM_TEXT)
+    assert buffer_snapshot(second) == buffer_snapshot(first)
+
+def test_key_depends_on_text_and_version(tmp_path, monkeypatch):
+    """Different sources or lexer versions should use different entries."""
+    cache = TokenCache(str(tmp_path))
+    key = cache.key(PROGRAM_TEXT)
+    assert cache.key(PROGRAM_TEXT + ' ') != key
+    monkeypatch.setattr(token_cache, 'LEXER_VERSION', 999)
+    assert cache.key(PROGRAM_TEXT) != key
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    """A damaged cache file should be discarded and the source re-lexed."""
+    cache = TokenCache(str(tmp_path))
+    cache.tokenize(PROGRAM_TEXT)
+    with open(cache.path(cache.key(PROGRAM_TEXT)), 'wb') as f:
+        f.write(b'not a token buffer')
+    assert cache.get(PROGRAM_TEXT) is None
+    assert not os.path.exists(cache.path(cache.key(PROGRAM_TEXT)))
+
+@pytest.mark.parametrize("damage", ["values", "value_table", "value_ids"])
+def test_entry_with_bad_indexes_is_relexed(tmp_path, damage):
+    """An entry that unmarshals but points past its values should be re-lexed, not crash."""
+    cache = TokenCache(str(tmp_path))
+    buffer = cache.tokenize(PROGRAM_TEXT)
+    fields = list(marshal.loads(buffer.dumps()))
+    if damage == "values":
+        fields[7] = []
+    elif damage == "value_table":
+        fields[8] = {key: 10**6 for key in fields[8]}
+    else:
+        fields[6] = array('i', [10**6] * len(buffer.value_ids)).tobytes()
+    with open(cache.path(cache.key(PROGRAM_TEXT)), 'wb') as f:
+        f.write(marshal.dumps(tuple(fields)))
+    assert buffer_snapshot(cache.tokenize(PROGRAM_TEXT)) == buffer_snapshot(buffer)
+    assert cache.misses == 2
+
+def test_eviction_removes_least_recently_used(tmp_path):
+    """The cache should stay under its size bound, keeping recent entries."""
+    cache = TokenCache(str(tmp_path), max_bytes=10 ** 9)
+    sources = [PROGRAM_TEXT.replace('10', str(n)) for n in range(5)]
+    for age, text in enumerate(sources):
+        cache.tokenize(text)
+        os.utime(cache.path(cache.key(text)), (age, age))
+    size = os.path.getsize(cache.path(cache.key(sources[0])))
+    cache.get(sources[0]) #refreshes the oldest entry
+    cache.max_bytes = size * 3
+    cache.evict()
+    kept = [text for text in sources if os.path.exists(cache.path(cache.key(text)))]
+    assert kept == [sources[0], sources[3], sources[4]]
+
+def test_no_temporary_files_left(tmp_path):
+    """Stores should leave only complete entries in the directory."""
+    cache = TokenCache(str(tmp_path))
+    cache.tokenize(PROGRAM_TEXT)
+    assert [name.endswith('.tok') for name in os.listdir(tmp_path)] == [True]
+
+def test_run_file_uses_cache(tmp_path, capsys):
+    """run_file should execute from cached tokens identically."""
+    source = tmp_path / 'program.pas'
+    source.write_text(PROGRAM_TEXT)
+    cache_dir = str(tmp_path / 'cache')
+    for _ in range(2):
+        Interpreter.GLOBAL_SCOPE.clear()
+        assert run_file(str(source), cache_dir) == 0
+        assert Interpreter.GLOBAL_SCOPE['y'] == 11
+    assert len(os.listdir(cache_dir)) == 1
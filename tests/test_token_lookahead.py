@@ -0,0 +1,90 @@
+"""
+Tests for the parser's one-token lookahead, which tells function calls from
+variables on every token source.
+"""
+import io
+import pytest
+from src.lexer.lexer import Lexer
+from src.lexer.stream_lexer import StreamLexer
+from src.lexer.token_buffer import tokenize_all
+from src.lexer.token import ID, LPAREN, ASSIGN
+from src.parser.ast_nodes import AST, FunctionCall, Var
+from src.parser.parser import Parser, StackParser
+from src.interpreter.interpreter import Interpreter
+from src.errors import ParserError
+
+SOURCES = {
+    'lexer': Lexer,
+    'regex': lambda text: Lexer(text, use_regex=True),
+    'buffer': tokenize_all,
+    'stream': lambda text: StreamLexer(io.BytesIO(text.encode()), chunk_size=5),
+}
+
+PROGRAM_TEXT = """PROGRAM Calls;
+VAR x, y : INTEGER;
+FUNCTION Double(n : INTEGER) : INTEGER;
+BEGIN
+    Double := n * 2
+END;
+BEGIN
+    x := Double (3);
+    y := Double
+        { the argument list may follow on the next line }
+        (x) + Double(1);
+    WRITELN(x, y)
+END.
+"""
+
+def spans(node, text):
+    """Helper returning (node type, spanned text) for every node of a tree."""
+    if isinstance(node, list):
+        return [found for item in node for found in spans(item, text)]
+    if not isinstance(node, AST):
+        return []
+    return [(type(node).__name__, text[node.start:node.end])] + [
+        found for _, value in node.fields() for found in spans(value, text)]
+
+@pytest.mark.parametrize("source", SOURCES, ids=list(SOURCES))
+@pytest.mark.parametrize("parser_class", [Parser, StackParser])
+def test_call_with_whitespace_before_paren(parser_class, source):
+    """An identifier followed by '(' after spaces, newlines or comments is a call."""
+    tree = parser_class(SOURCES[source](PROGRAM_TEXT)).parse()
+    first, second, _ = tree.block.compound_statement.children
+    assert isinstance(first.right, FunctionCall)
+    assert isinstance(second.right.left, FunctionCall) and isinstance(second.right.right, FunctionCall)
+    assert spans(tree, PROGRAM_TEXT) == spans(Parser(tokenize_all(PROGRAM_TEXT)).parse(), PROGRAM_TEXT)
+    assert PROGRAM_TEXT[first.right.start:first.right.end] == "Double (3)"
+
+def test_program_runs(capsys):
+    """Calls written with a space before '(' execute."""
+    Interpreter.GLOBAL_SCOPE.clear()
+    Interpreter(Parser(Lexer(PROGRAM_TEXT))).interpret()
+    assert Interpreter.GLOBAL_SCOPE == {'x': 6, 'y': 14}
+    assert capsys.readouterr().out == "6 14\n"
+
+@pytest.mark.parametrize("source", SOURCES, ids=list(SOURCES))
+def test_peek_token_does_not_consume(source):
+    """peek_token returns the next token and leaves the current one in place."""
+    parser = Parser(SOURCES[source]("x (  := y"))
+    assert parser.current_token.type == ID
+    assert parser.offset() == 0
+    assert parser.peek_token().type == LPAREN
+    assert parser.peek_token().type == LPAREN
+    assert (parser.current_token.type, parser.offset(), parser.token_position()) == (ID, 0, (1, 1))
+    parser.eat(ID)
+    assert (parser.current_token.type, parser.offset(), parser.end_offset()) == (LPAREN, 2, 1)
+    parser.eat(LPAREN)
+    assert (parser.current_token.type, parser.offset(), parser.end_offset()) == (ASSIGN, 5, 3)
+
+@pytest.mark.parametrize("source", SOURCES, ids=list(SOURCES))
+def test_error_position_after_peek(source):
+    """Errors after a peeked token has been consumed point at the right token."""
+    text = "PROGRAM P;\nVAR x : INTEGER;\nBEGIN\n  x := x\n    x\nEND."
+    with pytest.raises(ParserError) as error:
+        Parser(SOURCES[source](text)).parse()
+    assert (error.value.line, error.value.column) == (5, 5)
+
+def test_variable_not_followed_by_paren():
+    """An identifier followed by anything else is still a variable."""
+    tree = Parser(Lexer("PROGRAM P; VAR x, y : INTEGER; BEGIN x := y ; y := x END.")).parse()
+    assert all(isinstance(node.right, Var) for node in tree.block.compound_statement.children)
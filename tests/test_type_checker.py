@@ -0,0 +1,120 @@
+"""
+Tests for static INTEGER/REAL type inference and checking.
+"""
+import pytest
+from src.lexer.lexer import Lexer
+from src.lexer.token_buffer import tokenize_all
+from src.parser.parser import Parser
+from src.semantic.semantic_analyzer import SemanticAnalyzer
+from src.semantic.type_checker import check_types, INTEGER, REAL, BOOLEAN
+from src.optimizer.constant_folder import fold_constants
+from src.interpreter.interpreter import Interpreter
+from src.errors import SemanticError
+from benchmarks.programs import generate_program, expression_heavy, function_library
+
+PROGRAM_TEXT = """PROGRAM Types;
+VAR i, n : INTEGER; r : REAL;
+FUNCTION Half(x : REAL) : REAL;
+BEGIN
+    Half := x / 2
+END;
+BEGIN
+    n := 7;
+    r := Half(n) + n DIV 2;
+    FOR i := 1 TO n DO r := r * 1.5 - i;
+    IF n > 2 AND NOT (r = 0) THEN n := -n * 3 END
+END.
+"""
+
+def checked(text, strict=True):
+    """Helper parsing, analyzing and type checking text; returns (tree, checker)."""
+    tree = Parser(Lexer(text)).parse()
+    SemanticAnalyzer().visit(tree)
+    return tree, check_types(tree, strict)
+
+def program(statements, declarations="VAR i : INTEGER; r : REAL;"):
+    """Helper wrapping statements in a program."""
+    return f"PROGRAM P; {declarations} BEGIN {statements} END."
+
+def test_expression_types():
+    """Every expression node is annotated with its static type."""
+    tree, checker = checked(PROGRAM_TEXT)
+    assert checker.errors == []
+    first, second, loop, if_node = tree.block.compound_statement.children
+    assert first.right.type == INTEGER and first.left.type == INTEGER
+    total = second.right
+    assert (total.type, total.left.type, total.right.type) == (REAL, REAL, INTEGER)
+    assert total.left.actual_params[0].type == INTEGER
+    assert (loop.var_node.type, loop.body.right.type, loop.body.right.left.type) == (INTEGER, REAL, REAL)
+    assert (if_node.condition.type, if_node.condition.left.type) == (BOOLEAN, BOOLEAN)
+    negated = if_node.then_branch.right
+    assert (negated.type, negated.left.type) == (INTEGER, INTEGER)
+
+def test_function_bodies():
+    """Return values, parameters and locals of functions have their declared types."""
+    tree, _ = checked(PROGRAM_TEXT)
+    half = tree.block.declarations[-1]
+    body = half.block_node.compound_statement.children[0]
+    assert (body.left.type, body.right.type, body.right.left.type) == (REAL, REAL, REAL)
+
+def test_annotations_are_not_fields():
+    """The type annotation does not show up in the node's fields."""
+    tree, _ = checked(PROGRAM_TEXT)
+    assert 'type' not in dict(tree.block.compound_statement.children[0].right.fields())
+
+@pytest.mark.parametrize("statements, message", [
+    ("i := 1.5", "assignment to 'i' expects INTEGER, got REAL"),
+    ("i := 4 / 2", "assignment to 'i' expects INTEGER, got REAL"),
+    ("i := r DIV 2", "'DIV' expects INTEGER operands"),
+    ("i := Trunc(r)", "parameter 'x' of 'Trunc' expects INTEGER, got REAL"),
+    ("FOR r := 1 TO 3 DO i := 1", "FOR variable 'r' must be INTEGER"),
+    ("FOR i := 1 TO r DO i := 1", "FOR loop over 'i' expects INTEGER, got REAL"),
+])
+def test_type_errors(statements, message):
+    """Strict checking raises on the first type error."""
+    declarations = ("VAR i : INTEGER; r : REAL; "
+                    "FUNCTION Trunc(x : INTEGER) : INTEGER; BEGIN Trunc := x END;")
+    with pytest.raises(SemanticError, match=message):
+        checked(program(statements, declarations))
+
+def test_integer_widens_to_real():
+    """INTEGER values are accepted where a REAL is expected."""
+    _, checker = checked(program("r := i + 1; r := i; i := 2"))
+    assert checker.errors == []
+
+def test_lenient_mode_collects_errors():
+    """Without strict, every error is collected and the tree is still annotated."""
+    tree, checker = checked(program("i := 1.5; i := 2.5 DIV 2"), strict=False)
+    assert len(checker.errors) == 2
+    assert tree.block.compound_statement.children[0].right.type == REAL
+
+def test_interpreter_option():
+    """Interpreter(strict_types=True) rejects ill-typed programs before running them."""
+    Interpreter.GLOBAL_SCOPE.clear()
+    with pytest.raises(SemanticError, match="expects INTEGER, got REAL"):
+        Interpreter(Parser(Lexer(program("i := 1; i := i / 2"))), strict_types=True).interpret()
+    assert Interpreter.GLOBAL_SCOPE == {}
+    Interpreter(Parser(Lexer(PROGRAM_TEXT)), strict_types=True).interpret()
+    assert Interpreter.GLOBAL_SCOPE['n'] == -21
+
+def test_folded_constants():
+    """Checking a folded tree types the constants folding produced."""
+    tree = fold_constants(checked(program("r := 1 + 2.5; i := 3 * 4"))[0])
+    check_types(tree)
+    first, second = tree.block.compound_statement.children
+    assert (first.right.type, second.right.type) == (REAL, INTEGER)
+
+def test_lazy_bodies_checked_on_first_call():
+    """Deferred bodies are checked when they are parsed."""
+    text = PROGRAM_TEXT.replace("Half := x / 2", "Half := x DIV 2")
+    tree = Parser(tokenize_all(text), lazy=True).parse()
+    check_types(tree)
+    with pytest.raises(SemanticError, match="'DIV' expects INTEGER operands"):
+        tree.block.declarations[-1].block_node.resolve()
+
+@pytest.mark.parametrize("text", [generate_program(20), expression_heavy(2048), function_library(10, 3, 5)],
+                         ids=['mixed', 'expressions', 'functions'])
+def test_benchmark_programs(text):
+    """The benchmark programs type check in lenient mode without crashing."""
+    tree, checker = checked(text, strict=False)
+    assert all(message.startswith("Type mismatch") for message in checker.errors)